@@ -2,7 +2,10 @@ from __future__ import unicode_literals
 
 from django.contrib import admin
 
-from admin_page_lock.models.database_model import DatabasePageLockModel
+from admin_page_lock.models.database_model import (
+    DatabasePageLockHistoryModel,
+    DatabasePageLockModel,
+)
 
 
 class DatabasePageLockModelAdmin(admin.ModelAdmin):
@@ -53,4 +56,26 @@ class DatabasePageLockModelAdmin(admin.ModelAdmin):
     ).verbose_name  # noqa: E501
 
 
+class DatabasePageLockHistoryModelAdmin(admin.ModelAdmin):
+    list_display = (
+        "url",
+        "url_parameters",
+        "user_reference",
+        "locked_at",
+        "locked_out",
+        "archived_at",
+    )
+    list_filter = ("user_reference",)
+    list_per_page = 20
+    ordering = ("-archived_at",)
+
+    # History is read-only.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(DatabasePageLockModel, DatabasePageLockModelAdmin)
+admin.site.register(DatabasePageLockHistoryModel, DatabasePageLockHistoryModelAdmin)
@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class AdminPageLockConfig(AppConfig):
     name = "admin_page_lock"
     verbose_name = "Admin Page Lock"
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_out
+        from django.core import checks
+
+        from admin_page_lock.checks import (
+            check_data_cache,
+            check_database_constraints,
+            check_events,
+        )
+        from admin_page_lock.settings import RELEASE_ON_LOGOUT
+        from admin_page_lock.signals import release_page_locks_on_logout
+
+        checks.register(check_data_cache)
+        checks.register(check_database_constraints)
+        checks.register(check_events)
+
+        if RELEASE_ON_LOGOUT:
+            user_logged_out.connect(
+                release_page_locks_on_logout,
+                dispatch_uid="admin_page_lock_release_on_logout",
+            )
@@ -0,0 +1,48 @@
+from __future__ import unicode_literals
+
+from django.conf.urls import url
+
+from admin_page_lock.views import (
+    AsyncClosePageConnection,
+    AsyncGetPageInfo,
+    AsyncOpenPageConnection,
+    GetMetrics,
+    GetPagesInfo,
+    GetRedisPageLocks,
+    Heartbeat,
+)
+
+# Same APIs as `admin_page_lock.urls` served by async views where they exist,
+# except synchronous stream of `GetPageEvents`, which would block event loop.
+urlpatterns = [
+    # Close Page Connection.
+    url(
+        r"^close_page_connection/$",
+        AsyncClosePageConnection.as_view(),
+        name="page_lock_close_page_connection",
+    ),
+    # Get Metrics.
+    url(r"^metrics/$", GetMetrics.as_view(), name="page_lock_metrics"),
+    # Get Page Info.
+    url(
+        r"^get_page_info/$",
+        AsyncGetPageInfo.as_view(),
+        name="page_lock_get_page_connection",
+    ),
+    # Get Pages Info.
+    url(r"^get_pages_info/$", GetPagesInfo.as_view(), name="page_lock_get_pages_info"),
+    # Get Redis Page Locks.
+    url(
+        r"^redis_page_locks/$",
+        GetRedisPageLocks.as_view(),
+        name="page_lock_redis_page_locks",
+    ),
+    # Heartbeat.
+    url(r"^heartbeat/$", Heartbeat.as_view(), name="page_lock_heartbeat"),
+    # Open Page Connection.
+    url(
+        r"^open_page_connection/$",
+        AsyncOpenPageConnection.as_view(),
+        name="page_lock_open_page_connection",
+    ),
+]
@@ -0,0 +1,71 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class DataCache(object):
+    """
+    Process-local LRU cache of lock data of pages with limited number of
+    items and their time to live. `None` (page is not locked) is cached as
+    well, so `get` returns tuple `(found, data)`.
+
+    Data read from storage are stored only when no item was invalidated since
+    the reading started (see `generation`), so data changed by concurrent
+    write are not cached.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout  # [s]
+        self.generation = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.generation += 1
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return False, None
+
+            expires_at, data = item
+            if expires_at <= time.time():
+                del self._items[key]
+                return False, None
+
+            self._items.move_to_end(key)
+
+            return True, data
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+            self.generation += 1
+
+    def set(self, key, data, generation, timeout=None):
+        """
+        Stores `data` read from storage when the cache had `generation` for
+        `timeout` [s] (at most `self.timeout`).
+        """
+        if timeout is None or timeout > self.timeout:
+            timeout = self.timeout
+        if timeout <= 0:
+            return
+
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            self._items[key] = (time.time() + timeout, data)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
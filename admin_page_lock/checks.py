@@ -0,0 +1,82 @@
+from __future__ import unicode_literals
+
+from django.core import checks
+from django.db import connections, router
+
+from admin_page_lock.policies import get_page_policies
+from admin_page_lock.settings import DATA_CACHE_SIZE, ENABLE_EVENTS
+from admin_page_lock.utils import get_page_lock_class
+
+DATABASE_MODEL = "admin_page_lock.models.database_model.DatabasePageLockModel"
+
+
+def _get_models():
+    # Models used by policies, see `get_page_policies`.
+    return {i.model for i in get_page_policies()}
+
+
+def check_database_constraints(app_configs, **kwargs):
+    """
+    `DatabasePageLockModel` relies on conditional unique constraint
+    `unique_active_page_lock`, which some databases (e.g. MySQL) silently
+    don't create, so two users could lock the same page there.
+    """
+    if DATABASE_MODEL not in _get_models():
+        return []
+
+    from admin_page_lock.models.database_model import DatabasePageLockModel
+
+    connection = connections[router.db_for_write(DatabasePageLockModel)]
+    if connection.features.supports_partial_indexes:
+        return []
+
+    return [
+        checks.Error(
+            "DatabasePageLockModel requires conditional unique constraints, "
+            "database {} doesn't support them.".format(connection.vendor),
+            hint="Use another model, e.g. RedisPageLockModel or CachePageLockModel.",
+            id="admin_page_lock.E001",
+        )
+    ]
+
+
+def check_data_cache(app_configs, **kwargs):
+    """
+    Invalidations of models using broker of current process (e.g.
+    `DatabasePageLockModel`) never reach caches of other processes, so these
+    models don't use lock data cache.
+    """
+    if not DATA_CACHE_SIZE:
+        return []
+
+    return [
+        checks.Warning(
+            "Invalidations of {} don't reach other processes, it doesn't use "
+            "lock data cache.".format(model_path),
+            hint="Use RedisPageLockModel for pages using the cache.",
+            id="admin_page_lock.W003",
+        )
+        for model_path in sorted(_get_models())
+        if not get_page_lock_class(model_path).notifies_all_processes
+    ]
+
+
+def check_events(app_configs, **kwargs):
+    """
+    Events of models using broker of current process (e.g.
+    `DatabasePageLockModel`) never reach streams of other processes, their
+    pages only poll.
+    """
+    if not ENABLE_EVENTS:
+        return []
+
+    return [
+        checks.Warning(
+            "Events of {} don't reach other processes, its pages only "
+            "poll.".format(model_path),
+            hint="Use RedisPageLockModel for pages receiving events.",
+            id="admin_page_lock.W002",
+        )
+        for model_path in sorted(_get_models())
+        if not get_page_lock_class(model_path).notifies_all_processes
+    ]
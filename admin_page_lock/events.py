@@ -0,0 +1,113 @@
+from __future__ import unicode_literals
+
+import threading
+
+from admin_page_lock.settings import EVENTS_MAX_STREAMS
+
+try:
+    from queue import Empty, Queue
+except ImportError:
+    from Queue import Empty, Queue
+
+
+class EventStream(object):
+    """
+    Iterable of event `stream` calling `on_close` once when the response is
+    closed (even if the stream was never iterated).
+    """
+
+    def __init__(self, stream, on_close):
+        self.stream = stream
+        self.on_close = on_close
+        self._is_closed = False
+
+    def __iter__(self):
+        return iter(self.stream)
+
+    def close(self):
+        if self._is_closed:
+            return
+
+        self._is_closed = True
+        try:
+            self.stream.close()
+        finally:
+            self.on_close()
+
+
+class EventStreamCounter(object):
+    """Counts event streams open in current process, see `acquire`."""
+
+    def __init__(self, max_streams):
+        self.max_streams = max_streams
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Returns whether another stream can be open, see `release`."""
+        with self._lock:
+            if self.count >= self.max_streams:
+                return False
+
+            self.count += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.count -= 1
+
+
+class LocalSubscription(object):
+    """Subscription of one channel of `LocalBroker`."""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.queue = Queue()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def get(self, timeout=None):
+        """Returns next event or `None` when no event comes in `timeout` [s]."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+
+class LocalBroker(object):
+    """
+    Publishes events to subscribers in current process. It is a stand-in of
+    `Redis` pub/sub for models without their own messaging, so subscribers
+    get only events of locks changed by the same process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+
+        for subscription in subscriptions:
+            subscription.queue.put(event)
+
+    def subscribe(self, channel):
+        subscription = LocalSubscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.channel, None)
+
+
+local_broker = LocalBroker()
+event_streams = EventStreamCounter(EVENTS_MAX_STREAMS)
@@ -1,21 +1,51 @@
 from __future__ import unicode_literals
 
 import datetime
+import json
 import logging
+import random
+import time
 
 from django.middleware.csrf import get_token
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 from admin_page_lock import settings
+from admin_page_lock.hooks import (
+    PHASE_EXPIRY_CHECK,
+    PHASE_RESPONSE,
+    PHASE_SETTINGS,
+    PHASE_STORAGE_READ,
+    PHASE_STORAGE_WRITE,
+    trace_phase,
+)
+from admin_page_lock.metrics import measure_handler_function, record_acquire_result
 from admin_page_lock.settings import (
-    API_INTERVAL,
     DISABLE_CRSF_TOKEN,
+    ENABLE_EVENTS,
     ENABLE_FAILED_CHECK,
+    EVENTS_KEEPALIVE,
+    EVENTS_MAX_AGE,
     HOMEPAGE,
+    LOCK_ACQUIRED,
+    LOCK_DENIED,
+    LOCK_REACQUIRED,
     MAX_FAILED_CHECK,
-    TIMEOUT,
+    POLL_BACKPRESSURE,
+    POLL_JITTER,
+    POLL_MAX_INTERVAL,
 )
+from admin_page_lock.utils import get_page_lock_class
+
+logger = logging.getLogger(__name__)
+
+# Messages logged by handler functions, see `_log_message`.
+MESSAGE_CLOSE_PAGE_CONNECTION = _("Close page connection.")
+MESSAGE_GET_PAGE_EVENTS = _("Get page events.")
+MESSAGE_GET_PAGE_INFO = _("Get page info.")
+MESSAGE_GET_PAGES_INFO = _("Get pages info.")
+MESSAGE_HEARTBEAT = _("Heartbeat.")
+MESSAGE_OPEN_PAGE_CONNECTION = _("Open/Reopen page connection.")
 
 
 class PageLockHandler(object):
@@ -29,102 +59,71 @@ class PageLockHandler(object):
     def __init__(self, req, model_class, *args, **kwargs):
         self.model_class = model_class
         self.page_settings = model_class.get_page_settings(req)
+        self._lock_settings = None
 
     def _get_now(self):
         return timezone.now()
 
-    def _get_lock_settings(self):
-        # TODO(vstefka) this settings can be specific for each page defined in
-        # settings somehow or defined and stored in database. Right now, the
-        # settings is same for all pages!
-        lock_settings = {
-            "csrf_token": get_token(self.page_settings["req"])
-            if not DISABLE_CRSF_TOKEN
-            else "",
-            "homepage": HOMEPAGE,
-            "messages": self.page_settings["messages"],
-            "user_reference": self.page_settings["user_reference"],
+    def _get_acquire_kwargs(self, locked_at):
+        # Returns arguments of `acquire` locking current page for its timeout,
+        # lost contact with page deactivates the lock.
+        return {
+            "locked_at": locked_at,
+            "locked_out": locked_at
+            + datetime.timedelta(seconds=self.page_settings.policy.timeout),
+            "stale_before": self._get_stale_before(locked_at),
+            "can_open_more_tabs": settings.CAN_OPEN_MORE_TABS,
         }
 
-        return lock_settings
-
-    def _log_message(self, message, status="debug"):
-        # Log handler messages.
-        loger_function = getattr(logging, status)
-        page_url = self.page_settings["page_url"]
-        user_reference = self.page_settings["user_reference"]
-
-        loger_function(
-            _('Handler: "{}"\nURL: "{}"\nUser: "{}"\nMessage: "{}"\n').format(
-                self.HANDLER_NAME,
-                page_url if page_url else "",
-                user_reference if user_reference else "",
-                message,
-            )
-        )
-
-    def close_page_connection(self, req, *args, **kwargs):
-        """
-        Closes page connection. Remove data related to the current page
-        from storage or set it up to non-active only if same user is locking
-        current page.
-        """
-        self._log_message(_("Close page connection."))
-        # Get data from storage.
-        data = self.model_class.get_data(self.page_settings)
-
-        # Deactivate lock if user is locking current page.
-        if (
-            data is not None
-            and data["user_reference"] == self.page_settings["user_reference"]
-            and data["tab_counter"] == 1
-        ):
-            self.model_class.deactivate(self.page_settings)
-            return {"is_locked": False}
-        elif (
-            data is not None
-            and data["user_reference"] == self.page_settings["user_reference"]
-            and data["tab_counter"] >= 1
-        ):
-            # Deactivate previous data.
-            self.model_class.deactivate(self.page_settings)
-            self.model_class.set_data(
-                self.page_settings,
-                {
-                    "locked_at": data["locked_at"],
-                    "locked_out": data["locked_out"],
-                    "user_reference": data["user_reference"],
-                    "tab_counter": data["tab_counter"] - 1,
-                },
-            )
-            return {"is_locked": True}
-
-        return {"is_locked": False}
+    def _get_lock_settings(self):
+        # Lock settings are built only once for all calls of the handler.
+        if self._lock_settings is None:
+            self._lock_settings = {
+                "csrf_token": get_token(self.page_settings.req)
+                if not DISABLE_CRSF_TOKEN
+                else "",
+                # Events of other models don't reach all processes.
+                "enable_events": (
+                    ENABLE_EVENTS and self.model_class.notifies_all_processes
+                ),
+                "homepage": HOMEPAGE,
+                "messages": self.page_settings.messages,
+                "user_reference": self.page_settings.user_reference,
+            }
 
-    def get_page_info(self, req, *args, **kwargs):
-        """
-        Returns page information:
-         + is_locked            whether the page is locked (True/False);
-         + locked_by            `user_reference` that locked the page;
-         + page_lock_settings   returns general page lock settings;
-         + reconnect_in         time interval when page might be available [s].
-        """
-        self._log_message(_("Get page info."))
+        return self._lock_settings
+
+    def _get_lock_token(self, data):
+        # Fencing token is returned only to user locking the page.
+        if data is None or data["user_reference"] != self.page_settings.user_reference:
+            return None
+
+        return data.get("token")
+
+    def _get_page_events(self, model_class, page_settings):
+        # Yields events of `get_page_events`, the page is subscribed when the
+        # stream starts.
+        subscription = model_class.subscribe_events(page_settings)
+        try:
+            yield "retry: {}\n\n".format(int(page_settings.policy.api_interval))
+
+            closes_at = time.time() + EVENTS_MAX_AGE
+            while time.time() < closes_at:
+                event = subscription.get(
+                    timeout=min(EVENTS_KEEPALIVE, max(closes_at - time.time(), 0))
+                )
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield "event: {}\ndata: {}\n\n".format(
+                        event["event"], json.dumps(event)
+                    )
+        finally:
+            subscription.close()
+
+    def _get_page_info_data(self, data):
+        # Returns response of `get_page_info` for lock `data`.
         response_data = {"page_lock_settings": self._get_lock_settings()}
-        # Get data from storage.
-        data = self.model_class.get_data(self.page_settings)
-
-        now = self._get_now()
-        interval_threshold = (API_INTERVAL / 1000) * MAX_FAILED_CHECK  # (ms to s) * #
-
-        # 0. Lost contact with page.
-        if (
-            ENABLE_FAILED_CHECK
-            and data is not None
-            and (now - data["last_checked"]).seconds >= interval_threshold
-        ):
-            self.model_class.deactivate(self.page_settings)
-            data = self.model_class.get_data(self.page_settings)
 
         # 1. No user is locking the page.
         if data is None:
@@ -136,24 +135,17 @@ class PageLockHandler(object):
         else:
             is_locked = True
             locked_by = data["user_reference"]
-            locked_out = data["locked_out"]
-            now = self._get_now()
-            dtime = locked_out - now
-
-            reconnect_in = 0
-            if dtime.seconds < TIMEOUT:
-                reconnect_in = dtime.seconds
+            reconnect_in = self._get_reconnect_in(data["locked_out"], 0)
 
             # Note: parameter `reconnected` is not used right now.
-            reconnected = False
-            if self.page_settings["user_reference"] == data["user_reference"]:
-                self.model_class.check_data(self.page_settings)
-                reconnected = True
+            reconnected = self.page_settings.user_reference == locked_by
 
         response_data.update(
             {
                 "is_locked": is_locked,
                 "locked_by": locked_by,
+                "lock_token": self._get_lock_token(data),
+                "next_poll_in": self._get_next_poll_in(data),
                 "reconnect_in": reconnect_in,
                 "reconnected": reconnected,
             }
@@ -161,106 +153,373 @@ class PageLockHandler(object):
 
         return response_data
 
-    def open_page_connection(self, req, *args, **kwargs):
-        """
-        Opens/Reopens page connection and returns:
-         + is_locked            whether page connection is locked (True/False);
-         + locked_by            user locking current page;
-         + page_lock_settings   current lock page configuratino;
-         + reconnected          page is locked by same user;
-         + reconnect_in         number of seconds when page might be available.
-        """
-        self._log_message(_("Open/Reopen page connection."))
+    def _get_page_model_class(self, req, page_full_url):
+        # Returns model given by policy of the page and settings of the page.
+        page_settings = self.model_class.get_page_settings(req, page_full_url)
+        model_class = get_page_lock_class(page_settings.policy.model)
+        if model_class is not self.model_class:
+            page_settings = model_class.get_page_settings(req, page_full_url)
+
+        return model_class, page_settings
+
+    def _get_reconnect_in(self, locked_out, default, policy=None):
+        # Returns number of seconds when page might be available.
+        policy = policy or self.page_settings.policy
+        dtime = locked_out - self._get_now()
+        if dtime.seconds < policy.timeout:
+            return dtime.seconds
+
+        return default
+
+    def _get_stale_before(self, now, policy=None):
+        # Returns time before which user locking the page has lost contact
+        # with the page or `None` when the check is disabled.
+        if not ENABLE_FAILED_CHECK:
+            return None
+
+        policy = policy or self.page_settings.policy
+        # (ms to s) * #
+        interval_threshold = (policy.api_interval / 1000) * MAX_FAILED_CHECK
+
+        return now - datetime.timedelta(seconds=interval_threshold)
+
+    def _get_next_poll_in(self, data, policy=None):
+        # Returns number of milliseconds after which the page should call API
+        # again. User locking the page polls every `API_INTERVAL` to renew the
+        # lock, other users poll less often under `POLL_BACKPRESSURE`, but
+        # not later than the lock runs out. Interval is randomized by
+        # `POLL_JITTER`, so tabs opened at once don't poll in lockstep.
+        policy = policy or self.page_settings.policy
+        user_reference = self.page_settings.user_reference
+        jitter = random.uniform(-POLL_JITTER, POLL_JITTER)
+
+        # Lock must be renewed before it becomes stale.
+        if data is not None and data["user_reference"] == user_reference:
+            return int(policy.api_interval * (1 - abs(jitter)))
+
+        next_poll_in = min(policy.api_interval * POLL_BACKPRESSURE, POLL_MAX_INTERVAL)
+        next_poll_in *= 1 + jitter
+        if data is not None:
+            locked_out_in = (data["locked_out"] - self._get_now()).total_seconds()
+            next_poll_in = min(next_poll_in, locked_out_in * 1000)
+
+        # Don't poll more often than once per second.
+        return int(max(next_poll_in, 1000))
+
+    def _get_open_page_connection_data(self, result, data):
+        # Returns response of `open_page_connection` for result of `acquire`.
         response_data = {"page_lock_settings": self._get_lock_settings()}
-        # Get data from storage.
-        data = self.model_class.get_data(self.page_settings)
+        timeout = self.page_settings.policy.timeout
 
-        now = self._get_now()
-        interval_threshold = (API_INTERVAL / 1000) * MAX_FAILED_CHECK  # (ms to s) * #
-
-        # 0. Lost contact with page.
-        if (
-            ENABLE_FAILED_CHECK
-            and data is not None
-            and (now - data["last_checked"]).seconds >= interval_threshold
-        ):
-            self.model_class.deactivate(self.page_settings)
-            data = self.model_class.get_data(self.page_settings)
+        # Lock was released after it denied the page, so it is not locked.
+        if result == LOCK_DENIED and data is None:
+            return self._get_page_info_data(None)
 
-        # 1. Page is not locked and is going to be lock by current user.
-        if data is None:
-            is_locked = True
-            locked_by = self.page_settings["user_reference"]
+        # 1. Page was not locked and it is locked by current user now.
+        if result == LOCK_ACQUIRED:
             reconnected = False
-            reconnect_in = TIMEOUT
-
-            locked_at = self._get_now()
-            locked_out = locked_at + datetime.timedelta(seconds=TIMEOUT)
-
-            self.model_class.set_data(
-                self.page_settings,
-                {
-                    "locked_at": locked_at,
-                    "locked_out": locked_out,
-                    "user_reference": locked_by,
-                    "tab_counter": 1,
-                },
-            )
-
+            reconnect_in = timeout
         # 2. Page is locked by another user or user can't open multiple tabs.
-        elif data is not None and (
-            self.page_settings["user_reference"] != data["user_reference"]
-            or not settings.CAN_OPEN_MORE_TABS
-        ):
-            is_locked = True
-            locked_by = data["user_reference"]
+        elif result == LOCK_DENIED:
             reconnected = False
-            reconnect_in = TIMEOUT
-            locked_out = data["locked_out"]
-            now = self._get_now()
-            dtime = locked_out - now
-            if dtime.seconds < TIMEOUT:
-                reconnect_in = dtime.seconds
-
+            reconnect_in = self._get_reconnect_in(data["locked_out"], timeout)
         # 3. Page is locked by same user.
-        elif (
-            data is not None
-            and self.page_settings["user_reference"] == data["user_reference"]
-        ):
-            is_locked = True
-            locked_by = data["user_reference"]
-            tab_counter = data["tab_counter"]
+        elif result == LOCK_REACQUIRED:
             reconnected = True
-            reconnect_in = TIMEOUT
-
-            # Deactivate previous data.
-            self.model_class.deactivate(self.page_settings)
-
-            # Store new data in storage.
-            locked_at = self._get_now()
-            locked_out = locked_at + datetime.timedelta(seconds=TIMEOUT)
-
-            self.model_class.set_data(
-                self.page_settings,
-                {
-                    "locked_at": locked_at,
-                    "locked_out": locked_out,
-                    "user_reference": locked_by,
-                    "tab_counter": tab_counter + 1,
-                },
-            )
-
+            reconnect_in = timeout
         # 4. Impossible situation, placed here for regression.
         else:
             raise RuntimeError("Can't open page connection due to erroneous state.")
 
         response_data.update(
             {
-                "is_locked": is_locked,
-                "locked_by": locked_by,
+                "is_locked": True,
+                "locked_by": data["user_reference"],
+                "lock_token": self._get_lock_token(data),
+                "next_poll_in": self._get_next_poll_in(data),
                 "reconnected": reconnected,
                 "reconnect_in": reconnect_in,
             }
         )
 
         return response_data
+
+    def _log_message(self, message, status="debug"):
+        # Log handler messages, they are formatted only when `status` is
+        # enabled for the logger.
+        level = getattr(logging, status.upper())
+        if not logger.isEnabledFor(level):
+            return
+
+        page_url = self.page_settings.page_url
+        user_reference = self.page_settings.user_reference
+        logger.log(
+            level,
+            'Handler: "%s"\nURL: "%s"\nUser: "%s"\nMessage: "%s"\n',
+            self.HANDLER_NAME,
+            page_url if page_url else "",
+            user_reference if user_reference else "",
+            message,
+        )
+
+    def _resolve_page_settings(self):
+        # Resolves lazy settings of current page (request data, policy and
+        # user) within `PHASE_SETTINGS`.
+        self.page_settings.policy
+        self.page_settings.user_reference
+
+    def _trace_phase(self, phase, function):
+        # Returns context manager of `phase` of handler `function`.
+        return trace_phase(phase, handler=self, function=function)
+
+    # Async variants of handler functions (see `AsyncBasePageView`).
+
+    @measure_handler_function
+    async def aclose_page_connection(self, req, *args, **kwargs):
+        """See `close_page_connection`."""
+        self._log_message(MESSAGE_CLOSE_PAGE_CONNECTION)
+        with self._trace_phase(PHASE_SETTINGS, "aclose_page_connection"):
+            self._resolve_page_settings()
+        with self._trace_phase(PHASE_STORAGE_WRITE, "aclose_page_connection"):
+            is_locked = await self.model_class.arelease(
+                self.page_settings, token=self.page_settings.lock_token
+            )
+
+        with self._trace_phase(PHASE_RESPONSE, "aclose_page_connection"):
+            return {"is_locked": is_locked}
+
+    @measure_handler_function
+    async def aget_page_info(self, req, *args, **kwargs):
+        """See `get_page_info`."""
+        self._log_message(MESSAGE_GET_PAGE_INFO)
+        with self._trace_phase(PHASE_SETTINGS, "aget_page_info"):
+            self._resolve_page_settings()
+            stale_before = self._get_stale_before(self._get_now())
+        with self._trace_phase(PHASE_STORAGE_WRITE, "aget_page_info"):
+            data = await self.model_class.arefresh(
+                self.page_settings, stale_before=stale_before
+            )
+
+        with self._trace_phase(PHASE_RESPONSE, "aget_page_info"):
+            return self._get_page_info_data(data)
+
+    @measure_handler_function
+    async def aopen_page_connection(self, req, *args, **kwargs):
+        """See `open_page_connection`."""
+        self._log_message(MESSAGE_OPEN_PAGE_CONNECTION)
+        with self._trace_phase(PHASE_SETTINGS, "aopen_page_connection"):
+            self._resolve_page_settings()
+            acquire_kwargs = self._get_acquire_kwargs(self._get_now())
+        with self._trace_phase(PHASE_STORAGE_WRITE, "aopen_page_connection"):
+            result, data = await self.model_class.aacquire(
+                self.page_settings, **acquire_kwargs
+            )
+        record_acquire_result(self.model_class, result)
+
+        with self._trace_phase(PHASE_RESPONSE, "aopen_page_connection"):
+            return self._get_open_page_connection_data(result, data)
+
+    @measure_handler_function
+    def close_page_connection(self, req, *args, **kwargs):
+        """
+        Closes page connection. Remove data related to the current page
+        from storage or set it up to non-active only if same user is locking
+        current page.
+        """
+        self._log_message(MESSAGE_CLOSE_PAGE_CONNECTION)
+        with self._trace_phase(PHASE_SETTINGS, "close_page_connection"):
+            self._resolve_page_settings()
+        with self._trace_phase(PHASE_STORAGE_WRITE, "close_page_connection"):
+            is_locked = self.model_class.release(
+                self.page_settings, token=self.page_settings.lock_token
+            )
+
+        with self._trace_phase(PHASE_RESPONSE, "close_page_connection"):
+            return {"is_locked": is_locked}
+
+    def get_page_events(self, req, *args, **kwargs):
+        """
+        Returns generator of lock events of the page given by `url` keyword
+        argument in format of Server-Sent Events:
+         + event                `acquired`, `expired` or `released`;
+         + data                 JSON of `event` and `locked_by`.
+        Comment is sent every `EVENTS_KEEPALIVE` seconds and the stream ends
+        after `EVENTS_MAX_AGE` seconds, then the browser reconnects. Returns
+        `None` when events of the model of the page don't reach all processes
+        (see `notifies_all_processes`), the page polls then.
+        """
+        self._log_message(MESSAGE_GET_PAGE_EVENTS)
+        model_class, page_settings = self._get_page_model_class(req, kwargs["url"])
+        if not model_class.notifies_all_processes:
+            return None
+
+        return self._get_page_events(model_class, page_settings)
+
+    @measure_handler_function
+    def get_page_info(self, req, *args, **kwargs):
+        """
+        Returns page information:
+         + is_locked            whether the page is locked (True/False);
+         + locked_by            `user_reference` that locked the page;
+         + lock_token           fencing token of the lock of current user;
+         + page_lock_settings   returns general page lock settings;
+         + reconnect_in         time interval when page might be available [s].
+        """
+        self._log_message(MESSAGE_GET_PAGE_INFO)
+        with self._trace_phase(PHASE_SETTINGS, "get_page_info"):
+            self._resolve_page_settings()
+            stale_before = self._get_stale_before(self._get_now())
+        # Get data from storage, lost contact with page deactivates the lock.
+        with self._trace_phase(PHASE_STORAGE_WRITE, "get_page_info"):
+            data = self.model_class.refresh(
+                self.page_settings, stale_before=stale_before
+            )
+
+        with self._trace_phase(PHASE_RESPONSE, "get_page_info"):
+            return self._get_page_info_data(data)
+
+    @measure_handler_function
+    def get_pages_info(self, req, *args, **kwargs):
+        """
+        Returns information of more pages (given by `urls` keyword argument
+        or posted as `urls`) at once:
+         + pages                dictionary of page url and its `is_locked`,
+                                `locked_by` and `reconnect_in`.
+        """
+        self._log_message(MESSAGE_GET_PAGES_INFO)
+        with self._trace_phase(PHASE_SETTINGS, "get_pages_info"):
+            pages_settings = self.model_class.get_pages_settings(
+                req, kwargs.get("urls")
+            )
+
+            # Pages are grouped by model given by their policy and data of
+            # every group are read from storage at once.
+            pages_by_model = {}
+            for page_full_url, page_settings in pages_settings.items():
+                if page_settings.policy.disable:
+                    continue
+
+                model_class, page_settings = self._get_page_model_class(
+                    req, page_full_url
+                )
+                pages_by_model.setdefault(model_class, []).append(
+                    (page_full_url, page_settings)
+                )
+
+        with self._trace_phase(PHASE_STORAGE_READ, "get_pages_info"):
+            pages_data = {}
+            for model_class, model_pages in pages_by_model.items():
+                pages_data.update(
+                    zip(
+                        [i[0] for i in model_pages],
+                        model_class.get_data_many([i[1] for i in model_pages]),
+                    )
+                )
+
+        now = self._get_now()
+        with self._trace_phase(PHASE_EXPIRY_CHECK, "get_pages_info"):
+            for page_full_url, data in list(pages_data.items()):
+                stale_before = self._get_stale_before(
+                    now, pages_settings[page_full_url].policy
+                )
+
+                # Lost contact with page, the lock is ignored here and
+                # deactivated by the next call of the page itself.
+                if (
+                    data is not None
+                    and stale_before is not None
+                    and data["last_checked"] <= stale_before
+                ):
+                    pages_data[page_full_url] = None
+
+        with self._trace_phase(PHASE_RESPONSE, "get_pages_info"):
+            pages = {}
+            for page_full_url, page_settings in pages_settings.items():
+                data = pages_data.get(page_full_url)
+
+                # 1. No user is locking the page.
+                if data is None:
+                    pages[page_full_url] = {
+                        "is_locked": False,
+                        "locked_by": None,
+                        "reconnect_in": 0,
+                    }
+                # 2. Page is locked by current user or by another user.
+                else:
+                    pages[page_full_url] = {
+                        "is_locked": True,
+                        "locked_by": data["user_reference"],
+                        "reconnect_in": self._get_reconnect_in(
+                            data["locked_out"], 0, page_settings.policy
+                        ),
+                    }
+
+            return {"pages": pages}
+
+    @measure_handler_function
+    def heartbeat(self, req, *args, **kwargs):
+        """
+        Renews lock of user locking current page and returns `None` when
+        `locked_by` and `lock_token` posted by the page are still valid,
+        otherwise returns the same data as `get_page_info`.
+        """
+        self._log_message(MESSAGE_HEARTBEAT)
+        with self._trace_phase(PHASE_SETTINGS, "heartbeat"):
+            self._resolve_page_settings()
+            stale_before = self._get_stale_before(self._get_now())
+            lock_token = self.page_settings.lock_token
+        # User locking the page renews the lock given by its fencing token by
+        # one conditional write.
+        if (
+            lock_token is not None
+            and self.page_settings.post_data.get("locked_by")
+            == self.page_settings.user_reference
+        ):
+            with self._trace_phase(PHASE_STORAGE_WRITE, "heartbeat"):
+                if self.model_class.touch(
+                    self.page_settings, lock_token, stale_before=stale_before
+                ):
+                    return None
+
+        # Get data from storage, lost contact with page deactivates the lock.
+        with self._trace_phase(PHASE_STORAGE_WRITE, "heartbeat"):
+            data = self.model_class.refresh(
+                self.page_settings, stale_before=stale_before
+            )
+
+        with self._trace_phase(PHASE_RESPONSE, "heartbeat"):
+            # Page gets new token when its lock is acquired again.
+            locked_by = data["user_reference"] if data is not None else None
+            if (
+                locked_by == self.page_settings.post_data.get("locked_by")
+                and self._get_lock_token(data) == lock_token
+            ):
+                return None
+
+            # Page is updated by the response, no call of `get_page_info`.
+            return self._get_page_info_data(data)
+
+    @measure_handler_function
+    def open_page_connection(self, req, *args, **kwargs):
+        """
+        Opens/Reopens page connection and returns:
+         + is_locked            whether page connection is locked (True/False);
+         + locked_by            user locking current page;
+         + lock_token           fencing token of the lock of current user;
+         + page_lock_settings   current lock page configuratino;
+         + reconnected          page is locked by same user;
+         + reconnect_in         number of seconds when page might be available.
+        """
+        self._log_message(MESSAGE_OPEN_PAGE_CONNECTION)
+        with self._trace_phase(PHASE_SETTINGS, "open_page_connection"):
+            self._resolve_page_settings()
+            acquire_kwargs = self._get_acquire_kwargs(self._get_now())
+        # Lock the page by one storage operation.
+        with self._trace_phase(PHASE_STORAGE_WRITE, "open_page_connection"):
+            result, data = self.model_class.acquire(
+                self.page_settings, **acquire_kwargs
+            )
+        record_acquire_result(self.model_class, result)
+
+        with self._trace_phase(PHASE_RESPONSE, "open_page_connection"):
+            return self._get_open_page_connection_data(result, data)
@@ -0,0 +1,115 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+
+from admin_page_lock.settings import HOOKS
+from admin_page_lock.utils import get_page_lock_class
+
+# Phases of handler functions passed to hooks.
+PHASE_SETTINGS = "settings"  # settings of the page are resolved
+PHASE_STORAGE_READ = "storage_read"  # lock data are read from storage
+PHASE_EXPIRY_CHECK = "expiry_check"  # stale and expired locks are removed
+PHASE_STORAGE_WRITE = "storage_write"  # lock is acquired, renewed or released
+PHASE_RESPONSE = "response"  # response data are built
+
+# Registered hooks, see `register_hook`. The tuple is replaced on change, so
+# it is read without lock.
+_hooks = None
+_hooks_lock = threading.Lock()
+
+
+class Phase(object):
+    """
+    Context manager of one phase calling all hooks. Duration of the phase
+    [s] is added to `context` as `duration` before hooks are exited.
+    """
+
+    __slots__ = ("hooks", "name", "context", "_managers", "_start")
+
+    def __init__(self, hooks, name, context):
+        self.hooks = hooks
+        self.name = name
+        self.context = context
+
+    def __enter__(self):
+        self._managers = []
+        for hook in self.hooks:
+            manager = hook(self.name, self.context)
+            if manager is not None:
+                manager.__enter__()
+                self._managers.append(manager)
+        self._start = time.perf_counter()
+
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context["duration"] = time.perf_counter() - self._start
+        for manager in reversed(self._managers):
+            manager.__exit__(exc_type, exc_value, traceback)
+
+        return False
+
+
+class NoPhase(object):
+    """Phase without hooks, it does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NO_PHASE = NoPhase()
+
+
+def get_hooks():
+    """Returns registered hooks, hooks of `HOOKS` are registered first."""
+    global _hooks
+
+    if _hooks is None:
+        with _hooks_lock:
+            if _hooks is None:
+                _hooks = tuple(get_page_lock_class(i) for i in HOOKS)
+
+    return _hooks
+
+
+def register_hook(hook):
+    """
+    Registers `hook` called as `hook(phase, context)` when a phase of handler
+    function starts (see `PHASE_*`). It can return a context manager (e.g.
+    a span of OpenTelemetry) which is exited when the phase ends. `context`
+    contains:
+     + handler          handler of the request (phases of handler);
+     + function         name of handler function (phases of handler);
+     + model            model class (phases of model);
+     + page_settings    settings of the page (phases of model);
+     + duration         duration of the phase [s] when it ends.
+    """
+    global _hooks
+
+    get_hooks()
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks = _hooks + (hook,)
+
+
+def trace_phase(name, **context):
+    """Returns context manager of phase `name` of handler function."""
+    hooks = _hooks if _hooks is not None else get_hooks()
+    if not hooks:
+        return NO_PHASE
+
+    return Phase(hooks, name, context)
+
+
+def unregister_hook(hook):
+    global _hooks
+
+    get_hooks()
+    with _hooks_lock:
+        _hooks = tuple(i for i in _hooks if i is not hook)
@@ -0,0 +1,46 @@
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from admin_page_lock.utils import prune_page_lock_history, reap_page_locks
+
+
+class Command(BaseCommand):
+    help = (
+        "Deactivates (or deletes, see PAGE_LOCK_KEEP_DB_LOCKS) expired page locks "
+        "and locks of pages that lost contact (see PAGE_LOCK_ENABLE_FAILED_CHECK). "
+        "Prunes history older than PAGE_LOCK_HISTORY_RETENTION."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of locks deactivated by one query.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Run every INTERVAL seconds instead of running once.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            counts = reap_page_locks(batch_size=options["batch_size"])
+            pruned = prune_page_lock_history(batch_size=options["batch_size"])
+
+            if options["verbosity"] > 0:
+                for model_class, count in counts.items():
+                    self.stdout.write(
+                        "{}: {} page locks reaped.".format(model_class.__name__, count)
+                    )
+                self.stdout.write("History: {} page locks pruned.".format(pruned))
+
+            if not options["interval"]:
+                return
+
+            time.sleep(options["interval"])
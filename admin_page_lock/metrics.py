@@ -0,0 +1,289 @@
+from __future__ import unicode_literals
+
+import asyncio
+import bisect
+import functools
+import os
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import ugettext_lazy as _
+
+from admin_page_lock.settings import ENABLE_METRICS, METRICS_BACKEND, METRICS_BUCKETS
+from admin_page_lock.utils import get_page_lock_class
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+# Content type of Prometheus text format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Metrics and their types and descriptions.
+ACQUIRE_RESULTS = "page_lock_acquire_results_total"
+HANDLER_DURATION = "page_lock_handler_duration_seconds"
+HANDLER_ERRORS = "page_lock_handler_errors_total"
+OPERATION_DURATION = "page_lock_operation_duration_seconds"
+OPERATION_ERRORS = "page_lock_operation_errors_total"
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+METRICS = {
+    ACQUIRE_RESULTS: (
+        COUNTER,
+        "Opened pages by result of the lock, denied ones are contention.",
+    ),
+    HANDLER_DURATION: (HISTOGRAM, "Duration of handler functions."),
+    HANDLER_ERRORS: (COUNTER, "Handler functions failed by exception."),
+    OPERATION_DURATION: (HISTOGRAM, "Duration of storage operations of models."),
+    OPERATION_ERRORS: (COUNTER, "Storage operations of models failed by exception."),
+}
+
+# Backend of current process, see `get_metrics`.
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+class BaseMetrics(object):
+    """Backend storing and exporting metrics, see `METRICS_BACKEND`."""
+
+    def increment(self, name, labels, value=1):
+        raise ImproperlyConfigured(_('Function: "increment" is not implemented'))
+
+    def observe(self, name, labels, value):
+        raise ImproperlyConfigured(_('Function: "observe" is not implemented'))
+
+    def render(self):
+        """Returns metrics in Prometheus text format."""
+        raise ImproperlyConfigured(_('Function: "render" is not implemented'))
+
+
+class Metrics(BaseMetrics):
+    """
+    Stores metrics in memory of current process, so every process of the
+    deployment must be scraped (or `PrometheusClientMetrics` used).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels): value
+        self._histograms = {}  # (name, labels): [bucket counts, sum, count]
+
+    def _format_labels(self, labels):
+        if not labels:
+            return ""
+
+        return "{{{}}}".format(
+            ",".join(
+                '{}="{}"'.format(
+                    name,
+                    str(value)
+                    .replace("\\", "\\\\")
+                    .replace('"', '\\"')
+                    .replace("\n", "\\n"),
+                )
+                for name, value in labels
+            )
+        )
+
+    def _render_histogram(self, name, labels, histogram):
+        bucket_counts, total, count = histogram
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(METRICS_BUCKETS, bucket_counts):
+            cumulative += bucket_count
+            lines.append(
+                "{}_bucket{} {}".format(
+                    name,
+                    self._format_labels(labels + (("le", repr(bound)),)),
+                    cumulative,
+                )
+            )
+        lines.append(
+            "{}_bucket{} {}".format(
+                name, self._format_labels(labels + (("le", "+Inf"),)), count
+            )
+        )
+        lines.append("{}_sum{} {!r}".format(name, self._format_labels(labels), total))
+        lines.append("{}_count{} {}".format(name, self._format_labels(labels), count))
+
+        return lines
+
+    def increment(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        # Last item counts values above all buckets.
+        index = bisect.bisect_left(METRICS_BUCKETS, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = [[0] * (len(METRICS_BUCKETS) + 1), 0.0, 0]
+                self._histograms[key] = histogram
+
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                i: [list(j[0]), j[1], j[2]] for i, j in self._histograms.items()
+            }
+
+        lines = []
+        for name in sorted(METRICS):
+            metric_type, description = METRICS[name]
+            lines.append("# HELP {} {}".format(name, description))
+            lines.append("# TYPE {} {}".format(name, metric_type))
+
+            if metric_type == COUNTER:
+                for (metric_name, labels), value in sorted(counters.items()):
+                    if metric_name == name:
+                        lines.append(
+                            "{}{} {}".format(name, self._format_labels(labels), value)
+                        )
+            else:
+                for (metric_name, labels), histogram in sorted(histograms.items()):
+                    if metric_name == name:
+                        lines.extend(self._render_histogram(name, labels, histogram))
+
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusClientMetrics(BaseMetrics):
+    """
+    Stores metrics by `prometheus_client` to its default registry, so they are
+    exported with other metrics of the application. Metrics of all processes
+    are rendered when multiprocess mode of `prometheus_client` is set up
+    (`PROMETHEUS_MULTIPROC_DIR`).
+    """
+
+    def __init__(self):
+        if prometheus_client is None:
+            raise ImproperlyConfigured(
+                _("PrometheusClientMetrics requires prometheus_client.")
+            )
+
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_metric(self, name, labels):
+        # Metrics are created on the first use, when their labels are known.
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric_type, description = METRICS[name]
+                    if metric_type == COUNTER:
+                        metric = prometheus_client.Counter(
+                            name, description, sorted(labels)
+                        )
+                    else:
+                        metric = prometheus_client.Histogram(
+                            name, description, sorted(labels), buckets=METRICS_BUCKETS
+                        )
+                    self._metrics[name] = metric
+
+        return metric.labels(**labels)
+
+    def increment(self, name, labels, value=1):
+        self._get_metric(name, labels).inc(value)
+
+    def observe(self, name, labels, value):
+        self._get_metric(name, labels).observe(value)
+
+    def render(self):
+        registry = prometheus_client.REGISTRY
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+
+        return prometheus_client.generate_latest(registry).decode("utf-8")
+
+
+def _measure(function, duration_name, errors_name, get_labels):
+    # Returns `function` observing its duration and counting its errors,
+    # `get_labels` gets arguments of the call. Nothing is measured when
+    # metrics are disabled.
+    if not ENABLE_METRICS:
+        return function
+
+    if asyncio.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            labels = get_labels(*args)
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            except Exception:
+                get_metrics().increment(errors_name, labels)
+                raise
+            finally:
+                get_metrics().observe(
+                    duration_name, labels, time.perf_counter() - start
+                )
+
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        labels = get_labels(*args)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except Exception:
+            get_metrics().increment(errors_name, labels)
+            raise
+        finally:
+            get_metrics().observe(duration_name, labels, time.perf_counter() - start)
+
+    return wrapper
+
+
+def get_metrics():
+    """Returns backend of metrics given by `METRICS_BACKEND`."""
+    global _metrics
+
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = get_page_lock_class(METRICS_BACKEND)()
+
+    return _metrics
+
+
+def measure_handler_function(function):
+    """Decorator of handler functions measured by `function` label."""
+    labels = {"function": function.__name__}
+
+    return _measure(function, HANDLER_DURATION, HANDLER_ERRORS, lambda *args: labels)
+
+
+def measure_operation(function):
+    """
+    Decorator of storage operations of models (below `classmethod`) measured
+    by `model` and `operation` labels.
+    """
+    return _measure(
+        function,
+        OPERATION_DURATION,
+        OPERATION_ERRORS,
+        lambda cls, *args: {"model": cls.__name__, "operation": function.__name__},
+    )
+
+
+def record_acquire_result(model_class, result):
+    """Counts result of `acquire` (`LOCK_DENIED` is contention)."""
+    if ENABLE_METRICS:
+        get_metrics().increment(
+            ACQUIRE_RESULTS, {"model": model_class.__name__, "result": result}
+        )
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+def deactivate_duplicate_page_locks(apps, schema_editor):
+    # Keep only the latest active lock of every page.
+    DatabasePageLockModel = apps.get_model("admin_page_lock", "DatabasePageLockModel")
+    page_locks = DatabasePageLockModel.objects.filter(active=True)
+    page_locks.filter(url_parameters__isnull=True).update(url_parameters="")
+
+    pages = set()
+    duplicates = []
+    for pk, url, url_parameters in page_locks.order_by("-locked_at").values_list(
+        "pk", "url", "url_parameters"
+    ):
+        if (url, url_parameters) in pages:
+            duplicates.append(pk)
+        pages.add((url, url_parameters))
+
+    for i in range(0, len(duplicates), 500):
+        page_locks.filter(pk__in=duplicates[i : i + 500]).update(active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_page_lock", "0004_databasepagelockmodel_last_checked"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            deactivate_duplicate_page_locks, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="databasepagelockmodel",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(active=True),
+                fields=("url", "url_parameters"),
+                name="unique_active_page_lock",
+            ),
+        ),
+    ]
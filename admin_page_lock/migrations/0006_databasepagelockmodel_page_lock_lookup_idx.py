@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_page_lock", "0005_databasepagelockmodel_unique_active_page_lock"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="databasepagelockmodel",
+            index=models.Index(
+                fields=["url", "active", "locked_out"], name="page_lock_lookup_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+from django.db import migrations, models
+
+
+def archive_inactive_page_locks(apps, schema_editor):
+    # Move history (see `KEEP_DB_LOCKS`) out of the table of current locks.
+    DatabasePageLockModel = apps.get_model("admin_page_lock", "DatabasePageLockModel")
+    DatabasePageLockHistoryModel = apps.get_model(
+        "admin_page_lock", "DatabasePageLockHistoryModel"
+    )
+    page_locks = DatabasePageLockModel.objects.filter(active=False).order_by()
+    fields = [
+        "url",
+        "url_parameters",
+        "user_reference",
+        "locked_at",
+        "locked_out",
+        "tab_counter",
+        "last_checked",
+    ]
+
+    while True:
+        page_locks_batch = list(page_locks[:500])
+        if not page_locks_batch:
+            break
+
+        DatabasePageLockHistoryModel.objects.bulk_create(
+            [
+                DatabasePageLockHistoryModel(
+                    archived_at=i.last_checked, **{j: getattr(i, j) for j in fields}
+                )
+                for i in page_locks_batch
+            ]
+        )
+        DatabasePageLockModel.objects.filter(
+            pk__in=[i.pk for i in page_locks_batch]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_page_lock", "0006_databasepagelockmodel_page_lock_lookup_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatabasePageLockHistoryModel",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.URLField()),
+                (
+                    "url_parameters",
+                    models.CharField(blank=True, max_length=1024, null=True),
+                ),
+                (
+                    "user_reference",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ("locked_at", models.DateTimeField()),
+                ("locked_out", models.DateTimeField()),
+                ("tab_counter", models.PositiveSmallIntegerField(default=0)),
+                ("last_checked", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "verbose_name": "Page Lock History",
+                "verbose_name_plural": "Page Lock History",
+                "ordering": ("archived_at",),
+            },
+        ),
+        migrations.RunPython(archive_inactive_page_locks, migrations.RunPython.noop),
+    ]
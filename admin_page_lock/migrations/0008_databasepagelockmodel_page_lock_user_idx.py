@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_page_lock", "0007_databasepagelockhistorymodel"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="databasepagelockmodel",
+            index=models.Index(
+                fields=["user_reference", "active"], name="page_lock_user_idx"
+            ),
+        ),
+    ]
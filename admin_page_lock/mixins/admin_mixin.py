@@ -1,15 +1,49 @@
 from __future__ import unicode_literals
 
 from django import forms
+from django.contrib.admin.utils import quote
 from django.http import HttpResponseRedirect
+from django.urls import reverse
+from django.utils.translation import ugettext_lazy as _
 
 from admin_page_lock.mixins.base_mixin import BaseLockingMixin
-from admin_page_lock.settings import DISABLE
+from admin_page_lock.settings import DISABLE, HANDLER_FUNCTION_GET_PAGES_INFO
+from admin_page_lock.utils import get_page_lock_handler
+
+
+class PageLockChangeListMixin(object):
+    """Adds lock data to objects of the page of `ChangeList`."""
+
+    def get_results(self, req):
+        super(PageLockChangeListMixin, self).get_results(req)
+        self.model_admin._add_page_lock_data(req, self.result_list)
 
 
 class PageLockAdminMixin(BaseLockingMixin):
+    # Show column with lock status of change page of every listed object.
+    show_page_lock_status = False
+
+    def _add_page_lock_data(self, req, objs):
+        # Adds lock data of change pages of `objs` by one storage lookup.
+        opts = self.model._meta
+        urls = [
+            reverse(
+                "admin:{}_{}_change".format(opts.app_label, opts.model_name),
+                args=(quote(obj.pk),),
+                current_app=self.admin_site.name,
+            )
+            for obj in objs
+        ]
+
+        lock_handler = get_page_lock_handler(req)
+        handler_function = getattr(lock_handler, HANDLER_FUNCTION_GET_PAGES_INFO)
+        pages = handler_function(req, urls=urls)["pages"]
+
+        for obj, url in zip(objs, urls):
+            obj.page_lock_data = pages[url]
+
     def change_view(self, req, object_id, form_url="", extra_context=None):
-        if not DISABLE and self.lock_change_view:
+        if self.lock_change_view and not self._is_disabled(req):
             result = self._open_page_connection_data(req)
             extra_context = {} if extra_context is None else extra_context
             extra_context.update(self._add_extra_content(req, result))
@@ -25,7 +59,7 @@ class PageLockAdminMixin(BaseLockingMixin):
         return response
 
     def changelist_view(self, req, extra_context=None):
-        if not DISABLE and self.lock_changelist_view:
+        if self.lock_changelist_view and not self._is_disabled(req):
             result = self._open_page_connection_data(req)
             extra_context = {} if extra_context is None else extra_context
             extra_context.update(self._add_extra_content(req, result))
@@ -47,6 +81,18 @@ class PageLockAdminMixin(BaseLockingMixin):
 
         return None
 
+    def get_changelist(self, req, **kwargs):
+        changelist_class = super(PageLockAdminMixin, self).get_changelist(req, **kwargs)
+
+        if not DISABLE and self.show_page_lock_status:
+            changelist_class = type(
+                str("PageLock{}".format(changelist_class.__name__)),
+                (PageLockChangeListMixin, changelist_class),
+                {},
+            )
+
+        return changelist_class
+
     def get_form(self, req, obj=None, **kwargs):
         form = super(PageLockAdminMixin, self).get_form(req, obj, **kwargs)
 
@@ -60,6 +106,14 @@ class PageLockAdminMixin(BaseLockingMixin):
 
         return form
 
+    def get_list_display(self, req):
+        list_display = super(PageLockAdminMixin, self).get_list_display(req)
+
+        if not DISABLE and self.show_page_lock_status:
+            list_display = tuple(list_display) + ("page_lock_status",)
+
+        return list_display
+
     def get_prepopulated_fields(self, req, obj=None):
         # It is not possible to pre-populate fields with readonly fields.
         if self._is_locked(req):
@@ -94,6 +148,15 @@ class PageLockAdminMixin(BaseLockingMixin):
 
         return False
 
+    def page_lock_status(self, obj):
+        data = getattr(obj, "page_lock_data", None)
+        if data is None or not data["is_locked"]:
+            return ""
+
+        return _('Locked by "{}"').format(data["locked_by"])
+
+    page_lock_status.short_description = _("Page lock")
+
     @property
     def media(self):
         media = super(PageLockAdminMixin, self).media + forms.Media(
@@ -6,13 +6,13 @@ from django.contrib import messages
 from django.utils.translation import ugettext_lazy as _
 
 from admin_page_lock.settings import (
-    API_INTERVAL,
     CAN_OPEN_MORE_TABS,
+    DISABLE,
     HANDLER_FUNCTION_CLOSE_PAGE_CONNECTION,
     HANDLER_FUNCTION_GET_PAGE_INFO,
     HANDLER_FUNCTION_OPEN_PAGE_CONNECTION,
 )
-from admin_page_lock.utils import get_page_lock_classes
+from admin_page_lock.utils import get_page_lock_handler
 
 
 class BaseLockingMixin(object):
@@ -21,9 +21,10 @@ class BaseLockingMixin(object):
 
     def _add_extra_content(self, req, data):
         # Adding extra content.
+        policy = get_page_lock_handler(req).page_settings.policy
         extra_context = {
             "page_lock_template_data": json.dumps(data),
-            "page_lock_api_interval": int(API_INTERVAL),  # must be integer
+            "page_lock_api_interval": int(policy.api_interval),  # must be integer
         }
 
         if (
@@ -49,9 +50,8 @@ class BaseLockingMixin(object):
         # settings.
         meta_name = "{}_data".format(handler_function_name)
         if meta_name not in req.META:
-            # Get and initialize handler.
-            handler_class, model_class = get_page_lock_classes()
-            lock_handler = handler_class(req, model_class)
+            # Get handler of current request.
+            lock_handler = get_page_lock_handler(req)
 
             # Get and run handler function to get response data.
             handler_function = getattr(lock_handler, handler_function_name)
@@ -63,10 +63,18 @@ class BaseLockingMixin(object):
     def _get_page_info_data(cls, req):
         return cls._get_api_data(req, HANDLER_FUNCTION_GET_PAGE_INFO)
 
+    @classmethod
+    def _is_disabled(cls, req):
+        # Locking can be disabled for all pages or by policy of current page.
+        return DISABLE or get_page_lock_handler(req).page_settings.policy.disable
+
     @classmethod
     def _is_locked(cls, req):
         # Returns `True` if the current page is not locked by same user
         # otherwise returns `False`.
+        if cls._is_disabled(req):
+            return False
+
         result = cls._get_page_info_data(req)
         if (
             result["is_locked"]
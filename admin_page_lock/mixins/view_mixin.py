@@ -1,7 +1,6 @@
 from __future__ import unicode_literals
 
 from admin_page_lock.mixins.base_mixin import BaseLockingMixin
-from admin_page_lock.settings import DISABLE
 
 
 class PageLockViewMixin(BaseLockingMixin):
@@ -12,7 +11,7 @@ class PageLockViewMixin(BaseLockingMixin):
     def get_context_data(self, **kwargs):
         context = super(PageLockViewMixin, self).get_context_data(**kwargs)
 
-        if not DISABLE:
+        if not self._is_disabled(self.req):
             result = self._open_page_connection_data(self.req)
             context.update(self._add_extra_content(self.req, result))
 
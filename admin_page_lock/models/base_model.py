@@ -1,11 +1,36 @@
 from __future__ import unicode_literals
 
 import json
+import os
+import threading
+import time
 
 from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
-from admin_page_lock.settings import MESSAGES, URL_IGNORE_PARAMETERS
+from admin_page_lock.cache import DataCache
+from admin_page_lock.events import local_broker
+from admin_page_lock.hooks import PHASE_EXPIRY_CHECK, trace_phase
+from admin_page_lock.page_settings import PageSettings
+from admin_page_lock.settings import (
+    DATA_CACHE_SIZE,
+    DATA_CACHE_TIMEOUT,
+    ENABLE_EVENTS,
+    EVENT_ACQUIRED,
+    EVENT_EXPIRED,
+    EVENT_RELEASED,
+    LOCK_ACQUIRED,
+    LOCK_DENIED,
+    LOCK_REACQUIRED,
+    REAP_ON_REQUEST,
+    URL_IGNORE_PARAMETERS,
+)
+
+try:
+    from asgiref.sync import sync_to_async
+except ImportError:  # Django < 3.0
+    sync_to_async = None
 
 try:
     from urllib.parse import parse_qsl, urlparse, urlsplit
@@ -14,26 +39,83 @@ except ImportError:
 
 
 class BasePageLockModel(object):
+    # Class of settings passed to all functions of the model.
+    page_settings_class = PageSettings
+
+    # Whether events and invalidations published by the model reach all
+    # processes of the site (broker of current process reaches only it).
+    notifies_all_processes = False
+
+    # Process-local caches of lock data of models, see `get_cached_data`.
+    _data_caches = {}
+    _data_caches_lock = threading.Lock()
+
+    @classmethod
+    async def _apublish_invalidation(cls, cache_key):
+        # Async variant of `_publish_invalidation`.
+        await cls._call_sync(cls._publish_invalidation, cache_key)
+
+    @classmethod
+    async def _call_sync(cls, function, *args, **kwargs):
+        # Runs synchronous model function in thread, see async functions.
+        if sync_to_async is None:
+            raise ImproperlyConfigured(_("Async API requires Django 3.0 or newer."))
+
+        return await sync_to_async(function)(*args, **kwargs)
+
+    @classmethod
+    def _get_cache_key(cls, page_settings):
+        return "{}{}".format(page_settings.page_url, page_settings.page_url_parameters)
+
+    @classmethod
+    def _get_data(cls, page_settings, cached=False):
+        if cached:
+            return cls.get_cached_data(page_settings)
+
+        return cls.get_data(page_settings)
+
+    @classmethod
+    def _get_cache_generation(cls):
+        # Returns generation of cache before data are read from storage, see
+        # `_set_cached_data`.
+        cache = cls._get_data_cache()
+
+        return cache.generation if cache is not None else None
+
+    @classmethod
+    def _get_data_cache(cls):
+        # Returns cache of current process or `None` when it is disabled.
+        # Models whose invalidations don't reach other processes never cache,
+        # other processes would keep changed data.
+        if not DATA_CACHE_SIZE or not cls.notifies_all_processes:
+            return None
+
+        pid = os.getpid()
+        pid_cache = cls._data_caches.get(cls)
+        if pid_cache is None or pid_cache[0] != pid:
+            with cls._data_caches_lock:
+                pid_cache = cls._data_caches.get(cls)
+                if pid_cache is None or pid_cache[0] != pid:
+                    pid_cache = (pid, DataCache(DATA_CACHE_SIZE, DATA_CACHE_TIMEOUT))
+                    cls._data_caches[cls] = pid_cache
+                    cls._subscribe_invalidations(pid_cache[1])
+
+        return pid_cache[1]
+
+    @classmethod
+    def _get_events_channel(cls, page_settings):
+        # Returns name of channel of lock events of the page.
+        return "{}:{}{}".format(
+            cls.__name__, page_settings.page_url, page_settings.page_url_parameters
+        )
+
     @classmethod
-    def _get_page_full_url(cls, req):
+    def _get_page_full_url(cls, req, post_data=None):
         """Return full page URL."""
-        #
-        # We need to peek into the request's POST data.
-        # As this is not considered a good practice, please read the following
-        # documentation articles to understand the implications:
-        #
-        # https://docs.djangoproject.com/en/2.0/topics/http/middleware/#process-view  # noqa: E501
-        # https://docs.djangoproject.com/en/2.0/topics/http/file-uploads/#id1
-        #
-        # We iterate all the POSTed items looking for one containing
-        # a string that identifies our upload. If we find it, we fetch
-        # the QueryDict item and decode the embedded JSON.
-        #
-        lock_url = ""
+        if post_data is None:
+            post_data = cls._get_post_data(req)
 
-        for key in req.POST.keys():
-            if "user_reference" in key:
-                lock_url = json.loads(key)["url"]
+        lock_url = post_data.get("url")
 
         if lock_url:
             # Get `url` from POST data (JavaScript call).
@@ -45,13 +127,27 @@ class BasePageLockModel(object):
         return page_full_url
 
     @classmethod
-    def _get_page_url_parameters(cls, req):
+    def _get_page_full_urls(cls, req):
+        # Returns full URLs of pages posted to batch APIs, see
+        # `_get_page_full_url` for details about POST data.
+        for key in req.POST.keys():
+            if "urls" in key:
+                return json.loads(key)["urls"]
+
+        try:
+            return json.loads(req.body)["urls"]
+        except (KeyError, ValueError):
+            return []
+
+    @classmethod
+    def _get_page_url_parameters(cls, req, page_full_url=None):
         # Returns string containing query parameters of the `url` with `_`
         # instead of `=`.
         if URL_IGNORE_PARAMETERS:
             return ""
 
-        page_full_url = cls._get_page_full_url(req)
+        if page_full_url is None:
+            page_full_url = cls._get_page_full_url(req)
 
         try:
             parse_result = urlparse(page_full_url)
@@ -64,9 +160,10 @@ class BasePageLockModel(object):
         return ""
 
     @classmethod
-    def _get_page_url(cls, req):
+    def _get_page_url(cls, req, page_full_url=None):
         # Returns url without parameters.
-        page_full_url = cls._get_page_full_url(req)
+        if page_full_url is None:
+            page_full_url = cls._get_page_full_url(req)
 
         try:
             parse_result = urlsplit(page_full_url)
@@ -75,6 +172,51 @@ class BasePageLockModel(object):
 
         return parse_result.path
 
+    @classmethod
+    def _get_live_data(cls, page_settings, stale_before=None, cached=False):
+        # Returns data of current page. Lock of user that has not checked
+        # the page since `stale_before` is deactivated first.
+        data = cls._get_data(page_settings, cached)
+
+        # Cached data might be older than the last check of the page.
+        if cached and cls._is_stale(data, stale_before):
+            data = cls.get_data(page_settings)
+
+        with trace_phase(PHASE_EXPIRY_CHECK, model=cls, page_settings=page_settings):
+            if cls._is_stale(data, stale_before):
+                # Lock is ignored and left to `reap`.
+                if not REAP_ON_REQUEST:
+                    return None
+
+                cls.deactivate(page_settings)
+                cls.publish_event(page_settings, EVENT_EXPIRED)
+                data = cls.get_data(page_settings)
+
+        return data
+
+    @classmethod
+    def _get_post_data(cls, req):
+        """Return data posted by JavaScript."""
+        #
+        # We need to peek into the request's POST data.
+        # As this is not considered a good practice, please read the following
+        # documentation articles to understand the implications:
+        #
+        # https://docs.djangoproject.com/en/2.0/topics/http/middleware/#process-view  # noqa: E501
+        # https://docs.djangoproject.com/en/2.0/topics/http/file-uploads/#id1
+        #
+        # We iterate all the POSTed items looking for one containing
+        # a string that identifies our upload. If we find it, we fetch
+        # the QueryDict item and decode the embedded JSON.
+        #
+        post_data = {}
+
+        for key in req.POST.keys():
+            if "user_reference" in key:
+                post_data = json.loads(key)
+
+        return post_data
+
     @classmethod
     def _get_session_key(cls, req):
         if hasattr(req, "session"):
@@ -82,6 +224,13 @@ class BasePageLockModel(object):
 
         return None
 
+    @classmethod
+    def _get_token_seed(cls):
+        # First fencing token of counter of the page (milliseconds since
+        # epoch), so tokens keep increasing when the counter expires as long
+        # as the page is not locked more than once per millisecond.
+        return int(time.time() * 1000)
+
     @classmethod
     def _get_user_reference(cls, req):
         # Get username.
@@ -112,6 +261,147 @@ class BasePageLockModel(object):
 
         return None
 
+    @classmethod
+    def _invalidate_cache_key(cls, cache, cache_key):
+        # See `invalidate_cached_data`.
+        cache.invalidate(cache_key)
+        cls._publish_invalidation(cache_key)
+
+    @classmethod
+    def _is_stale(cls, data, stale_before):
+        # Whether user locking the page has not checked it since `stale_before`.
+        return (
+            data is not None
+            and stale_before is not None
+            and data["last_checked"] <= stale_before
+        )
+
+    @classmethod
+    def _publish_invalidation(cls, cache_key):
+        # Reaches current process only, models with their own messaging
+        # override it and set `notifies_all_processes`.
+        pass
+
+    @classmethod
+    def _set_cached_data(cls, page_settings, data, generation):
+        # Caches `data` read from storage, see `DataCache.set`.
+        cache = cls._get_data_cache()
+        if cache is None:
+            return
+
+        timeout = None
+        if data is not None:
+            timeout = (data["locked_out"] - timezone.now()).total_seconds()
+
+        cache.set(cls._get_cache_key(page_settings), data, generation, timeout)
+
+    @classmethod
+    def _subscribe_invalidations(cls, cache):
+        # Starts receiving keys invalidated by other processes, see
+        # `_publish_invalidation`.
+        pass
+
+    @classmethod
+    def acquire(
+        cls,
+        page_settings,
+        locked_at,
+        locked_out,
+        stale_before=None,
+        can_open_more_tabs=True,
+    ):
+        """
+        Acquires lock of current page for current user and returns tuple
+        `(result, data)` where `result` is one of:
+         + LOCK_ACQUIRED        page was not locked, now it is locked by user;
+         + LOCK_DENIED          page is locked by another user (or by same
+                                user when `can_open_more_tabs` is `False`);
+         + LOCK_REACQUIRED      page was locked by same user, lock is renewed.
+        and `data` is current lock data.
+
+        This implementation is composed from `get_data`, `deactivate` and
+        `set_data` and it is not atomic, models should override it.
+        """
+        data = cls._get_live_data(page_settings, stale_before)
+        user_reference = page_settings.user_reference
+
+        if data is None:
+            tab_counter = 1
+            result = LOCK_ACQUIRED
+        elif data["user_reference"] != user_reference or not can_open_more_tabs:
+            return LOCK_DENIED, data
+        else:
+            tab_counter = data["tab_counter"] + 1
+            result = LOCK_REACQUIRED
+
+            # Deactivate previous data.
+            cls.deactivate(page_settings)
+
+        data = {
+            "locked_at": locked_at,
+            "locked_out": locked_out,
+            "user_reference": user_reference,
+            "tab_counter": tab_counter,
+        }
+        cls.set_data(page_settings, dict(data))
+        data["last_checked"] = locked_at
+
+        if result == LOCK_ACQUIRED:
+            cls.publish_event(page_settings, EVENT_ACQUIRED, user_reference)
+
+        return result, data
+
+    # Async variants of model functions. These implementations run the
+    # synchronous functions in thread, models should override them by
+    # functions using asynchronous client of their storage.
+
+    @classmethod
+    async def aacquire(cls, page_settings, *args, **kwargs):
+        return await cls._call_sync(cls.acquire, page_settings, *args, **kwargs)
+
+    @classmethod
+    async def adeactivate(cls, page_settings):
+        return await cls._call_sync(cls.deactivate, page_settings)
+
+    @classmethod
+    async def aget_data(cls, page_settings):
+        return await cls._call_sync(cls.get_data, page_settings)
+
+    @classmethod
+    async def aget_data_many(cls, pages_settings):
+        return await cls._call_sync(cls.get_data_many, pages_settings)
+
+    @classmethod
+    async def ainvalidate_cached_data(cls, page_settings):
+        cache = cls._get_data_cache()
+        if cache is None:
+            return
+
+        cache_key = cls._get_cache_key(page_settings)
+        cache.invalidate(cache_key)
+        await cls._apublish_invalidation(cache_key)
+
+    @classmethod
+    async def arefresh(cls, page_settings, stale_before=None):
+        return await cls._call_sync(cls.refresh, page_settings, stale_before)
+
+    @classmethod
+    async def arelease(cls, page_settings, token=None):
+        return await cls._call_sync(cls.release, page_settings, token)
+
+    @classmethod
+    async def aset_data(cls, page_settings, data):
+        return await cls._call_sync(cls.set_data, page_settings, data)
+
+    @classmethod
+    async def atouch(cls, page_settings, token, stale_before=None):
+        return await cls._call_sync(cls.touch, page_settings, token, stale_before)
+
+    @classmethod
+    def check_data(cls, page_settings):
+        raise ImproperlyConfigured(_('Function: "check_data" is not implemented'))
+
+    @classmethod
     def deactivate(cls, page_settings):
         raise ImproperlyConfigured(
             _('Function: "close_page_connection" is not implemented')
@@ -122,15 +412,195 @@ class BasePageLockModel(object):
         raise ImproperlyConfigured(_('Function: "_get_data" is not implemented'))
 
     @classmethod
-    def get_page_settings(cls, req):
+    def get_data_many(cls, pages_settings):
+        """
+        Returns list of data of more pages (`None` for page that is not
+        locked) in the order of `pages_settings`.
+        """
+        return [cls.get_data(page_settings) for page_settings in pages_settings]
+
+    @classmethod
+    def get_cached_data(cls, page_settings):
+        """
+        Returns data of the page from process-local cache (enabled by
+        `DATA_CACHE_SIZE`) or from `get_data`. Cached data might be out of
+        date by `DATA_CACHE_TIMEOUT` at most, so they must not be used to
+        change the lock.
+        """
+        cache = cls._get_data_cache()
+        if cache is None:
+            return cls.get_data(page_settings)
+
+        found, data = cache.get(cls._get_cache_key(page_settings))
+        if not found:
+            generation = cls._get_cache_generation()
+            data = cls.get_data(page_settings)
+            cls._set_cached_data(page_settings, data, generation)
+
+        return data
+
+    @classmethod
+    def get_page_settings(cls, req, page_full_url=None):
+        # Settings of page given by `page_full_url` instead of current page.
+        if page_full_url is not None:
+            return cls.page_settings_class(cls, req, page_full_url)
+
+        # Settings of current page are computed only once per request.
+        meta_name = "page_lock_page_settings"
+        if meta_name not in req.META or req.META[meta_name].model_class is not cls:
+            req.META[meta_name] = cls.page_settings_class(cls, req)
+
+        return req.META[meta_name]
+
+    @classmethod
+    def get_pages_settings(cls, req, page_full_urls=None):
+        """
+        Returns dictionary of page settings of `page_full_urls` or of pages
+        posted to batch APIs.
+        """
+        if page_full_urls is None:
+            page_full_urls = cls._get_page_full_urls(req)
+
         return {
-            "messages": {i: str(j) for i, j in MESSAGES.items()},
-            "page_url_parameters": cls._get_page_url_parameters(req),
-            "page_url": cls._get_page_url(req),
-            "req": req,
-            "user_reference": cls._get_user_reference(req),
+            page_full_url: cls.get_page_settings(req, page_full_url)
+            for page_full_url in page_full_urls
         }
 
+    @classmethod
+    def get_user_data(cls, user_reference):
+        """
+        Returns list of data of locks held by user `user_reference`, data
+        contain also `url` and `url_parameters` of the page. This
+        implementation finds no locks, it is meant for models that don't
+        index locks by user.
+        """
+        return []
+
+    @classmethod
+    def invalidate_cached_data(cls, page_settings):
+        """
+        Removes data of the page from cache of all processes. Models call it
+        whenever they change data of the page.
+        """
+        cache = cls._get_data_cache()
+        if cache is None:
+            return
+
+        cls._invalidate_cache_key(cache, cls._get_cache_key(page_settings))
+
+    @classmethod
+    def publish_event(cls, page_settings, event, locked_by=None):
+        """
+        Publishes lock `event` of the page (one of `EVENT_ACQUIRED`,
+        `EVENT_EXPIRED` and `EVENT_RELEASED`) to `subscribe_events`. Events
+        are published only when `ENABLE_EVENTS` is `True`.
+
+        This implementation uses broker of current process, models should
+        override it.
+        """
+        if not ENABLE_EVENTS:
+            return
+
+        local_broker.publish(
+            cls._get_events_channel(page_settings),
+            {"event": event, "locked_by": locked_by},
+        )
+
+    @classmethod
+    def reap(cls, now, stale_before=None, batch_size=1000):
+        """
+        Deactivates locks of all pages expired before `now` or not checked
+        since `stale_before` by batches of `batch_size` locks and returns their
+        number. This implementation does nothing, it is meant for models that
+        don't expire locks by themselves.
+        """
+        return 0
+
+    @classmethod
+    def refresh(cls, page_settings, stale_before=None):
+        """
+        Returns current lock data of the page or `None` if page is not locked.
+        Lock of current user is marked as checked.
+        """
+        data = cls._get_live_data(page_settings, stale_before, cached=True)
+
+        if data is not None and data["user_reference"] == page_settings.user_reference:
+            cls.check_data(page_settings)
+
+        return data
+
+    @classmethod
+    def release(cls, page_settings, token=None):
+        """
+        Releases one tab of the lock held by current user (and given by
+        fencing `token` if any). Returns `True` when user still holds the lock
+        in other tabs, otherwise `False`.
+        """
+        data = cls.get_data(page_settings)
+
+        if (
+            data is None
+            or data["user_reference"] != page_settings.user_reference
+            or (token is not None and data.get("token") != token)
+        ):
+            return False
+
+        # Deactivate previous data.
+        cls.deactivate(page_settings)
+        if data["tab_counter"] <= 1:
+            cls.publish_event(page_settings, EVENT_RELEASED)
+            return False
+
+        cls.set_data(
+            page_settings,
+            {
+                "locked_at": data["locked_at"],
+                "locked_out": data["locked_out"],
+                "user_reference": data["user_reference"],
+                "tab_counter": data["tab_counter"] - 1,
+                "token": data.get("token"),
+            },
+        )
+
+        return True
+
+    @classmethod
+    def release_user_locks(cls, user_reference):
+        """
+        Releases locks of all pages (in all tabs) held by user
+        `user_reference` and returns their number, e.g. when user logs out.
+        This implementation does nothing, see `get_user_data`.
+        """
+        return 0
+
     @classmethod
     def set_data(cls, req, page_settings, data):
         raise ImproperlyConfigured(_('Function: "_set_data" is not implemented'))
+
+    @classmethod
+    def subscribe_events(cls, page_settings):
+        """
+        Returns subscription of lock events of the page. Its `get(timeout)`
+        returns next event (dictionary of `event` and `locked_by`) or `None`
+        when no event comes in `timeout` [s], `close()` ends the subscription.
+        """
+        return local_broker.subscribe(cls._get_events_channel(page_settings))
+
+    @classmethod
+    def touch(cls, page_settings, token, stale_before=None):
+        """
+        Marks the lock given by fencing `token` as checked when current user
+        still holds it (and it is not stale) and returns whether it does.
+        Models should override it by one conditional write.
+        """
+        data = cls.get_data(page_settings)
+        if (
+            data is None
+            or data.get("token") != token
+            or data["user_reference"] != page_settings.user_reference
+            or cls._is_stale(data, stale_before)
+        ):
+            return False
+
+        cls.check_data(page_settings)
+        return True
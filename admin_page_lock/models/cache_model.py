@@ -0,0 +1,392 @@
+from __future__ import unicode_literals
+
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.utils import timezone
+
+from admin_page_lock.metrics import measure_operation
+from admin_page_lock.models.base_model import BasePageLockModel
+from admin_page_lock.page_settings import PageSettings, lazy_setting
+from admin_page_lock.settings import (
+    CACHE_ALIAS,
+    CACHE_PREFIX,
+    EVENT_ACQUIRED,
+    EVENT_EXPIRED,
+    EVENT_RELEASED,
+    LOCK_ACQUIRED,
+    LOCK_DENIED,
+    LOCK_REACQUIRED,
+)
+
+# Number of attempts of `acquire` when the lock changes while it is read.
+ACQUIRE_ATTEMPTS = 3
+
+# Delay of next attempt of `acquire` when expired lock is being removed.
+ACQUIRE_RETRY_DELAY = 0.05  # [s]
+
+# Time of removing expired lock by one process, see `_remove_expired`.
+EXPIRED_GUARD_TIMEOUT = 10  # [s]
+
+
+class CachePageSettings(PageSettings):
+    __slots__ = ("_cache", "_page_reference")
+
+    @lazy_setting
+    def cache(self):
+        return caches[CACHE_ALIAS]
+
+    @lazy_setting
+    def page_reference(self):
+        return self.model_class._get_page_reference(
+            self.page_url, self.page_url_parameters
+        )
+
+
+class CachePageLockModel(BasePageLockModel):
+    """
+    Stores locks in cache `CACHE_ALIAS` of Django cache framework (e.g.
+    memcached), so no other storage is needed.
+
+    Lock of the page is owned by user of key `<page reference>`, it is
+    created only by atomic `add` and contains fencing token of the lock given
+    by atomic `incr` of counter `<page reference>:token`. Other values are
+    stored in keys `<page reference>:<token>:<name>`:
+      + lease        `locked_at` and `locked_out` renewed by the same user
+      + tabs         number of tabs changed by atomic `incr` and `decr`
+      + checked      time of the last check of the page
+    so writes of old lock never change the current one. Values are written
+    before the lock is created or renewed, so the lock never lives without
+    its lease.
+
+    Leases are renewed by `touch` of the cache, which Django 2.1 added.
+    """
+
+    page_settings_class = CachePageSettings
+
+    @classmethod
+    def _add_lock(cls, page_settings, locked_at, locked_out, timeout):
+        # Returns data of new lock of current user or `None` when the page is
+        # locked already. Values of the lock are written before the lock.
+        cache = page_settings.cache
+        record = {
+            "token": cls._get_next_token(page_settings, timeout),
+            "user_reference": page_settings.user_reference,
+            "locked_at": locked_at,
+            "locked_out": locked_out,
+        }
+        value_keys = cls._get_value_keys(page_settings, record["token"])
+        values = dict(zip(value_keys, ((locked_at, locked_out), 1, locked_at)))
+        cache.set_many(values, timeout)
+        if not cache.add(page_settings.page_reference, record, timeout):
+            cache.delete_many(value_keys)
+            return None
+
+        return cls._get_lock_data(record, values, value_keys)
+
+    @classmethod
+    def _delete_lock(cls, page_settings, record):
+        page_settings.cache.delete_many(
+            [page_settings.page_reference]
+            + cls._get_value_keys(page_settings, record["token"])
+        )
+
+    @classmethod
+    def _get_lock_data(cls, record, values, value_keys):
+        # Returns data of the lock of `record` and its `values`.
+        lease_key, tabs_key, checked_key = value_keys
+        locked_at, locked_out = values.get(
+            lease_key, (record["locked_at"], record["locked_out"])
+        )
+
+        return {
+            "locked_at": locked_at,
+            "locked_out": locked_out,
+            "user_reference": record["user_reference"],
+            "tab_counter": values.get(tabs_key, 1),
+            "last_checked": values.get(checked_key, locked_at),
+            "token": record["token"],
+        }
+
+    @classmethod
+    def _get_next_token(cls, page_settings, timeout):
+        # Counter is created when it is used for the first time or when it
+        # has expired, see `_get_token_seed`.
+        cache = page_settings.cache
+        token_key = "{}:token".format(page_settings.page_reference)
+        try:
+            return cache.incr(token_key)
+        except ValueError:
+            cache.add(token_key, cls._get_token_seed(), timeout)
+            return cache.incr(token_key)
+
+    @classmethod
+    def _get_page_reference(cls, page_url, page_parameters):
+        # Keys of memcached are limited to 250 characters.
+        page_hash = hashlib.sha1(
+            "{}{}".format(page_url, page_parameters).encode("utf-8")
+        ).hexdigest()
+
+        return "{}:{}".format(CACHE_PREFIX, page_hash)
+
+    @classmethod
+    def _get_record(cls, page_settings):
+        # Returns tuple `(record, data)` of the lock or `(None, None)`.
+        record = page_settings.cache.get(page_settings.page_reference)
+        if record is None:
+            return None, None
+
+        value_keys = cls._get_value_keys(page_settings, record["token"])
+        values = page_settings.cache.get_many(value_keys)
+
+        return record, cls._get_lock_data(record, values, value_keys)
+
+    @classmethod
+    def _get_timeout(cls, locked_at, locked_out):
+        return max(int((locked_out - locked_at).total_seconds()), 1)
+
+    @classmethod
+    def _get_value_keys(cls, page_settings, token):
+        # Keys of lease, tabs and checked, see `CachePageLockModel`.
+        return [
+            "{}:{}:{}".format(page_settings.page_reference, token, name)
+            for name in ("lease", "tabs", "checked")
+        ]
+
+    @classmethod
+    def _is_expired(cls, data, now, stale_before):
+        return data["locked_out"] <= now or cls._is_stale(data, stale_before)
+
+    @classmethod
+    def _remove_expired(cls, page_settings, record):
+        # Returns whether expired lock was removed. Only one process removes
+        # the lock, others would remove the lock acquired after it.
+        guard_key = "{}:{}:expired".format(
+            page_settings.page_reference, record["token"]
+        )
+        if not page_settings.cache.add(guard_key, 1, EXPIRED_GUARD_TIMEOUT):
+            return False
+
+        cls._delete_lock(page_settings, record)
+        cls.invalidate_cached_data(page_settings)
+        cls.publish_event(page_settings, EVENT_EXPIRED)
+
+        return True
+
+    @classmethod
+    @measure_operation
+    def acquire(
+        cls,
+        page_settings,
+        locked_at,
+        locked_out,
+        stale_before=None,
+        can_open_more_tabs=True,
+    ):
+        # Concurrent users are serialized by `add` of the lock.
+        cache = page_settings.cache
+        user_reference = page_settings.user_reference
+        timeout = cls._get_timeout(locked_at, locked_out)
+
+        for _ in range(ACQUIRE_ATTEMPTS):
+            record, data = cls._get_record(page_settings)
+
+            # 1. Lock is expired or user has lost contact with page.
+            if data is not None and cls._is_expired(data, locked_at, stale_before):
+                if not cls._remove_expired(page_settings, record):
+                    # Another process is removing the lock.
+                    time.sleep(ACQUIRE_RETRY_DELAY)
+                    continue
+                record = data = None
+
+            # 2. Page is not locked and is going to be locked by current user.
+            if record is None:
+                data = cls._add_lock(page_settings, locked_at, locked_out, timeout)
+                if data is None:
+                    # Page was locked meanwhile.
+                    continue
+
+                cls.invalidate_cached_data(page_settings)
+                cls.publish_event(page_settings, EVENT_ACQUIRED, user_reference)
+                return LOCK_ACQUIRED, data
+
+            # 3. Page is locked by another user or user can't open multiple tabs.
+            if data["user_reference"] != user_reference or not can_open_more_tabs:
+                return LOCK_DENIED, data
+
+            # 4. Page is locked by same user, the lease is renewed.
+            lease_key, tabs_key, checked_key = cls._get_value_keys(
+                page_settings, record["token"]
+            )
+            cache.set_many(
+                {lease_key: (locked_at, locked_out), checked_key: locked_at}, timeout
+            )
+            cache.add(tabs_key, data["tab_counter"], timeout)
+            tab_counter = cache.incr(tabs_key)
+            cache.touch(tabs_key, timeout)
+            cache.touch(page_settings.page_reference, timeout)
+            cls.invalidate_cached_data(page_settings)
+
+            data.update(
+                locked_at=locked_at,
+                locked_out=locked_out,
+                tab_counter=tab_counter,
+                last_checked=locked_at,
+            )
+            return LOCK_REACQUIRED, data
+
+        # Lock has changed in every attempt or it is still being removed (e.g.
+        # by a crashed process), it denies the page even if it is expired.
+        while True:
+            record, data = cls._get_record(page_settings)
+            if record is not None:
+                return LOCK_DENIED, data
+
+            data = cls._add_lock(page_settings, locked_at, locked_out, timeout)
+            if data is not None:
+                cls.invalidate_cached_data(page_settings)
+                cls.publish_event(page_settings, EVENT_ACQUIRED, user_reference)
+                return LOCK_ACQUIRED, data
+
+    @classmethod
+    @measure_operation
+    def check_data(cls, page_settings):
+        """Update last_checked for consistency."""
+        record, data = cls._get_record(page_settings)
+        if record is None:
+            return
+
+        now = timezone.now()
+        if data["locked_out"] > now:
+            _, _, checked_key = cls._get_value_keys(page_settings, record["token"])
+            page_settings.cache.set(
+                checked_key, now, cls._get_timeout(now, data["locked_out"])
+            )
+
+    @classmethod
+    @measure_operation
+    def deactivate(cls, page_settings):
+        record = page_settings.cache.get(page_settings.page_reference)
+        if record is not None:
+            cls._delete_lock(page_settings, record)
+
+        cls.invalidate_cached_data(page_settings)
+
+    @classmethod
+    @measure_operation
+    def get_data(cls, page_settings):
+        _, data = cls._get_record(page_settings)
+
+        # Filter out data with `locked_out` older then now.
+        if data is None or data["locked_out"] <= timezone.now():
+            return None
+
+        return data
+
+    @classmethod
+    @measure_operation
+    def get_data_many(cls, pages_settings):
+        # Get data of all pages by two `get_many`.
+        if not pages_settings:
+            return []
+
+        cache = pages_settings[0].cache
+        records = cache.get_many([i.page_reference for i in pages_settings])
+
+        pages_value_keys = [
+            (
+                cls._get_value_keys(i, records[i.page_reference]["token"])
+                if i.page_reference in records
+                else []
+            )
+            for i in pages_settings
+        ]
+        values = cache.get_many([j for i in pages_value_keys for j in i])
+
+        now = timezone.now()
+        pages_data = []
+        for page_settings, value_keys in zip(pages_settings, pages_value_keys):
+            data = None
+            if value_keys:
+                data = cls._get_lock_data(
+                    records[page_settings.page_reference], values, value_keys
+                )
+                if data["locked_out"] <= now:
+                    data = None
+            pages_data.append(data)
+
+        return pages_data
+
+    @classmethod
+    @measure_operation
+    def release(cls, page_settings, token=None):
+        record, data = cls._get_record(page_settings)
+        if (
+            record is None
+            or data["user_reference"] != page_settings.user_reference
+            or (token is not None and record["token"] != token)
+        ):
+            return False
+
+        # User still holds the lock in other tabs.
+        _, tabs_key, _ = cls._get_value_keys(page_settings, record["token"])
+        page_settings.cache.add(
+            tabs_key,
+            data["tab_counter"],
+            cls._get_timeout(timezone.now(), data["locked_out"]),
+        )
+        if page_settings.cache.decr(tabs_key) > 0:
+            cls.invalidate_cached_data(page_settings)
+            return True
+
+        cls._delete_lock(page_settings, record)
+        cls.invalidate_cached_data(page_settings)
+        cls.publish_event(page_settings, EVENT_RELEASED)
+
+        return False
+
+    @classmethod
+    @measure_operation
+    def set_data(cls, page_settings, data):
+        cls.deactivate(page_settings)
+
+        timeout = page_settings.policy.timeout  # This deactives old records.
+        record = {
+            "token": cls._get_next_token(page_settings, timeout),
+            "user_reference": data["user_reference"],
+            "locked_at": data["locked_at"],
+            "locked_out": data["locked_out"],
+        }
+        _, tabs_key, _ = cls._get_value_keys(page_settings, record["token"])
+        page_settings.cache.set_many(
+            {
+                page_settings.page_reference: record,
+                tabs_key: data.get("tab_counter", 1),
+            },
+            timeout,
+        )
+
+        cls.invalidate_cached_data(page_settings)
+
+    @classmethod
+    @measure_operation
+    def touch(cls, page_settings, token, stale_before=None):
+        # Cache has no conditional write, but values of the lock are stored
+        # under its token, so lock replaced meanwhile is never changed.
+        record, data = cls._get_record(page_settings)
+        now = timezone.now()
+        if (
+            record is None
+            or record["token"] != token
+            or data["user_reference"] != page_settings.user_reference
+            or cls._is_expired(data, now, stale_before)
+        ):
+            return False
+
+        _, _, checked_key = cls._get_value_keys(page_settings, token)
+        page_settings.cache.set(
+            checked_key, now, cls._get_timeout(now, data["locked_out"])
+        )
+
+        return True
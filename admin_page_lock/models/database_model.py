@@ -1,10 +1,66 @@
 from __future__ import unicode_literals
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
+from admin_page_lock.metrics import measure_operation
 from admin_page_lock.models.base_model import BasePageLockModel
-from admin_page_lock.settings import KEEP_DB_LOCKS, URL_IGNORE_PARAMETERS
+from admin_page_lock.settings import (
+    EVENT_ACQUIRED,
+    EVENT_EXPIRED,
+    EVENT_RELEASED,
+    KEEP_DB_LOCKS,
+    LOCK_ACQUIRED,
+    LOCK_DENIED,
+    LOCK_REACQUIRED,
+    URL_IGNORE_PARAMETERS,
+)
+
+# Number of attempts of `acquire` when the lock disappears before it is read.
+ACQUIRE_ATTEMPTS = 3
+
+
+class DatabasePageLockHistoryModel(models.Model):
+    """
+    Archive of deactivated locks of `DatabasePageLockModel` kept when
+    `KEEP_DB_LOCKS` is `True` (see `prune_page_lock_history`).
+
+    Parameters:
+      + archived_at  time when lock was deactivated
+      + other        same as `DatabasePageLockModel`
+    """
+
+    url = models.URLField()
+    url_parameters = models.CharField(max_length=1024, null=True, blank=True)
+    user_reference = models.CharField(max_length=255, null=True, blank=True)
+    locked_at = models.DateTimeField()
+    locked_out = models.DateTimeField()
+    tab_counter = models.PositiveSmallIntegerField(default=0)
+    last_checked = models.DateTimeField()
+    archived_at = models.DateTimeField(db_index=True)
+
+    def __unicode__(self):
+        return "{}".format(self.pk)
+
+    @classmethod
+    def prune(cls, archived_before, batch_size=1000):
+        """Deletes locks archived before `archived_before` by batches."""
+        page_locks = cls.objects.filter(archived_at__lt=archived_before).order_by()
+
+        count = 0
+        while True:
+            pks = list(page_locks.values_list("pk", flat=True)[:batch_size])
+            if pks:
+                count += cls.objects.filter(pk__in=pks).delete()[0]
+            if len(pks) < batch_size:
+                return count
+
+    class Meta:
+        ordering = ("archived_at",)
+        app_label = "admin_page_lock"
+        verbose_name = "Page Lock History"
+        verbose_name_plural = "Page Lock History"
 
 
 class DatabasePageLockModel(BasePageLockModel, models.Model):
@@ -17,6 +73,8 @@ class DatabasePageLockModel(BasePageLockModel, models.Model):
       + locked_by    user_reference of user that locked page
       + parameters   url parameters in JSON
       + url          url of locked page
+
+    Primary key is fencing token of the lock, it increases with every new lock.
     """
 
     url = models.URLField()
@@ -32,27 +90,171 @@ class DatabasePageLockModel(BasePageLockModel, models.Model):
     def __unicode__(self):
         return "{}".format(self.pk)
 
+    @classmethod
+    def _create_page_lock(cls, page_settings, data):
+        # Returns new lock or `None` when the page is locked already (only one
+        # active lock of the page is allowed by `unique_active_page_lock`).
+        try:
+            with transaction.atomic():
+                return cls.objects.create(
+                    url=page_settings.page_url,
+                    url_parameters=page_settings.page_url_parameters,
+                    **data
+                )
+        except IntegrityError:
+            return None
+
+    @classmethod
+    def _archive_page_locks(cls, page_locks):
+        # Moves locks to `DatabasePageLockHistoryModel`, so the table holds
+        # only current locks. Rows are locked, so concurrent deactivation
+        # doesn't archive them twice.
+        fields = [
+            "pk",
+            "url",
+            "url_parameters",
+            "user_reference",
+            "locked_at",
+            "locked_out",
+            "tab_counter",
+            "last_checked",
+        ]
+        with transaction.atomic():
+            rows = list(page_locks.select_for_update().order_by().values(*fields))
+            if not rows:
+                return 0
+
+            archived_at = timezone.now()
+            DatabasePageLockHistoryModel.objects.bulk_create(
+                [
+                    DatabasePageLockHistoryModel(
+                        archived_at=archived_at, **{i: row[i] for i in fields[1:]}
+                    )
+                    for row in rows
+                ]
+            )
+
+            return cls.objects.filter(pk__in=[i["pk"] for i in rows]).delete()[0]
+
+    @classmethod
+    def _deactivate_page_locks(cls, page_locks):
+        # Returns number of deactivated locks.
+        if KEEP_DB_LOCKS:
+            return cls._archive_page_locks(page_locks)
+
+        return page_locks.delete()[0]
+
+    @classmethod
+    def _get_page_key(cls, url, url_parameters):
+        # Returns key identifying the page in `get_data_many`.
+        if URL_IGNORE_PARAMETERS:
+            return url, ""
+
+        return url, url_parameters or ""
+
+    @classmethod
+    def _get_page_lock_data(cls, page_lock):
+        return {
+            "locked_at": page_lock.locked_at,
+            "locked_out": page_lock.locked_out,
+            "user_reference": page_lock.user_reference,
+            "tab_counter": page_lock.tab_counter,
+            "last_checked": page_lock.last_checked,
+            "token": page_lock.pk,
+        }
+
     @classmethod
     def _get_query_kwargs(cls, page_settings):
         query_kwargs = {
             "active": True,
-            "url": page_settings["page_url"],
+            "url": page_settings.page_url,
         }
         if not URL_IGNORE_PARAMETERS:
-            query_kwargs["url_parameters"] = page_settings["page_url_parameters"]
+            query_kwargs["url_parameters"] = page_settings.page_url_parameters
 
         return query_kwargs
 
     @classmethod
+    def _try_acquire(cls, page_settings, data, stale_before, can_open_more_tabs):
+        # Concurrent users are serialized by the unique constraint, so
+        # the lock is decided and written by a constant number of queries.
+        query_kwargs = cls._get_query_kwargs(page_settings)
+        locked_at = data["locked_at"]
+        user_reference = data["user_reference"]
+
+        with transaction.atomic():
+            # 1. Page is not locked and is going to be locked by current user.
+            page_lock = cls._create_page_lock(page_settings, data)
+            if page_lock is not None:
+                cls.invalidate_cached_data(page_settings)
+                cls.publish_event(page_settings, EVENT_ACQUIRED, user_reference)
+                return LOCK_ACQUIRED, cls._get_page_lock_data(page_lock)
+
+            # 2. Lock is expired or user has lost contact with page.
+            expired = Q(locked_out__lte=locked_at)
+            if stale_before is not None:
+                expired |= Q(last_checked__lte=stale_before)
+
+            if cls._deactivate_page_locks(cls.objects.filter(expired, **query_kwargs)):
+                cls.publish_event(page_settings, EVENT_EXPIRED)
+                page_lock = cls._create_page_lock(page_settings, data)
+                if page_lock is not None:
+                    cls.invalidate_cached_data(page_settings)
+                    cls.publish_event(page_settings, EVENT_ACQUIRED, user_reference)
+                    return LOCK_ACQUIRED, cls._get_page_lock_data(page_lock)
+
+            # 3. Page is locked by same user.
+            if can_open_more_tabs and cls.objects.filter(
+                user_reference=user_reference, **query_kwargs
+            ).update(
+                locked_at=locked_at,
+                locked_out=data["locked_out"],
+                last_checked=locked_at,
+                tab_counter=F("tab_counter") + 1,
+            ):
+                cls.invalidate_cached_data(page_settings)
+                return LOCK_REACQUIRED, cls.get_data(page_settings)
+
+        # 4. Page is locked by another user or user can't open multiple tabs.
+        return LOCK_DENIED, cls.get_data(page_settings)
+
+    @classmethod
+    @measure_operation
+    def acquire(
+        cls,
+        page_settings,
+        locked_at,
+        locked_out,
+        stale_before=None,
+        can_open_more_tabs=True,
+    ):
+        data = {
+            "locked_at": locked_at,
+            "locked_out": locked_out,
+            "user_reference": page_settings.user_reference,
+            "tab_counter": 1,
+        }
+
+        # Lock can be released (or expire) between the failed insert and
+        # reading of the lock, then the page is tried again.
+        for _ in range(ACQUIRE_ATTEMPTS):
+            result, page_data = cls._try_acquire(
+                page_settings, data, stale_before, can_open_more_tabs
+            )
+            if page_data is not None:
+                break
+
+        return result, page_data
+
+    @classmethod
+    @measure_operation
     def deactivate(cls, page_settings):
         query_kwargs = cls._get_query_kwargs(page_settings)
-        page_locks = cls.objects.filter(**query_kwargs)
-        if KEEP_DB_LOCKS:
-            page_locks.update(active=False)
-        else:
-            page_locks.delete()
+        cls._deactivate_page_locks(cls.objects.filter(**query_kwargs))
+        cls.invalidate_cached_data(page_settings)
 
     @classmethod
+    @measure_operation
     def get_data(cls, page_settings):
         query_kwargs = cls._get_query_kwargs(page_settings)
         page_locks = cls.objects.filter(**query_kwargs)
@@ -60,31 +262,155 @@ class DatabasePageLockModel(BasePageLockModel, models.Model):
         # Filter out data with `locked_out` older then now.
         page_locks = page_locks.filter(locked_out__gt=timezone.now())
 
-        # Get the latest instance of `DatabasePageLockModel` and check
-        # its existence.
-        page_lock = page_locks.first()
+        # Get the instance of `DatabasePageLockModel` and check its existence.
+        # Active lock of the page is unique, so it does not need to be ordered.
+        page_lock = next(iter(page_locks.order_by()[:1]), None)
         if page_lock is None or not isinstance(page_lock, cls):
             return None
 
-        return {
-            "locked_at": page_lock.locked_at,
-            "locked_out": page_lock.locked_out,
-            "user_reference": page_lock.user_reference,
-            "tab_counter": page_lock.tab_counter,
-            "last_checked": page_lock.last_checked,
+        return cls._get_page_lock_data(page_lock)
+
+    @classmethod
+    @measure_operation
+    def get_data_many(cls, pages_settings):
+        # Get data of all pages by one query.
+        page_locks = cls.objects.filter(
+            active=True,
+            url__in={i.page_url for i in pages_settings},
+            locked_out__gt=timezone.now(),
+        ).order_by()
+
+        pages_data = {
+            cls._get_page_key(i.url, i.url_parameters): cls._get_page_lock_data(i)
+            for i in page_locks
         }
 
+        return [
+            pages_data.get(cls._get_page_key(i.page_url, i.page_url_parameters))
+            for i in pages_settings
+        ]
+
     @classmethod
+    @measure_operation
     def check_data(cls, page_settings):
         """Update last_checked for consistency."""
         query_kwargs = cls._get_query_kwargs(page_settings)
         page_locks = cls.objects.filter(**query_kwargs)
 
         # Filter out data with `locked_out` older then now.
-        page_locks = page_locks.filter(locked_out__gt=timezone.now())
+        now = timezone.now()
+        page_locks.filter(locked_out__gt=now).update(last_checked=now)
+
+    @classmethod
+    @measure_operation
+    def get_user_data(cls, user_reference):
+        # Locks of the user are found by `page_lock_user_idx`.
+        page_locks = cls.objects.filter(
+            active=True, user_reference=user_reference, locked_out__gt=timezone.now()
+        ).order_by("locked_at")
 
-        if page_locks.exists():
-            page_locks.first().save()
+        return [
+            dict(
+                cls._get_page_lock_data(i),
+                url=i.url,
+                url_parameters=i.url_parameters or "",
+            )
+            for i in page_locks
+        ]
+
+    @classmethod
+    def invalidate_cached_data(cls, page_settings):
+        if cls._get_data_cache() is None:
+            return
+
+        # Data are invalidated only when the change is committed, otherwise
+        # old data could be cached again before the commit.
+        transaction.on_commit(
+            lambda: super(DatabasePageLockModel, cls).invalidate_cached_data(
+                page_settings
+            )
+        )
+
+    @classmethod
+    def publish_event(cls, page_settings, event, locked_by=None):
+        # Subscribers are notified only when the change is committed.
+        transaction.on_commit(
+            lambda: super(DatabasePageLockModel, cls).publish_event(
+                page_settings, event, locked_by
+            )
+        )
+
+    @classmethod
+    @measure_operation
+    def reap(cls, now, stale_before=None, batch_size=1000):
+        # Readers ignore expired (and stale) locks already, so no events are
+        # published and no cached data are invalidated. Every batch is
+        # a separate query, so rows are not locked for long. Inactive locks
+        # (see `save`) are not kept in the table either.
+        expired = Q(locked_out__lte=now) | Q(active=False)
+        if stale_before is not None:
+            expired |= Q(last_checked__lte=stale_before)
+        page_locks = cls.objects.filter(expired).order_by()
+
+        count = 0
+        while True:
+            pks = list(page_locks.values_list("pk", flat=True)[:batch_size])
+            if pks:
+                count += cls._deactivate_page_locks(cls.objects.filter(pk__in=pks))
+            if len(pks) < batch_size:
+                return count
+
+    @classmethod
+    @measure_operation
+    def release(cls, page_settings, token=None):
+        query_kwargs = cls._get_query_kwargs(page_settings)
+        page_locks = cls.objects.filter(
+            locked_out__gt=timezone.now(),
+            user_reference=page_settings.user_reference,
+            **query_kwargs
+        )
+        if token is not None:
+            page_locks = page_locks.filter(pk=token)
+
+        with transaction.atomic():
+            # User still holds the lock in other tabs.
+            if page_locks.filter(tab_counter__gt=1).update(
+                tab_counter=F("tab_counter") - 1
+            ):
+                cls.invalidate_cached_data(page_settings)
+                return True
+
+            if cls._deactivate_page_locks(page_locks):
+                cls.invalidate_cached_data(page_settings)
+                cls.publish_event(page_settings, EVENT_RELEASED)
+
+        return False
+
+    @classmethod
+    @measure_operation
+    def release_user_locks(cls, user_reference):
+        # Rows are locked, so pages of locks released by concurrent calls are
+        # not notified twice.
+        page_locks = cls.objects.filter(active=True, user_reference=user_reference)
+
+        with transaction.atomic():
+            pages = list(
+                page_locks.select_for_update()
+                .order_by()
+                .values_list("url", "url_parameters")
+            )
+            if not pages:
+                return 0
+
+            count = cls._deactivate_page_locks(page_locks)
+            for url, url_parameters in pages:
+                page_settings = cls.page_settings_class.for_page(
+                    cls, url, url_parameters or ""
+                )
+                cls.invalidate_cached_data(page_settings)
+                cls.publish_event(page_settings, EVENT_RELEASED)
+
+        return count
 
     def save(self, *args, **kwargs):
         # Deactive current instance with `locked_out` older then now.
@@ -94,18 +420,55 @@ class DatabasePageLockModel(BasePageLockModel, models.Model):
         super(DatabasePageLockModel, self).save(*args, **kwargs)
 
     @classmethod
+    @measure_operation
     def set_data(cls, page_settings, data):
-        data["url"] = page_settings["page_url"]
-        if not URL_IGNORE_PARAMETERS:
-            data["url_parameters"] = page_settings["page_url_parameters"]
+        data["url"] = page_settings.page_url
+        data["url_parameters"] = page_settings.page_url_parameters
 
         try:
             cls.objects.create(**data)
         except cls.DoesNotExist:
             raise
 
+        cls.invalidate_cached_data(page_settings)
+
+    @classmethod
+    @measure_operation
+    def touch(cls, page_settings, token, stale_before=None):
+        # Ownership is checked and the lock is marked as checked by one query.
+        now = timezone.now()
+        page_locks = cls.objects.filter(
+            pk=token,
+            active=True,
+            user_reference=page_settings.user_reference,
+            locked_out__gt=now,
+        )
+        if stale_before is not None:
+            page_locks = page_locks.filter(last_checked__gt=stale_before)
+
+        return bool(page_locks.update(last_checked=now))
+
     class Meta:
         ordering = ("locked_at",)
         app_label = "admin_page_lock"
         verbose_name = "Page Lock"
         verbose_name_plural = "Page Locks"
+        indexes = [
+            # Lookup of active lock of the page, see `_get_query_kwargs`.
+            models.Index(
+                fields=["url", "active", "locked_out"], name="page_lock_lookup_idx"
+            ),
+            # Locks of the user, see `get_user_data`.
+            models.Index(
+                fields=["user_reference", "active"], name="page_lock_user_idx"
+            ),
+        ]
+        constraints = [
+            # Only one active lock of the page (`url_parameters` are empty
+            # when `URL_IGNORE_PARAMETERS` is `True`).
+            models.UniqueConstraint(
+                fields=["url", "url_parameters"],
+                condition=Q(active=True),
+                name="unique_active_page_lock",
+            ),
+        ]
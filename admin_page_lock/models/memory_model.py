@@ -0,0 +1,343 @@
+from __future__ import unicode_literals
+
+import heapq
+import itertools
+import threading
+import time
+
+from django.utils import timezone
+
+from admin_page_lock.metrics import measure_operation
+from admin_page_lock.models.base_model import BasePageLockModel
+from admin_page_lock.settings import (
+    EVENT_ACQUIRED,
+    EVENT_EXPIRED,
+    EVENT_RELEASED,
+    LOCK_ACQUIRED,
+    LOCK_DENIED,
+    LOCK_REACQUIRED,
+)
+
+
+class MemoryLockRecord(object):
+    """Lock of one page stored by `MemoryPageLockModel`."""
+
+    __slots__ = (
+        "user_reference",
+        "locked_at",
+        "locked_out",
+        "last_checked",
+        "tab_counter",
+        "token",
+        "expires_at",
+    )
+
+    def __init__(
+        self, user_reference, locked_at, locked_out, last_checked, tab_counter, token
+    ):
+        self.user_reference = user_reference
+        self.last_checked = last_checked
+        self.tab_counter = tab_counter
+        self.token = token
+        self.renew(locked_at, locked_out)
+
+    def get_data(self):
+        return {
+            "locked_at": self.locked_at,
+            "locked_out": self.locked_out,
+            "user_reference": self.user_reference,
+            "tab_counter": self.tab_counter,
+            "last_checked": self.last_checked,
+            "token": self.token,
+        }
+
+    def renew(self, locked_at, locked_out):
+        # Expiry is checked by `time.time()`, it is much cheaper than
+        # `timezone.now()`.
+        self.locked_at = locked_at
+        self.locked_out = locked_out
+        self.expires_at = locked_out.timestamp()
+
+
+class MemoryPageLockModel(BasePageLockModel):
+    """
+    Stores locks in memory of current process, so it is meant only for
+    deployments running one process (and for tests). Locks are expired lazily
+    when they are read, expired locks that are not read anymore are evicted
+    by heap of their `locked_out` (see `_evict_expired`).
+    """
+
+    # Locks live in one process, so its broker reaches all pages.
+    notifies_all_processes = True
+
+    # Locks of pages, see `_get_page_key`.
+    _lock = threading.Lock()
+    _records = {}
+
+    # Heap of `(expires_at, page key)`, renewed lock leaves its old items in
+    # the heap until they are popped or the heap is rebuilt.
+    _expiry_heap = []
+
+    # Fencing tokens of new locks, see `_get_token_seed`.
+    _tokens = itertools.count(BasePageLockModel._get_token_seed())
+
+    @classmethod
+    def _evict_expired(cls, now):
+        # Must be called with `_lock`, `now` is timestamp.
+        while cls._expiry_heap and cls._expiry_heap[0][0] <= now:
+            _, page_key = heapq.heappop(cls._expiry_heap)
+            record = cls._records.get(page_key)
+            if record is not None and record.expires_at <= now:
+                del cls._records[page_key]
+
+    @classmethod
+    def _get_page_key(cls, page_settings):
+        # `page_url_parameters` are empty when `URL_IGNORE_PARAMETERS` is `True`.
+        return page_settings.page_url, page_settings.page_url_parameters
+
+    @classmethod
+    def _get_record(cls, page_key, now):
+        # Returns lock of the page that is not expired at timestamp `now`.
+        # Must be called with `_lock`.
+        record = cls._records.get(page_key)
+        if record is not None and record.expires_at <= now:
+            del cls._records[page_key]
+            return None
+
+        return record
+
+    @classmethod
+    def _push_expiry(cls, page_key, record):
+        # Must be called with `_lock`.
+        heapq.heappush(cls._expiry_heap, (record.expires_at, page_key))
+
+        # Rebuild heap when most of its items belong to renewed locks.
+        if len(cls._expiry_heap) > 2 * len(cls._records) + 64:
+            cls._expiry_heap = [
+                (record.expires_at, page_key)
+                for page_key, record in cls._records.items()
+            ]
+            heapq.heapify(cls._expiry_heap)
+
+    @classmethod
+    def _set_record(cls, page_key, record):
+        # Must be called with `_lock`.
+        cls._records[page_key] = record
+        cls._push_expiry(page_key, record)
+
+    @classmethod
+    @measure_operation
+    def acquire(
+        cls,
+        page_settings,
+        locked_at,
+        locked_out,
+        stale_before=None,
+        can_open_more_tabs=True,
+    ):
+        page_key = cls._get_page_key(page_settings)
+        user_reference = page_settings.user_reference
+        expired = False
+        now = locked_at.timestamp()
+
+        with cls._lock:
+            cls._evict_expired(now)
+            record = cls._get_record(page_key, now)
+
+            # 1. User has lost contact with page.
+            if (
+                record is not None
+                and stale_before is not None
+                and record.last_checked <= stale_before
+            ):
+                del cls._records[page_key]
+                record = None
+                expired = True
+
+            # 2. Page is not locked and is going to be locked by current user.
+            if record is None:
+                record = MemoryLockRecord(
+                    user_reference,
+                    locked_at,
+                    locked_out,
+                    locked_at,
+                    1,
+                    next(cls._tokens),
+                )
+                cls._set_record(page_key, record)
+                result = LOCK_ACQUIRED
+
+            # 3. Page is locked by another user or user can't open multiple tabs.
+            elif record.user_reference != user_reference or not can_open_more_tabs:
+                return LOCK_DENIED, record.get_data()
+
+            # 4. Page is locked by same user.
+            else:
+                record.renew(locked_at, locked_out)
+                record.last_checked = locked_at
+                record.tab_counter += 1
+                cls._push_expiry(page_key, record)
+                result = LOCK_REACQUIRED
+
+            data = record.get_data()
+
+        cls.invalidate_cached_data(page_settings)
+        if expired:
+            cls.publish_event(page_settings, EVENT_EXPIRED)
+        if result == LOCK_ACQUIRED:
+            cls.publish_event(page_settings, EVENT_ACQUIRED, user_reference)
+
+        return result, data
+
+    @classmethod
+    @measure_operation
+    def check_data(cls, page_settings):
+        """Update last_checked for consistency."""
+        now = timezone.now()
+        with cls._lock:
+            record = cls._get_record(cls._get_page_key(page_settings), time.time())
+            if record is not None:
+                record.last_checked = now
+
+    @classmethod
+    def clear(cls):
+        """Removes all locks, e.g. between tests."""
+        with cls._lock:
+            cls._records.clear()
+            del cls._expiry_heap[:]
+
+    @classmethod
+    @measure_operation
+    def deactivate(cls, page_settings):
+        with cls._lock:
+            cls._records.pop(cls._get_page_key(page_settings), None)
+
+        cls.invalidate_cached_data(page_settings)
+
+    @classmethod
+    @measure_operation
+    def get_data(cls, page_settings):
+        with cls._lock:
+            record = cls._get_record(cls._get_page_key(page_settings), time.time())
+
+            return record.get_data() if record is not None else None
+
+    @classmethod
+    @measure_operation
+    def get_data_many(cls, pages_settings):
+        now = time.time()
+        with cls._lock:
+            records = [
+                cls._get_record(cls._get_page_key(i), now) for i in pages_settings
+            ]
+
+            return [i.get_data() if i is not None else None for i in records]
+
+    @classmethod
+    @measure_operation
+    def get_user_data(cls, user_reference):
+        # Locks are not indexed by user, all locks of the process are scanned.
+        now = time.time()
+        with cls._lock:
+            return [
+                dict(record.get_data(), url=page_key[0], url_parameters=page_key[1])
+                for page_key, record in cls._records.items()
+                if record.user_reference == user_reference and record.expires_at > now
+            ]
+
+    @classmethod
+    @measure_operation
+    def reap(cls, now, stale_before=None, batch_size=1000):
+        # Expired locks are evicted by the heap, stale locks are found by
+        # scanning all locks.
+        with cls._lock:
+            count = len(cls._records)
+            cls._evict_expired(now.timestamp())
+            if stale_before is not None:
+                for page_key, record in list(cls._records.items()):
+                    if record.last_checked <= stale_before:
+                        del cls._records[page_key]
+
+            return count - len(cls._records)
+
+    @classmethod
+    @measure_operation
+    def release(cls, page_settings, token=None):
+        page_key = cls._get_page_key(page_settings)
+
+        with cls._lock:
+            record = cls._get_record(page_key, time.time())
+            if (
+                record is None
+                or record.user_reference != page_settings.user_reference
+                or (token is not None and record.token != token)
+            ):
+                return False
+
+            # User still holds the lock in other tabs.
+            record.tab_counter -= 1
+            is_locked = record.tab_counter > 0
+            if not is_locked:
+                del cls._records[page_key]
+
+        cls.invalidate_cached_data(page_settings)
+        if not is_locked:
+            cls.publish_event(page_settings, EVENT_RELEASED)
+
+        return is_locked
+
+    @classmethod
+    @measure_operation
+    def release_user_locks(cls, user_reference):
+        # Expired locks are not released, their pages are unlocked already.
+        now = time.time()
+        with cls._lock:
+            cls._evict_expired(now)
+            page_keys = [
+                page_key
+                for page_key, record in cls._records.items()
+                if record.user_reference == user_reference and record.expires_at > now
+            ]
+            for page_key in page_keys:
+                del cls._records[page_key]
+
+        for page_key in page_keys:
+            page_settings = cls.page_settings_class.for_page(cls, *page_key)
+            cls.invalidate_cached_data(page_settings)
+            cls.publish_event(page_settings, EVENT_RELEASED)
+
+        return len(page_keys)
+
+    @classmethod
+    @measure_operation
+    def set_data(cls, page_settings, data):
+        with cls._lock:
+            record = MemoryLockRecord(
+                data["user_reference"],
+                data["locked_at"],
+                data["locked_out"],
+                data.get("last_checked", data["locked_at"]),
+                data.get("tab_counter", 1),
+                next(cls._tokens),
+            )
+            cls._set_record(cls._get_page_key(page_settings), record)
+
+        cls.invalidate_cached_data(page_settings)
+
+    @classmethod
+    @measure_operation
+    def touch(cls, page_settings, token, stale_before=None):
+        now = timezone.now()
+        with cls._lock:
+            record = cls._get_record(cls._get_page_key(page_settings), time.time())
+            if (
+                record is None
+                or record.token != token
+                or record.user_reference != page_settings.user_reference
+                or (stale_before is not None and record.last_checked <= stale_before)
+            ):
+                return False
+
+            record.last_checked = now
+
+        return True
@@ -1,45 +1,663 @@
 from __future__ import unicode_literals
 
+import asyncio
+import calendar
 import datetime
 import json
+import os
+import socket
+import threading
+import time
+import weakref
 from collections import namedtuple
 
 import smhasher
-from redis import StrictRedis
-from redis.exceptions import RedisError
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+from redis import ConnectionPool, StrictRedis, UnixDomainSocketConnection
+from redis.exceptions import NoScriptError, RedisError, ResponseError
+from redis.sentinel import Sentinel, SentinelConnectionPool
 
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # redis < 4.2
+    redis_asyncio = None
+
+try:
+    from redis.cluster import ClusterNode, RedisCluster
+except ImportError:  # redis < 4.1
+    ClusterNode = RedisCluster = None
+
+from admin_page_lock.metrics import measure_operation
 from admin_page_lock.models.base_model import BasePageLockModel
-from admin_page_lock.settings import REDIS_PREFIX, REDIS_SETTINGS, TIMEOUT
+from admin_page_lock.page_settings import PageSettings, lazy_setting
+from admin_page_lock.settings import (
+    ENABLE_EVENTS,
+    EVENT_EXPIRED,
+    LOCK_DENIED,
+    REDIS_PREFIX,
+    REDIS_SETTINGS,
+)
+
+RedisSettings = namedtuple(
+    "RedisSettings",
+    [
+        "host",
+        "port",
+        "password",
+        "timeout",
+        "db",
+        "max_connections",
+        "unix_socket_path",
+        "health_check_interval",
+        "sentinels",
+        "sentinel_password",
+        "service_name",
+        "startup_nodes",
+    ],
+)
+
+# Channel of page references changed by any process, see `get_cached_data`.
+# Messages are `<origin> <page reference>`, see `_get_invalidation_origin`.
+INVALIDATION_CHANNEL = "{}:invalidate".format(REDIS_PREFIX)
+
+# Lock is stored in `Redis` hash of these fields, timestamps are integer
+# seconds since epoch (see `_format_timestamp`). Fencing token of the lock is
+# given by counter of the page, see `_get_token_key`.
+FIELDS = [
+    "user_reference",
+    "locked_at",
+    "locked_out",
+    "last_checked",
+    "tab_counter",
+    "token",
+]
+
+# Fields of the lock returned by `get_user_data` and `scan_data`, page is
+# stored by its `url` and `url_parameters`.
+USER_FIELDS = FIELDS + ["url", "url_parameters"]
+
+# Format of `datetime.datetime` data stored in JSON string by older versions.
+DATETIME_FORMAT = "%Y-%m-%d-%H-%M-%S"
+
+# Lua scripts running lock operations atomically in one round trip.
+#
+# `load` returns values of `FIELDS` of the lock (lock stored by older
+# versions is converted to hash first). Lock of user that has not checked
+# the page since `stale_before` (empty string disables the check) is deleted
+# before anything else is done. Lock events are published to channel given
+# by the last argument (empty string disables events). Token counter of the
+# page is the second key, set of locks of the user is the third key (it is
+# not given in Redis Cluster, see `_index_user_lock`).
+COMMON_FUNCTIONS = """
+local function publish(channel, event, locked_by)
+    if channel ~= "" then
+        redis.call(
+            "PUBLISH", channel, cjson.encode({event = event, locked_by = locked_by})
+        )
+    end
+end
+
+local function index_user(user_key, key, timeout)
+    redis.call("SADD", user_key, key)
+    if redis.call("TTL", user_key) < tonumber(timeout) then
+        redis.call("EXPIRE", user_key, timeout)
+    end
+end
+
+local function to_timestamp(value)
+    local year, month, day, hour, minute, second = string.match(
+        value, "(%d+)-(%d+)-(%d+)-(%d+)-(%d+)-(%d+)"
+    )
+    year, month, day = tonumber(year), tonumber(month), tonumber(day)
+    if month <= 2 then
+        year = year - 1
+    end
+    local era = math.floor(year / 400)
+    local year_of_era = year - era * 400
+    local day_of_year = math.floor((153 * ((month + 9) % 12) + 2) / 5) + day - 1
+    local day_of_era = year_of_era * 365 + math.floor(year_of_era / 4)
+        - math.floor(year_of_era / 100) + day_of_year
+    local days = era * 146097 + day_of_era - 719468
+    return days * 86400 + tonumber(hour) * 3600 + tonumber(minute) * 60
+        + tonumber(second)
+end
+
+local function load(key)
+    local key_type = redis.call("TYPE", key)["ok"]
+    if key_type == "hash" then
+        return redis.call(
+            "HMGET", key,
+            "user_reference", "locked_at", "locked_out", "last_checked", "tab_counter",
+            "token"
+        )
+    end
+    if key_type ~= "string" then
+        return nil
+    end
+
+    local data = cjson.decode(redis.call("GET", key))
+    local values = {
+        data["user_reference"],
+        to_timestamp(data["locked_at"]),
+        to_timestamp(data["locked_out"]),
+        to_timestamp(data["last_checked"] or data["locked_at"]),
+        data["tab_counter"] or 1,
+        false,
+    }
+    local ttl = redis.call("PTTL", key)
+    redis.call("DEL", key)
+    redis.call(
+        "HSET", key,
+        "user_reference", values[1],
+        "locked_at", values[2],
+        "locked_out", values[3],
+        "last_checked", values[4],
+        "tab_counter", values[5]
+    )
+    if ttl > 0 then
+        redis.call("PEXPIRE", key, ttl)
+    end
+    return values
+end
+"""
+
+ACQUIRE_SCRIPT = COMMON_FUNCTIONS + """
+local values = load(KEYS[1])
+if values and ARGV[4] ~= "" and tonumber(values[4]) <= tonumber(ARGV[4]) then
+    redis.call("DEL", KEYS[1])
+    publish(ARGV[7], "expired")
+    values = nil
+end
+
+if values == nil then
+    redis.call("SET", KEYS[2], ARGV[8], "NX")
+    local token = redis.call("INCR", KEYS[2])
+    redis.call("EXPIRE", KEYS[2], ARGV[6])
+    redis.call(
+        "HSET", KEYS[1],
+        "user_reference", ARGV[1],
+        "locked_at", ARGV[2],
+        "locked_out", ARGV[3],
+        "last_checked", ARGV[2],
+        "tab_counter", 1,
+        "token", token,
+        "url", ARGV[9],
+        "url_parameters", ARGV[10]
+    )
+    redis.call("EXPIRE", KEYS[1], ARGV[6])
+    if KEYS[3] then
+        index_user(KEYS[3], KEYS[1], ARGV[6])
+    end
+    publish(ARGV[7], "acquired", ARGV[1])
+    return {"acquired", {ARGV[1], ARGV[2], ARGV[3], ARGV[2], 1, token}}
+end
+if values[1] ~= ARGV[1] or ARGV[5] ~= "1" then
+    return {"denied", values}
+end
+
+redis.call(
+    "HSET", KEYS[1], "locked_at", ARGV[2], "locked_out", ARGV[3], "last_checked", ARGV[2]
+)
+local tab_counter = redis.call("HINCRBY", KEYS[1], "tab_counter", 1)
+redis.call("EXPIRE", KEYS[1], ARGV[6])
+if KEYS[3] then
+    index_user(KEYS[3], KEYS[1], ARGV[6])
+end
+return {"reacquired", {ARGV[1], ARGV[2], ARGV[3], ARGV[2], tab_counter, values[6]}}
+"""
+
+RELEASE_SCRIPT = COMMON_FUNCTIONS + """
+local values = load(KEYS[1])
+if not values or values[1] ~= ARGV[1] or (ARGV[3] ~= "" and values[6] ~= ARGV[3]) then
+    return 0
+end
+if tonumber(values[5]) <= 1 then
+    redis.call("DEL", KEYS[1])
+    if KEYS[3] then
+        redis.call("SREM", KEYS[3], KEYS[1])
+    end
+    publish(ARGV[2], "released")
+    return 0
+end
+
+redis.call("HINCRBY", KEYS[1], "tab_counter", -1)
+return 1
+"""
+
+REFRESH_SCRIPT = COMMON_FUNCTIONS + """
+local values = load(KEYS[1])
+if not values then
+    return false
+end
+
+if ARGV[3] ~= "" and tonumber(values[4]) <= tonumber(ARGV[3]) then
+    redis.call("DEL", KEYS[1])
+    publish(ARGV[4], "expired")
+    return false
+end
+if values[1] == ARGV[1] then
+    redis.call("HSET", KEYS[1], "last_checked", ARGV[2])
+    values[4] = ARGV[2]
+end
+return values
+"""
+
+INDEX_USER_SCRIPT = COMMON_FUNCTIONS + """
+index_user(KEYS[1], ARGV[1], ARGV[2])
+"""
 
-RedisSettings = namedtuple("RedisSettings", ["host", "port", "password", "timeout"])
+RELEASE_USER_SCRIPT = COMMON_FUNCTIONS + """
+local values = load(KEYS[1])
+if not values or values[1] ~= ARGV[1] then
+    return 0
+end
+
+redis.call("DEL", KEYS[1])
+publish(ARGV[2], "released")
+return 1
+"""
+
+TOUCH_SCRIPT = COMMON_FUNCTIONS + """
+local values = load(KEYS[1])
+if not values or values[1] ~= ARGV[1] or values[6] ~= ARGV[2] then
+    return 0
+end
+if ARGV[4] ~= "" and tonumber(values[4]) <= tonumber(ARGV[4]) then
+    return 0
+end
+
+redis.call("HSET", KEYS[1], "last_checked", ARGV[3])
+return 1
+"""
+
+
+class RedisPageSettings(PageSettings):
+    __slots__ = ("_async_redis_client", "_page_reference", "_redis_client")
+
+    @lazy_setting
+    def async_redis_client(self):
+        return self.model_class._get_async_redis_client()
+
+    @lazy_setting
+    def page_reference(self):
+        return self.model_class._get_page_reference(
+            self.page_url, self.page_url_parameters
+        )
+
+    @lazy_setting
+    def redis_client(self):
+        return self.model_class._get_redis_client()
+
+
+class RedisSubscription(object):
+    """
+    Subscription of lock events of one page (see `LocalSubscription`). Locks
+    deleted by `Redis` itself are reported by keyspace notifications when
+    they are enabled by `notify-keyspace-events` (`Kx` at least).
+    """
+
+    def __init__(self, redis_client, channel, keyspace_channel):
+        self.channel = channel
+        self.pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(channel, keyspace_channel)
+
+    def _parse_message(self, message):
+        # Returns event of the message or `None` for other messages
+        # (subscription confirmations, keyspace notifications of writes).
+        if message is None or message["type"] != "message":
+            return None
+
+        channel = message["channel"]
+        data = message["data"]
+        if not isinstance(channel, str):
+            channel = channel.decode("utf-8")
+        if not isinstance(data, str):
+            data = data.decode("utf-8")
+
+        if channel == self.channel:
+            event = json.loads(data)
+            event.setdefault("locked_by", None)
+            return event
+
+        if data == "expired":
+            return {"event": EVENT_EXPIRED, "locked_by": None}
+
+        return None
+
+    def close(self):
+        self.pubsub.close()
+
+    def get(self, timeout):
+        """Returns next event or `None` when no event comes in `timeout` [s]."""
+        deadline = time.time() + timeout
+        while True:
+            message = self.pubsub.get_message(timeout=max(deadline - time.time(), 0))
+            event = self._parse_message(message)
+            if event is not None:
+                return event
+            if time.time() >= deadline:
+                return None
 
 
 class RedisPageLockModel(BasePageLockModel):
+    page_settings_class = RedisPageSettings
+
+    # Events and invalidations are published by `Redis` pub/sub.
+    notifies_all_processes = True
+
+    # Connection pool shared by all model calls, see `_get_connection_pool`.
+    # Client of Redis Cluster keeps its own pools of all nodes instead.
+    _cluster_client = None
+    _cluster_client_pid = None
+    _connection_pool = None
+    _connection_pool_lock = threading.Lock()
+    _connection_pool_pid = None
+
+    # Connection pools (or clients of Redis Cluster) of async functions, one
+    # per event loop (connections of `redis.asyncio` can't be shared by event
+    # loops).
+    _async_cluster_clients = weakref.WeakKeyDictionary()
+    _async_connection_pools = weakref.WeakKeyDictionary()
+
+    # Registered Lua scripts, see `_get_script` and `_get_async_script`.
+    _async_scripts = {}
+    _scripts = {}
+
+    @classmethod
+    async def _apublish_invalidation(cls, cache_key):
+        try:
+            await cls._get_async_redis_client().publish(
+                INVALIDATION_CHANNEL,
+                "{} {}".format(cls._get_invalidation_origin(), cache_key),
+            )
+        except RedisError:
+            # Other processes get the change when their cached data time out.
+            pass
+
+    @classmethod
+    async def _aindex_user_lock(cls, page_settings, locked_at, locked_out):
+        # See `_index_user_lock`.
+        if cls._get_redis_settings().startup_nodes:
+            await cls._arun_script(
+                page_settings,
+                INDEX_USER_SCRIPT,
+                [
+                    page_settings.page_reference,
+                    cls._get_timeout(locked_at, locked_out),
+                ],
+                keys=[cls._get_user_key(page_settings.user_reference)],
+            )
+
+    @classmethod
+    async def _arun_script(cls, page_settings, script, args, keys=None):
+        redis_client = page_settings.async_redis_client
+        if keys is None:
+            keys = cls._get_script_keys(page_settings)
+
+        try:
+            return await cls._get_async_script(redis_client, script)(
+                keys=keys, args=args, client=redis_client
+            )
+        except RedisError:
+            raise
+
+    @classmethod
+    def _create_async_cluster_client(cls):
+        cluster_kwargs = cls._get_cluster_kwargs()
+        cluster_kwargs["startup_nodes"] = [
+            redis_asyncio.cluster.ClusterNode(host, port)
+            for host, port in cluster_kwargs["startup_nodes"]
+        ]
+
+        return redis_asyncio.RedisCluster(**cluster_kwargs)
+
+    @classmethod
+    def _create_async_connection_pool(cls):
+        redis_settings = cls._get_redis_settings()
+        pool_kwargs = cls._get_connection_pool_kwargs()
+        if redis_settings.sentinels:
+            return redis_asyncio.SentinelConnectionPool(
+                redis_settings.service_name,
+                redis_asyncio.Sentinel(
+                    redis_settings.sentinels, sentinel_kwargs=cls._get_sentinel_kwargs()
+                ),
+                **pool_kwargs
+            )
+        if "path" in pool_kwargs:
+            pool_kwargs["connection_class"] = redis_asyncio.UnixDomainSocketConnection
+
+        return redis_asyncio.ConnectionPool(**pool_kwargs)
+
     @classmethod
-    def _get_page_reference(cls, req):
+    def _create_cluster_client(cls):
+        if RedisCluster is None:
+            raise ImproperlyConfigured(_("Redis Cluster requires redis 4.1 or newer."))
+
+        cluster_kwargs = cls._get_cluster_kwargs()
+        cluster_kwargs["startup_nodes"] = [
+            ClusterNode(host, port) for host, port in cluster_kwargs["startup_nodes"]
+        ]
+
+        return RedisCluster(**cluster_kwargs)
+
+    @classmethod
+    def _create_connection_pool(cls):
+        redis_settings = cls._get_redis_settings()
+        pool_kwargs = cls._get_connection_pool_kwargs()
+        if redis_settings.sentinels:
+            # Connections are made to current primary found by sentinels, so
+            # failover doesn't need a deploy.
+            return SentinelConnectionPool(
+                redis_settings.service_name,
+                Sentinel(
+                    redis_settings.sentinels, sentinel_kwargs=cls._get_sentinel_kwargs()
+                ),
+                **pool_kwargs
+            )
+
+        return ConnectionPool(**pool_kwargs)
+
+    @classmethod
+    def _format_timestamp(cls, value):
+        # Naive `datetime.datetime` is stored as it is, same as formatted
+        # datetimes stored by older versions.
+        if value is None:
+            return ""
+
+        return calendar.timegm(value.utctimetuple())
+
+    @classmethod
+    def _get_acquire_args(
+        cls, page_settings, locked_at, locked_out, stale_before, can_open_more_tabs
+    ):
+        return [
+            page_settings.user_reference,
+            cls._format_timestamp(locked_at),
+            cls._format_timestamp(locked_out),
+            cls._format_timestamp(stale_before),
+            1 if can_open_more_tabs else 0,
+            # This deactives old records.
+            cls._get_timeout(locked_at, locked_out),
+            cls._get_events_argument(page_settings),
+            cls._get_token_seed(),
+            page_settings.page_url,
+            page_settings.page_url_parameters,
+        ]
+
+    @classmethod
+    def _get_async_connection_pool(cls):
+        loop = asyncio.get_running_loop()
+        if loop not in cls._async_connection_pools:
+            cls._async_connection_pools[loop] = cls._create_async_connection_pool()
+
+        return cls._async_connection_pools[loop]
+
+    @classmethod
+    def _get_async_redis_client(cls):
+        if redis_asyncio is None:
+            raise ImproperlyConfigured(_("Async API requires redis 4.2 or newer."))
+
+        if cls._get_redis_settings().startup_nodes:
+            loop = asyncio.get_running_loop()
+            if loop not in cls._async_cluster_clients:
+                cls._async_cluster_clients[loop] = cls._create_async_cluster_client()
+
+            return cls._async_cluster_clients[loop]
+
+        return redis_asyncio.StrictRedis(
+            connection_pool=cls._get_async_connection_pool()
+        )
+
+    @classmethod
+    def _get_async_script(cls, redis_client, script):
+        # See `_get_script`.
+        if script not in cls._async_scripts:
+            cls._async_scripts[script] = redis_client.register_script(script)
+
+        return cls._async_scripts[script]
+
+    @classmethod
+    def _get_cache_key(cls, page_settings):
+        return page_settings.page_reference
+
+    @classmethod
+    def _get_cached_refresh_data(cls, page_settings, stale_before):
+        # Returns tuple `(found, data)` of cached data of the page. Data are
+        # found only when `refresh` would not change them, i.e. the page is
+        # not locked by current user and the lock is not stale.
+        cache = cls._get_data_cache()
+        if cache is None:
+            return False, None
+
+        found, data = cache.get(cls._get_cache_key(page_settings))
+        if not found or cls._is_stale(data, stale_before):
+            return False, None
+
+        if data is not None and data["user_reference"] == page_settings.user_reference:
+            return False, None
+
+        return True, data
+
+    @classmethod
+    def _get_cluster_client(cls):
+        # See `_get_connection_pool`.
+        pid = os.getpid()
+        if cls._cluster_client is None or cls._cluster_client_pid != pid:
+            with cls._connection_pool_lock:
+                if cls._cluster_client is None or cls._cluster_client_pid != pid:
+                    cls._cluster_client = cls._create_cluster_client()
+                    cls._cluster_client_pid = pid
+
+        return cls._cluster_client
+
+    @classmethod
+    def _get_cluster_kwargs(cls):
+        redis_settings = cls._get_redis_settings()
+
+        # Redis Cluster has only database `0`.
+        cluster_kwargs = {
+            "health_check_interval": redis_settings.health_check_interval,
+            "password": redis_settings.password,
+            "socket_timeout": redis_settings.timeout,
+            "startup_nodes": redis_settings.startup_nodes,
+        }
+        if redis_settings.max_connections is not None:
+            # Limit of every node.
+            cluster_kwargs["max_connections"] = redis_settings.max_connections
+
+        return cluster_kwargs
+
+    @classmethod
+    def _get_connection_pool(cls):
+        # The pool is created once per process. Process created by `fork`
+        # creates its own pool instead of sharing sockets with its parent.
+        pid = os.getpid()
+        if cls._connection_pool is None or cls._connection_pool_pid != pid:
+            with cls._connection_pool_lock:
+                if cls._connection_pool is None or cls._connection_pool_pid != pid:
+                    cls._connection_pool = cls._create_connection_pool()
+                    cls._connection_pool_pid = pid
+
+        return cls._connection_pool
+
+    @classmethod
+    def _get_connection_pool_kwargs(cls):
+        redis_settings = cls._get_redis_settings()
+
+        pool_kwargs = {
+            "db": redis_settings.db,
+            "health_check_interval": redis_settings.health_check_interval,
+            "max_connections": redis_settings.max_connections,
+            "password": redis_settings.password,
+            "socket_timeout": redis_settings.timeout,
+        }
+        if redis_settings.sentinels:
+            # Address of primary is given by sentinels.
+            pass
+        elif redis_settings.unix_socket_path:
+            pool_kwargs["connection_class"] = UnixDomainSocketConnection
+            pool_kwargs["path"] = redis_settings.unix_socket_path
+        else:
+            pool_kwargs["host"] = redis_settings.host
+            pool_kwargs["port"] = redis_settings.port
+
+        return pool_kwargs
+
+    @classmethod
+    def _get_events_argument(cls, page_settings):
+        # Returns channel of lock events passed to Lua scripts.
+        if not ENABLE_EVENTS:
+            return ""
+
+        return cls._get_events_channel(page_settings)
+
+    @classmethod
+    def _get_events_channel(cls, page_settings):
+        return "{}:events".format(page_settings.page_reference)
+
+    @classmethod
+    def _get_invalidation_origin(cls):
+        # Process publishing invalidation, it ignores its own messages.
+        return "{}:{}".format(socket.gethostname(), os.getpid())
+
+    @classmethod
+    def _get_legacy_references(cls, page_references, pages_values):
+        # Returns page references of locks stored by older versions (reading
+        # of JSON string as hash fails).
+        return [
+            page_reference
+            for page_reference, values in zip(page_references, pages_values)
+            if isinstance(values, ResponseError)
+        ]
+
+    @classmethod
+    def _get_page_reference(cls, page_url, page_parameters):
         # Include `url parameters` to `page reference` in case
         # `URL_IGNORE_PARAMETERS` is set up to `False`.
-        page_parameters = cls._get_page_url_parameters(req)
-        page_url = cls._get_page_url(req)
 
         # Encode `url_parameters` and `url`.
         hex_url = hex(
             smhasher.murmur3_x64_128("{}{}".format(page_url, page_parameters))
         )
 
-        # Return unique page reference that will be used as `redis key`.
+        # Return unique page reference that will be used as `redis key`. Keys
+        # (and channels) of the page have the same hash tag in Redis Cluster,
+        # so they are stored by one node.
+        if cls._get_redis_settings().startup_nodes:
+            return "{}:{{{}}}".format(REDIS_PREFIX, hex_url)
+
         return "{}:{}".format(REDIS_PREFIX, hex_url)
 
     @classmethod
     def _get_redis_client(cls):
-        redis_settings = cls._get_redis_settings()
+        if cls._get_redis_settings().startup_nodes:
+            return cls._get_cluster_client()
 
-        redis_client = StrictRedis(
-            host=redis_settings.host,
-            port=redis_settings.port,
-            password=redis_settings.password,
-            socket_timeout=redis_settings.timeout,
-        )
+        # Client is cheap, connections are taken from the shared pool.
+        redis_client = StrictRedis(connection_pool=cls._get_connection_pool())
 
         return redis_client
 
@@ -51,70 +669,792 @@ class RedisPageLockModel(BasePageLockModel):
             REDIS_SETTINGS["port"],
             REDIS_SETTINGS["password"],
             REDIS_SETTINGS["timeout"],
+            REDIS_SETTINGS.get("db", 0),
+            REDIS_SETTINGS.get("max_connections"),
+            REDIS_SETTINGS.get("unix_socket_path"),
+            REDIS_SETTINGS.get("health_check_interval", 0),
+            REDIS_SETTINGS.get("sentinels"),
+            REDIS_SETTINGS.get("sentinel_password"),
+            REDIS_SETTINGS.get("service_name", "mymaster"),
+            REDIS_SETTINGS.get("startup_nodes"),
         )
 
         return redis_settings
 
     @classmethod
+    def _get_refresh_args(cls, page_settings, stale_before):
+        return [
+            page_settings.user_reference,
+            cls._format_timestamp(timezone.now()),
+            cls._format_timestamp(stale_before),
+            cls._get_events_argument(page_settings),
+        ]
+
+    @classmethod
+    def _get_release_args(cls, page_settings, token):
+        return [
+            page_settings.user_reference,
+            cls._get_events_argument(page_settings),
+            token if token is not None else "",
+        ]
+
+    @classmethod
+    def _get_release_user_args(cls, page_reference, user_reference):
+        events_channel = ""
+        if ENABLE_EVENTS:
+            events_channel = "{}:events".format(page_reference)
+
+        return [user_reference, events_channel]
+
+    @classmethod
+    def _get_script_keys(cls, page_settings):
+        # Keys of lock scripts, see `COMMON_FUNCTIONS`.
+        keys = [page_settings.page_reference, cls._get_token_key(page_settings)]
+        if not cls._get_redis_settings().startup_nodes:
+            keys.append(cls._get_user_key(page_settings.user_reference))
+
+        return keys
+
+    @classmethod
+    def _get_script(cls, redis_client, script):
+        # Scripts are called by `EVALSHA` (`EVAL` only when the script is not
+        # cached by `Redis` yet), SHA1 of the script is computed only once.
+        if script not in cls._scripts:
+            cls._scripts[script] = redis_client.register_script(script)
+
+        return cls._scripts[script]
+
+    @classmethod
+    def _get_sentinel_kwargs(cls):
+        # Settings of connections to sentinels.
+        redis_settings = cls._get_redis_settings()
+
+        return {
+            "password": redis_settings.sentinel_password,
+            "socket_timeout": redis_settings.timeout,
+        }
+
+    @classmethod
+    def _get_stored_data(cls, data):
+        # Returns fields of hash to store in `Redis`.
+        data_to_store = {
+            "user_reference": data["user_reference"],
+            "locked_at": cls._format_timestamp(data["locked_at"]),
+            "locked_out": cls._format_timestamp(data["locked_out"]),
+            "last_checked": cls._format_timestamp(
+                data.get("last_checked") or data["locked_at"]
+            ),
+            "tab_counter": data.get("tab_counter", 1),
+        }
+        if data.get("token") is not None:
+            data_to_store["token"] = data["token"]
+
+        return data_to_store
+
+    @classmethod
+    def _get_timeout(cls, locked_at, locked_out):
+        return max(int((locked_out - locked_at).total_seconds()), 1)
+
+    @classmethod
+    def _get_token_key(cls, page_settings):
+        # Counter of fencing tokens of the page, it has the same hash tag as
+        # the lock in Redis Cluster.
+        return "{}:token".format(page_settings.page_reference)
+
+    @classmethod
+    def _get_touch_args(cls, page_settings, token, stale_before):
+        return [
+            page_settings.user_reference,
+            token,
+            cls._format_timestamp(timezone.now()),
+            cls._format_timestamp(stale_before),
+        ]
+
+    @classmethod
+    def _get_user_key(cls, user_reference):
+        # Set of page references locked by the user, it might contain pages
+        # not locked by the user anymore (see `get_user_data`).
+        return "{}:user:{}".format(REDIS_PREFIX, user_reference)
+
+    @classmethod
+    def _index_user_lock(cls, page_settings, locked_at, locked_out):
+        # Set of the user is stored by another node of Redis Cluster than the
+        # lock, so it is not changed by lock scripts.
+        if cls._get_redis_settings().startup_nodes:
+            cls._run_script(
+                page_settings,
+                INDEX_USER_SCRIPT,
+                [
+                    page_settings.page_reference,
+                    cls._get_timeout(locked_at, locked_out),
+                ],
+                keys=[cls._get_user_key(page_settings.user_reference)],
+            )
+
+    @classmethod
+    def _listen_invalidations(cls, cache):
+        # Invalidates page references changed by other processes. Cache is
+        # cleared whenever subscription (re)starts, so changes published
+        # while the process was not subscribed are not missed.
+        while True:
+            try:
+                pubsub = cls._get_redis_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                cache.clear()
+
+                while True:
+                    message = pubsub.get_message(timeout=60)
+                    if message is None or message["type"] != "message":
+                        continue
+
+                    data = message["data"]
+                    if not isinstance(data, str):
+                        data = data.decode("utf-8")
+
+                    origin, cache_key = data.split(" ", 1)
+                    if origin != cls._get_invalidation_origin():
+                        cache.invalidate(cache_key)
+            except RedisError:
+                time.sleep(1)
+
+    @classmethod
+    def _parse_acquire_result(cls, result, values):
+        if not isinstance(result, str):
+            result = result.decode("utf-8")
+
+        return result, cls._parse_data(values)
+
+    @classmethod
+    def _parse_data(cls, values):
+        # Returns data of values of `FIELDS` (`None` when the page is not
+        # locked) with timestamps as `datetime.datetime` instances.
+        if not values or values[0] is None:
+            return None
+
+        # Locks stored by older versions have no token.
+        user_reference, locked_at, locked_out, last_checked, tab_counter = values[:5]
+        token = values[5] if len(values) > 5 else None
+        if not isinstance(user_reference, str):
+            user_reference = user_reference.decode("utf-8")
+
+        return {
+            "user_reference": user_reference,
+            "locked_at": cls._parse_timestamp(locked_at),
+            "locked_out": cls._parse_timestamp(locked_out),
+            "last_checked": cls._parse_timestamp(last_checked or locked_at),
+            "tab_counter": int(tab_counter),
+            "token": int(token) if token else None,
+        }
+
+    @classmethod
+    def _parse_data_many(cls, page_references, pages_values, legacy_data):
+        # See `get_data_many`.
+        return [
+            (
+                cls._parse_legacy_data(legacy_data[page_reference])
+                if isinstance(values, ResponseError)
+                else cls._parse_data(values)
+            )
+            for page_reference, values in zip(page_references, pages_values)
+        ]
+
+    @classmethod
+    def _parse_datetime(cls, value):
+        value = datetime.datetime.strptime(value, DATETIME_FORMAT)
+        if settings.USE_TZ:
+            value = timezone.make_aware(value, timezone.utc)
+
+        return value
+
+    @classmethod
+    def _parse_legacy_data(cls, raw_data):
+        # Returns data stored in JSON string by older versions (`None` when
+        # the page is not locked), scripts convert them to hash.
+        if raw_data is None:
+            return None
+
+        data = json.loads(raw_data)
+
+        data_to_return = {}
+        for parameter_name, parameter_value in data.items():
+            if parameter_name in ["locked_at", "locked_out", "last_checked"]:
+                parameter_value = cls._parse_datetime(parameter_value)
+            data_to_return.update({parameter_name: parameter_value})
+
+        # Data stored by older versions do not contain `last_checked`.
+        data_to_return.setdefault("last_checked", data_to_return["locked_at"])
+        data_to_return.setdefault("token", None)
+
+        return data_to_return
+
+    @classmethod
+    def _parse_page_data(cls, page_reference, values):
+        # Returns data of values of `USER_FIELDS` with the page.
+        data = cls._parse_data(values[: len(FIELDS)])
+        if data is None:
+            return None
+
+        url, url_parameters = values[len(FIELDS) :]
+        data["page_reference"] = page_reference
+        data["url"] = cls._to_str(url)
+        data["url_parameters"] = cls._to_str(url_parameters) or ""
+
+        return data
+
+    @classmethod
+    def _parse_timestamp(cls, value):
+        value = datetime.datetime.utcfromtimestamp(int(value))
+        if settings.USE_TZ:
+            value = timezone.make_aware(value, timezone.utc)
+
+        return value
+
+    @classmethod
+    def _publish_invalidation(cls, cache_key):
+        try:
+            cls._get_redis_client().publish(
+                INVALIDATION_CHANNEL,
+                "{} {}".format(cls._get_invalidation_origin(), cache_key),
+            )
+        except RedisError:
+            # Other processes get the change when their cached data time out.
+            pass
+
+    @classmethod
+    def _run_script(cls, page_settings, script, args, keys=None):
+        redis_client = page_settings.redis_client
+        if keys is None:
+            keys = cls._get_script_keys(page_settings)
+
+        try:
+            return cls._get_script(redis_client, script)(
+                keys=keys, args=args, client=redis_client
+            )
+        except RedisError:
+            raise
+
+    @classmethod
+    def _scan_page_references(cls, cursor, count):
+        # Returns tuple `(cursor, client, page references)` of one `SCAN`
+        # (counters of tokens have the same prefix as locks). Every primary
+        # of Redis Cluster is scanned by its own cursor, so cursor is
+        # `<index of the node>-<cursor of the node>` there.
+        redis_client = cls._get_redis_client()
+        if not cls._get_redis_settings().startup_nodes:
+            match = "{}:0x*".format(REDIS_PREFIX)
+            cursor, keys = redis_client.scan(int(cursor), match, count)
+            next_cursor = str(cursor)
+        else:
+            match = "{}:{{0x*".format(REDIS_PREFIX)
+            nodes = sorted(redis_client.get_primaries(), key=lambda i: i.name)
+            node_index, _, node_cursor = cursor.partition("-")
+            node_index = int(node_index)
+            redis_client = redis_client.get_redis_connection(nodes[node_index])
+            node_cursor, keys = redis_client.scan(int(node_cursor or 0), match, count)
+            if node_cursor:
+                next_cursor = "{}-{}".format(node_index, node_cursor)
+            elif node_index + 1 < len(nodes):
+                next_cursor = "{}-0".format(node_index + 1)
+            else:
+                next_cursor = "0"
+
+        page_references = [cls._to_str(i) for i in keys]
+
+        return (
+            next_cursor,
+            redis_client,
+            [i for i in page_references if not i.endswith(":token")],
+        )
+
+    @classmethod
+    def _subscribe_invalidations(cls, cache):
+        # Invalidations are received by daemon thread holding one connection
+        # of the pool.
+        thread = threading.Thread(
+            target=cls._listen_invalidations,
+            args=(cache,),
+            name="page-lock-invalidations",
+        )
+        thread.daemon = True
+        thread.start()
+
+    @classmethod
+    def _sum_pool_stat(cls, connection_pools, name, get_value):
+        # Returns sum of attribute `name` of the pools or `None` when some
+        # pool doesn't have it (attributes of pools are not public API).
+        values = [getattr(i, name, None) for i in connection_pools]
+        if any(i is None for i in values):
+            return None
+
+        return sum(get_value(i) for i in values)
+
+    @classmethod
+    def _to_str(cls, value):
+        # Values are read as bytes unless they are `None`.
+        if value is None or isinstance(value, str):
+            return value
+
+        return value.decode("utf-8")
+
+    @classmethod
+    @measure_operation
+    async def aacquire(
+        cls,
+        page_settings,
+        locked_at,
+        locked_out,
+        stale_before=None,
+        can_open_more_tabs=True,
+    ):
+        result, values = await cls._arun_script(
+            page_settings,
+            ACQUIRE_SCRIPT,
+            cls._get_acquire_args(
+                page_settings, locked_at, locked_out, stale_before, can_open_more_tabs
+            ),
+        )
+
+        result, data = cls._parse_acquire_result(result, values)
+        if result != LOCK_DENIED:
+            await cls._aindex_user_lock(page_settings, locked_at, locked_out)
+            await cls.ainvalidate_cached_data(page_settings)
+
+        return result, data
+
+    @classmethod
+    @measure_operation
+    def acquire(
+        cls,
+        page_settings,
+        locked_at,
+        locked_out,
+        stale_before=None,
+        can_open_more_tabs=True,
+    ):
+        result, values = cls._run_script(
+            page_settings,
+            ACQUIRE_SCRIPT,
+            cls._get_acquire_args(
+                page_settings, locked_at, locked_out, stale_before, can_open_more_tabs
+            ),
+        )
+
+        result, data = cls._parse_acquire_result(result, values)
+        if result != LOCK_DENIED:
+            cls._index_user_lock(page_settings, locked_at, locked_out)
+            cls.invalidate_cached_data(page_settings)
+
+        return result, data
+
+    @classmethod
+    @measure_operation
+    async def adeactivate(cls, page_settings):
+        await page_settings.async_redis_client.delete(page_settings.page_reference)
+        await cls.ainvalidate_cached_data(page_settings)
+
+    @classmethod
+    @measure_operation
+    async def aget_data(cls, page_settings):
+        redis_client = page_settings.async_redis_client
+        page_reference = page_settings.page_reference
+
+        try:
+            try:
+                values = await redis_client.hmget(page_reference, FIELDS)
+                return cls._parse_data(values)
+            except ResponseError:
+                # Lock stored by older versions is JSON string.
+                raw_data = await redis_client.get(page_reference)
+                return cls._parse_legacy_data(raw_data)
+        except (IndexError, RedisError, TypeError, ValueError):
+            return None
+
+    @classmethod
+    @measure_operation
+    async def aget_data_many(cls, pages_settings):
+        if not pages_settings:
+            return []
+
+        redis_client = pages_settings[0].async_redis_client
+        page_references = [i.page_reference for i in pages_settings]
+
+        pipeline = redis_client.pipeline(transaction=False)
+        for page_reference in page_references:
+            pipeline.hmget(page_reference, FIELDS)
+
+        try:
+            pages_values = await pipeline.execute(raise_on_error=False)
+            legacy_references = cls._get_legacy_references(
+                page_references, pages_values
+            )
+            legacy_data = {}
+            if legacy_references:
+                legacy_data = dict(
+                    zip(legacy_references, await redis_client.mget(legacy_references))
+                )
+        except RedisError:
+            return [None] * len(page_references)
+
+        return cls._parse_data_many(page_references, pages_values, legacy_data)
+
+    @classmethod
+    @measure_operation
+    async def arefresh(cls, page_settings, stale_before=None):
+        found, data = cls._get_cached_refresh_data(page_settings, stale_before)
+        if found:
+            return data
+
+        generation = cls._get_cache_generation()
+        values = await cls._arun_script(
+            page_settings,
+            REFRESH_SCRIPT,
+            cls._get_refresh_args(page_settings, stale_before),
+        )
+
+        data = cls._parse_data(values)
+        cls._set_cached_data(page_settings, data, generation)
+
+        return data
+
+    @classmethod
+    @measure_operation
+    async def arelease(cls, page_settings, token=None):
+        is_locked = await cls._arun_script(
+            page_settings, RELEASE_SCRIPT, cls._get_release_args(page_settings, token)
+        )
+        await cls.ainvalidate_cached_data(page_settings)
+
+        return bool(is_locked)
+
+    @classmethod
+    @measure_operation
+    async def aset_data(cls, page_settings, data):
+        page_reference = page_settings.page_reference
+
+        pipeline = page_settings.async_redis_client.pipeline(transaction=True)
+        pipeline.delete(page_reference)
+        pipeline.hset(page_reference, mapping=cls._get_stored_data(data))
+        # This deactives old records.
+        pipeline.expire(page_reference, page_settings.policy.timeout)
+
+        try:
+            await pipeline.execute()
+        except RedisError:
+            raise
+
+        await cls.ainvalidate_cached_data(page_settings)
+
+    @classmethod
+    @measure_operation
+    async def atouch(cls, page_settings, token, stale_before=None):
+        return bool(
+            await cls._arun_script(
+                page_settings,
+                TOUCH_SCRIPT,
+                cls._get_touch_args(page_settings, token, stale_before),
+            )
+        )
+
+    @classmethod
+    @measure_operation
     def deactivate(cls, page_settings):
         # Deactivate page connection by deleting stored data for current page
         # in `Redis`.
-        redis_client = page_settings["redis_client"]
-        page_reference = page_settings["page_reference"]
+        redis_client = page_settings.redis_client
+        page_reference = page_settings.page_reference
 
         redis_client.delete(page_reference)
+        cls.invalidate_cached_data(page_settings)
 
     @classmethod
-    def get_page_settings(cls, req):
-        page_settings = super(RedisPageLockModel, cls).get_page_settings(req)
-
-        page_settings["page_reference"] = cls._get_page_reference(req)
-        page_settings["redis_client"] = cls._get_redis_client()
+    def get_connection_pool_stats(cls):
+        """
+        Returns statistics of connection pool of current process (sum of pools
+        of all nodes of Redis Cluster):
+         + pid                      process owning the pool;
+         + max_connections          maximal number of connections;
+         + created_connections      number of opened connections;
+         + available_connections    number of idle connections;
+         + in_use_connections       number of connections used right now.
+        Statistics not exposed by the class of the pool (e.g.
+        `BlockingConnectionPool`) or by the version of `redis` are `None`.
+        """
+        if cls._get_redis_settings().startup_nodes:
+            connection_pools = [
+                i.redis_connection.connection_pool
+                for i in cls._get_cluster_client().get_nodes()
+                if i.redis_connection is not None
+            ]
+            pid = cls._cluster_client_pid
+        else:
+            connection_pools = [cls._get_connection_pool()]
+            pid = cls._connection_pool_pid
 
-        return page_settings
+        return {
+            "pid": pid,
+            "max_connections": cls._sum_pool_stat(
+                connection_pools, "max_connections", lambda i: i
+            ),
+            "created_connections": cls._sum_pool_stat(
+                connection_pools, "_created_connections", lambda i: i
+            ),
+            "available_connections": cls._sum_pool_stat(
+                connection_pools, "_available_connections", len
+            ),
+            "in_use_connections": cls._sum_pool_stat(
+                connection_pools, "_in_use_connections", len
+            ),
+        }
 
     @classmethod
+    @measure_operation
     def get_data(cls, page_settings):
         # Get data from `Redis` for page defined by `page_reference`.
-        redis_client = page_settings["redis_client"]
-        page_reference = page_settings["page_reference"]
+        redis_client = page_settings.redis_client
+        page_reference = page_settings.page_reference
 
         try:
-            data = redis_client.get(page_reference)
-            data = json.loads(data)
-        except (IndexError, RedisError, TypeError):
+            try:
+                return cls._parse_data(redis_client.hmget(page_reference, FIELDS))
+            except ResponseError:
+                # Lock stored by older versions is JSON string.
+                return cls._parse_legacy_data(redis_client.get(page_reference))
+        except (IndexError, RedisError, TypeError, ValueError):
             return None
 
-        data_to_return = {}
-        for parameter_name, parameter_value in data.items():
-            # Return parameters `locked_at` and `locked_out` as
-            # `datetime.datetime` instances.
-            if parameter_name in ["locked_at", "locked_out"]:
-                parameter_value = datetime.datetime.strptime(
-                    parameter_value, "%Y-%m-%d-%H-%M-%S"
+    @classmethod
+    @measure_operation
+    def get_data_many(cls, pages_settings):
+        # Get data of all pages by one `MGET`.
+        if not pages_settings:
+            return []
+
+        redis_client = pages_settings[0].redis_client
+        page_references = [i.page_reference for i in pages_settings]
+
+        # All pages are read by one round trip.
+        pipeline = redis_client.pipeline(transaction=False)
+        for page_reference in page_references:
+            pipeline.hmget(page_reference, FIELDS)
+
+        try:
+            pages_values = pipeline.execute(raise_on_error=False)
+            legacy_references = cls._get_legacy_references(
+                page_references, pages_values
+            )
+            legacy_data = {}
+            if legacy_references:
+                legacy_data = dict(
+                    zip(legacy_references, redis_client.mget(legacy_references))
                 )
-            data_to_return.update({parameter_name: parameter_value})
+        except RedisError:
+            return [None] * len(page_references)
 
-        return data_to_return
+        return cls._parse_data_many(page_references, pages_values, legacy_data)
 
     @classmethod
-    def set_data(cls, page_settings, data):
-        page_reference = page_settings["page_reference"]
-        redis_client = page_settings["redis_client"]
+    @measure_operation
+    def get_user_data(cls, user_reference):
+        # Pages of the set not locked by the user anymore (e.g. their locks
+        # were expired by other users) are removed from the set.
+        redis_client = cls._get_redis_client()
+        user_key = cls._get_user_key(user_reference)
+        page_references = sorted(
+            cls._to_str(i) for i in redis_client.smembers(user_key)
+        )
+        if not page_references:
+            return []
 
-        data_to_store = {}
-        for parameter_name, parameter_value in data.items():
-            # Store `datetime.datetime` data in string format in Redis.
-            if parameter_name in ["locked_at", "locked_out"]:
-                parameter_value = parameter_value.strftime("%Y-%m-%d-%H-%M-%S")
+        pipeline = redis_client.pipeline(transaction=False)
+        for page_reference in page_references:
+            pipeline.hmget(page_reference, USER_FIELDS)
+        pages_values = pipeline.execute(raise_on_error=False)
 
-            data_to_store.update({parameter_name: parameter_value})
+        users_data = []
+        removed_references = []
+        for page_reference, values in zip(page_references, pages_values):
+            data = None
+            if not isinstance(values, ResponseError):
+                data = cls._parse_page_data(page_reference, values)
+            if data is None or data["user_reference"] != user_reference:
+                removed_references.append(page_reference)
+                continue
 
-        try:
-            redis_client.set(
-                page_reference,
-                json.dumps(data_to_store),
-                TIMEOUT,  # This deactives old records.
+            users_data.append(data)
+
+        if removed_references:
+            redis_client.srem(user_key, *removed_references)
+
+        return users_data
+
+    @classmethod
+    def publish_event(cls, page_settings, event, locked_by=None):
+        # Lock operations of this model publish their events by Lua scripts.
+        if not ENABLE_EVENTS:
+            return
+
+        page_settings.redis_client.publish(
+            cls._get_events_channel(page_settings),
+            json.dumps({"event": event, "locked_by": locked_by}),
+        )
+
+    @classmethod
+    @measure_operation
+    def refresh(cls, page_settings, stale_before=None):
+        found, data = cls._get_cached_refresh_data(page_settings, stale_before)
+        if found:
+            return data
+
+        generation = cls._get_cache_generation()
+        values = cls._run_script(
+            page_settings,
+            REFRESH_SCRIPT,
+            cls._get_refresh_args(page_settings, stale_before),
+        )
+
+        data = cls._parse_data(values)
+        cls._set_cached_data(page_settings, data, generation)
+
+        return data
+
+    @classmethod
+    @measure_operation
+    def release(cls, page_settings, token=None):
+        is_locked = cls._run_script(
+            page_settings, RELEASE_SCRIPT, cls._get_release_args(page_settings, token)
+        )
+        cls.invalidate_cached_data(page_settings)
+
+        return bool(is_locked)
+
+    @classmethod
+    @measure_operation
+    def release_user_locks(cls, user_reference):
+        # Locks of all pages of the set are released by one pipeline of
+        # scripts, pages locked by other users are skipped.
+        redis_client = cls._get_redis_client()
+        user_key = cls._get_user_key(user_reference)
+        page_references = sorted(
+            cls._to_str(i) for i in redis_client.smembers(user_key)
+        )
+        if not page_references:
+            return 0
+
+        script = cls._get_script(redis_client, RELEASE_USER_SCRIPT)
+        pipeline = redis_client.pipeline(transaction=False)
+        for page_reference in page_references:
+            script(
+                keys=[page_reference],
+                args=cls._get_release_user_args(page_reference, user_reference),
+                client=pipeline,
             )
+        pipeline.delete(user_key)
+        results = pipeline.execute(raise_on_error=False)[:-1]
+
+        count = 0
+        data_cache = cls._get_data_cache()
+        for page_reference, result in zip(page_references, results):
+            if isinstance(result, NoScriptError):
+                # Pipeline of Redis Cluster doesn't load scripts.
+                result = script(
+                    keys=[page_reference],
+                    args=cls._get_release_user_args(page_reference, user_reference),
+                    client=redis_client,
+                )
+            elif isinstance(result, Exception):
+                raise result
+
+            if result:
+                count += 1
+                if data_cache is not None:
+                    cls._invalidate_cache_key(data_cache, page_reference)
+
+        return count
+
+    @classmethod
+    @measure_operation
+    def scan_data(cls, cursor="0", count=100):
+        """
+        Returns tuple `(cursor, data)` of locks found by one `SCAN` from
+        `cursor` (`count` is its hint of number of keys), so locks are listed
+        without blocking `Redis`. Scan starts by cursor `"0"` and ends when
+        returned cursor is `"0"`, data of one scan might be empty. Data
+        contain also `page_reference`, `url` and `url_parameters` (`None` for
+        locks stored by older versions).
+        """
+        cursor, redis_client, page_references = cls._scan_page_references(cursor, count)
+        if not page_references:
+            return cursor, []
+
+        # Locks are read by one round trip, locks stored by older versions
+        # by another one.
+        pipeline = redis_client.pipeline(transaction=False)
+        for page_reference in page_references:
+            pipeline.hmget(page_reference, USER_FIELDS)
+        pages_values = pipeline.execute(raise_on_error=False)
+
+        legacy_references = cls._get_legacy_references(page_references, pages_values)
+        legacy_data = {}
+        if legacy_references:
+            pipeline = redis_client.pipeline(transaction=False)
+            for page_reference in legacy_references:
+                pipeline.get(page_reference)
+            legacy_data = dict(zip(legacy_references, pipeline.execute()))
+
+        pages_data = []
+        for page_reference, values in zip(page_references, pages_values):
+            if page_reference in legacy_data:
+                data = cls._parse_legacy_data(legacy_data[page_reference])
+                if data is not None:
+                    data.update(
+                        page_reference=page_reference, url=None, url_parameters=None
+                    )
+            else:
+                data = cls._parse_page_data(page_reference, values)
+
+            # Lock was deleted after it was scanned.
+            if data is not None:
+                pages_data.append(data)
+
+        return cursor, pages_data
+
+    @classmethod
+    @measure_operation
+    def set_data(cls, page_settings, data):
+        page_reference = page_settings.page_reference
+        redis_client = page_settings.redis_client
+
+        pipeline = redis_client.pipeline(transaction=True)
+        pipeline.delete(page_reference)
+        pipeline.hset(page_reference, mapping=cls._get_stored_data(data))
+        # This deactives old records.
+        pipeline.expire(page_reference, page_settings.policy.timeout)
+
+        try:
+            pipeline.execute()
         except RedisError:
             raise
+
+        cls.invalidate_cached_data(page_settings)
+
+    @classmethod
+    def subscribe_events(cls, page_settings):
+        # Subscription holds its own connection of the pool until it is closed.
+        return RedisSubscription(
+            page_settings.redis_client,
+            cls._get_events_channel(page_settings),
+            "__keyspace@{}__:{}".format(
+                cls._get_redis_settings().db, page_settings.page_reference
+            ),
+        )
+
+    @classmethod
+    @measure_operation
+    def touch(cls, page_settings, token, stale_before=None):
+        return bool(
+            cls._run_script(
+                page_settings,
+                TOUCH_SCRIPT,
+                cls._get_touch_args(page_settings, token, stale_before),
+            )
+        )
@@ -0,0 +1,131 @@
+from __future__ import unicode_literals
+
+from admin_page_lock.policies import get_page_policy
+from admin_page_lock.settings import MESSAGES
+
+# Value of a setting that has not been computed yet.
+UNSET = object()
+
+
+class lazy_setting(object):
+    """
+    Computes value of `PageSettings` attribute on the first access and
+    stores it in slot `_<name>`.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.slot = "_{}".format(function.__name__)
+        self.__doc__ = function.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        value = getattr(instance, self.slot)
+        if value is UNSET:
+            value = self.function(instance)
+            object.__setattr__(instance, self.slot, value)
+
+        return value
+
+
+class PageSettings(object):
+    """
+    Settings of the page shared by all handler calls of one request. Values
+    are computed lazily (request data are parsed only once) and can't be
+    changed. Models can add their own settings by subclassing this class and
+    setting `page_settings_class`.
+
+    Settings can be read as attributes or as dictionary items.
+    """
+
+    __slots__ = (
+        "model_class",
+        "req",
+        "_lock_token",
+        "_messages",
+        "_page_full_url",
+        "_page_url",
+        "_page_url_parameters",
+        "_policy",
+        "_post_data",
+        "_user_reference",
+    )
+
+    def __init__(self, model_class, req, page_full_url=None):
+        object.__setattr__(self, "model_class", model_class)
+        object.__setattr__(self, "req", req)
+
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if slot.startswith("_"):
+                    object.__setattr__(self, slot, UNSET)
+
+        if page_full_url is not None:
+            object.__setattr__(self, "_page_full_url", page_full_url)
+
+    @classmethod
+    def for_page(cls, model_class, page_url, page_url_parameters):
+        """
+        Returns settings of stored page without request, e.g. to publish
+        events of locks released by `release_user_locks`.
+        """
+        page_settings = cls(model_class, None)
+        object.__setattr__(page_settings, "_page_url", page_url)
+        object.__setattr__(page_settings, "_page_url_parameters", page_url_parameters)
+
+        return page_settings
+
+    def __contains__(self, name):
+        return hasattr(self, name)
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Page settings can't be changed.")
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    @lazy_setting
+    def lock_token(self):
+        """Fencing token of the lock posted by JavaScript or `None`."""
+        try:
+            return int(self.post_data["lock_token"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @lazy_setting
+    def messages(self):
+        return {i: str(j) for i, j in MESSAGES.items()}
+
+    @lazy_setting
+    def page_full_url(self):
+        return self.model_class._get_page_full_url(self.req, self.post_data)
+
+    @lazy_setting
+    def page_url(self):
+        return self.model_class._get_page_url(self.req, self.page_full_url)
+
+    @lazy_setting
+    def page_url_parameters(self):
+        return self.model_class._get_page_url_parameters(self.req, self.page_full_url)
+
+    @lazy_setting
+    def policy(self):
+        """`PagePolicy` of the page given by `PAGE_LOCK_POLICIES`."""
+        return get_page_policy(self.page_url)
+
+    @lazy_setting
+    def post_data(self):
+        """Data posted by JavaScript (empty for Django views)."""
+        return self.model_class._get_post_data(self.req)
+
+    @lazy_setting
+    def user_reference(self):
+        return self.model_class._get_user_reference(self.req)
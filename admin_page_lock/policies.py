@@ -0,0 +1,67 @@
+from __future__ import unicode_literals
+
+import re
+from collections import namedtuple
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import ugettext_lazy as _
+
+from admin_page_lock.settings import (
+    API_INTERVAL,
+    DISABLE,
+    HANDLER_CLASS,
+    MODEL,
+    POLICIES,
+    TIMEOUT,
+)
+
+PagePolicy = namedtuple(
+    "PagePolicy", ["api_interval", "disable", "handler_class", "model", "timeout"]
+)
+
+# Policy of pages not matching any pattern of `PAGE_LOCK_POLICIES`.
+DEFAULT_POLICY = PagePolicy(API_INTERVAL, DISABLE, HANDLER_CLASS, MODEL, TIMEOUT)
+
+
+def compile_policies(policies):
+    """
+    Returns list of tuples `(regular expression, PagePolicy)` of `policies`.
+    Policies are list of tuples `(pattern, settings)` where `settings` can
+    re-define `API_INTERVAL`, `DISABLE`, `HANDLER_CLASS`, `MODEL` and
+    `TIMEOUT`. The first matching pattern wins.
+    """
+    page_policies = []
+
+    for i, (pattern, policy_settings) in enumerate(policies):
+        # Every pattern is compiled on its own, so patterns of different
+        # policies can use the same group names, backreferences and flags.
+        try:
+            regex = re.compile(pattern)
+            page_policy = DEFAULT_POLICY._replace(
+                **{j.lower(): k for j, k in policy_settings.items()}
+            )
+        except (re.error, ValueError) as e:
+            raise ImproperlyConfigured(
+                _('Page lock policy {} "{}" is not valid: {}').format(i, pattern, e)
+            )
+
+        page_policies.append((regex, page_policy))
+
+    return page_policies
+
+
+_page_policies = compile_policies(POLICIES)
+
+
+def get_page_policies():
+    """Returns default `PagePolicy` and policies of `PAGE_LOCK_POLICIES`."""
+    return [DEFAULT_POLICY] + [i for _, i in _page_policies]
+
+
+def get_page_policy(page_url):
+    """Returns `PagePolicy` of page given by `page_url`."""
+    for regex, page_policy in _page_policies:
+        if regex.match(page_url):
+            return page_policy
+
+    return DEFAULT_POLICY
@@ -8,6 +8,12 @@ API_INTERVAL_DEFAULT = 30000  # [ms]
 API_INTERVAL_REFERENCE = "PAGE_LOCK_API_INTERVAL"
 API_INTERVAL = getattr(settings, API_INTERVAL_REFERENCE, API_INTERVAL_DEFAULT)
 
+# Cache of `CachePageLockModel`.
+CACHE_ALIAS_DEFAULT = "default"
+CACHE_ALIAS_REFERENCE = "PAGE_LOCK_CACHE_ALIAS"
+CACHE_ALIAS = getattr(settings, CACHE_ALIAS_REFERENCE, CACHE_ALIAS_DEFAULT)
+CACHE_PREFIX = "lock-page"
+
 # User can open same page in more then one tabs.
 CAN_OPEN_MORE_TABS_DEFAULT = True
 CAN_OPEN_MORE_TABS_REFERENCE = "PAGE_LOCK_CAN_OPEN_MORE_TABS"
@@ -15,6 +21,16 @@ CAN_OPEN_MORE_TABS = getattr(
     settings, CAN_OPEN_MORE_TABS_REFERENCE, CAN_OPEN_MORE_TABS_DEFAULT
 )
 
+# Process-local cache of lock data (see documentation).
+DATA_CACHE_SIZE_DEFAULT = 0  # [pages], `0` disables the cache
+DATA_CACHE_SIZE_REFERENCE = "PAGE_LOCK_DATA_CACHE_SIZE"
+DATA_CACHE_SIZE = getattr(settings, DATA_CACHE_SIZE_REFERENCE, DATA_CACHE_SIZE_DEFAULT)
+DATA_CACHE_TIMEOUT_DEFAULT = 5  # [s]
+DATA_CACHE_TIMEOUT_REFERENCE = "PAGE_LOCK_DATA_CACHE_TIMEOUT"
+DATA_CACHE_TIMEOUT = getattr(
+    settings, DATA_CACHE_TIMEOUT_REFERENCE, DATA_CACHE_TIMEOUT_DEFAULT
+)
+
 # CRFS token.
 DISABLE_CRSF_TOKEN_DEFAULT = False
 DISABLE_CRSF_TOKEN_REFERENCE = "PAGE_LOCK_DISABLE_CRSF_TOKEN"
@@ -27,6 +43,17 @@ DISABLE_DEFAULT = False
 DISABLE_REFERENCE = "PAGE_LOCK_DISABLE"
 DISABLE = getattr(settings, DISABLE_REFERENCE, DISABLE_DEFAULT)
 
+# Push lock events to pages by Server-Sent Events (polling is a fallback).
+ENABLE_EVENTS_DEFAULT = False
+ENABLE_EVENTS_REFERENCE = "PAGE_LOCK_ENABLE_EVENTS"
+ENABLE_EVENTS = getattr(settings, ENABLE_EVENTS_REFERENCE, ENABLE_EVENTS_DEFAULT)
+
+# Collect metrics of handler functions and model operations (see
+# documentation).
+ENABLE_METRICS_DEFAULT = False
+ENABLE_METRICS_REFERENCE = "PAGE_LOCK_ENABLE_METRICS"
+ENABLE_METRICS = getattr(settings, ENABLE_METRICS_REFERENCE, ENABLE_METRICS_DEFAULT)
+
 # Enable fail check of MAX_FAILED_CHECK.
 ENABLE_FAILED_CHECK_DEFAULT = False
 ENABLE_FAILED_CHECK_REFERENCE = "PAGE_LOCK_ENABLE_FAILED_CHECK"
@@ -34,26 +61,69 @@ ENABLE_FAILED_CHECK = getattr(
     settings, ENABLE_FAILED_CHECK_REFERENCE, ENABLE_FAILED_CHECK_DEFAULT
 )
 
+# Lock events (see `BasePageLockModel.publish_event`).
+EVENT_ACQUIRED = "acquired"
+EVENT_EXPIRED = "expired"
+EVENT_RELEASED = "released"
+
+# Event stream (see documentation).
+EVENTS_KEEPALIVE_DEFAULT = 15  # [s]
+EVENTS_KEEPALIVE_REFERENCE = "PAGE_LOCK_EVENTS_KEEPALIVE"
+EVENTS_KEEPALIVE = getattr(
+    settings, EVENTS_KEEPALIVE_REFERENCE, EVENTS_KEEPALIVE_DEFAULT
+)
+EVENTS_MAX_AGE_DEFAULT = 300  # [s]
+EVENTS_MAX_AGE_REFERENCE = "PAGE_LOCK_EVENTS_MAX_AGE"
+EVENTS_MAX_AGE = getattr(settings, EVENTS_MAX_AGE_REFERENCE, EVENTS_MAX_AGE_DEFAULT)
+EVENTS_MAX_STREAMS_DEFAULT = 100
+EVENTS_MAX_STREAMS_REFERENCE = "PAGE_LOCK_EVENTS_MAX_STREAMS"
+EVENTS_MAX_STREAMS = getattr(
+    settings, EVENTS_MAX_STREAMS_REFERENCE, EVENTS_MAX_STREAMS_DEFAULT
+)
+
 # Handler.
 HANDLER_CLASS_DEFAULT = "admin_page_lock.handlers.PageLockHandler"
 HANDLER_CLASS_REFERENCE = "PAGE_LOCK_HANDLER_CLASS"
 HANDLER_CLASS = getattr(settings, HANDLER_CLASS_REFERENCE, HANDLER_CLASS_DEFAULT)
 
 # Handler functions:
+HANDLER_FUNCTION_ACLOSE_PAGE_CONNECTION = "aclose_page_connection"
+HANDLER_FUNCTION_AGET_PAGE_INFO = "aget_page_info"
+HANDLER_FUNCTION_AOPEN_PAGE_CONNECTION = "aopen_page_connection"
 HANDLER_FUNCTION_CLOSE_PAGE_CONNECTION = "close_page_connection"
+HANDLER_FUNCTION_GET_PAGE_EVENTS = "get_page_events"
 HANDLER_FUNCTION_GET_PAGE_INFO = "get_page_info"
+HANDLER_FUNCTION_GET_PAGES_INFO = "get_pages_info"
+HANDLER_FUNCTION_HEARTBEAT = "heartbeat"
 HANDLER_FUNCTION_OPEN_PAGE_CONNECTION = "open_page_connection"
 
+# Time history of locks (see KEEP_DB_LOCKS) is kept for.
+HISTORY_RETENTION_DEFAULT = None  # [s], `None` keeps history forever
+HISTORY_RETENTION_REFERENCE = "PAGE_LOCK_HISTORY_RETENTION"
+HISTORY_RETENTION = getattr(
+    settings, HISTORY_RETENTION_REFERENCE, HISTORY_RETENTION_DEFAULT
+)
+
 # Home page redirect.
 HOMEPAGE_DEFAULT = "/"
 HOMEPAGE_REFERENCE = "PAGE_LOCK_HOMEPAGE"
 HOMEPAGE = getattr(settings, HOMEPAGE_REFERENCE, HOMEPAGE_DEFAULT)
 
+# Hooks called around phases of handler functions (see documentation).
+HOOKS_DEFAULT = []
+HOOKS_REFERENCE = "PAGE_LOCK_HOOKS"
+HOOKS = getattr(settings, HOOKS_REFERENCE, HOOKS_DEFAULT)
+
 # Keep DB locks (possible to see history).
 KEEP_DB_LOCKS_DEFAULT = False
 KEEP_DB_LOCKS_REFERENCE = "PAGE_LOCK_KEEP_DB_LOCKS"
 KEEP_DB_LOCKS = getattr(settings, KEEP_DB_LOCKS_REFERENCE, KEEP_DB_LOCKS_DEFAULT)
 
+# Lock acquisition results (see `BasePageLockModel.acquire`).
+LOCK_ACQUIRED = "acquired"
+LOCK_DENIED = "denied"
+LOCK_REACQUIRED = "reacquired"
+
 # Max number of API_INTERVAL checks fail before removing lock.
 MAX_FAILED_CHECK_DEFAULT = 2  # [Positive int]
 MAX_FAILED_CHECK_REFERENCE = "PAGE_LOCK_MAX_FAILED_CHECK"
@@ -73,6 +143,50 @@ MESSAGES_DEFAUL = {
 MESSAGES_REFERENCE = "PAGE_LOCK_MESSAGES"
 MESSAGES = getattr(settings, MESSAGES_REFERENCE, MESSAGES_DEFAUL)
 
+# Metrics (see documentation).
+METRICS_BACKEND_DEFAULT = "admin_page_lock.metrics.Metrics"
+METRICS_BACKEND_REFERENCE = "PAGE_LOCK_METRICS_BACKEND"
+METRICS_BACKEND = getattr(settings, METRICS_BACKEND_REFERENCE, METRICS_BACKEND_DEFAULT)
+METRICS_BUCKETS_DEFAULT = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)  # [s]
+METRICS_BUCKETS_REFERENCE = "PAGE_LOCK_METRICS_BUCKETS"
+METRICS_BUCKETS = getattr(settings, METRICS_BUCKETS_REFERENCE, METRICS_BUCKETS_DEFAULT)
+METRICS_TOKEN_DEFAULT = None  # staff users only
+METRICS_TOKEN_REFERENCE = "PAGE_LOCK_METRICS_TOKEN"
+METRICS_TOKEN = getattr(settings, METRICS_TOKEN_REFERENCE, METRICS_TOKEN_DEFAULT)
+
+# Policies of pages matching URL patterns (see documentation).
+POLICIES_DEFAULT = []
+POLICIES_REFERENCE = "PAGE_LOCK_POLICIES"
+POLICIES = getattr(settings, POLICIES_REFERENCE, POLICIES_DEFAULT)
+
+# Polling (see documentation).
+POLL_BACKPRESSURE_DEFAULT = 1.0  # [multiple of API_INTERVAL]
+POLL_BACKPRESSURE_REFERENCE = "PAGE_LOCK_POLL_BACKPRESSURE"
+POLL_BACKPRESSURE = getattr(
+    settings, POLL_BACKPRESSURE_REFERENCE, POLL_BACKPRESSURE_DEFAULT
+)
+POLL_JITTER_DEFAULT = 0.1  # [fraction of interval]
+POLL_JITTER_REFERENCE = "PAGE_LOCK_POLL_JITTER"
+POLL_JITTER = getattr(settings, POLL_JITTER_REFERENCE, POLL_JITTER_DEFAULT)
+POLL_MAX_INTERVAL_DEFAULT = 300000  # [ms]
+POLL_MAX_INTERVAL_REFERENCE = "PAGE_LOCK_POLL_MAX_INTERVAL"
+POLL_MAX_INTERVAL = getattr(
+    settings, POLL_MAX_INTERVAL_REFERENCE, POLL_MAX_INTERVAL_DEFAULT
+)
+
 # Times (see documentation).
 TIMEOUT_DEFAULT = 6000  # [s]
 TIMEOUT_REFERENCE = "PAGE_LOCK_TIMEOUT"
@@ -83,6 +197,12 @@ MODEL_DEFAULT = "admin_page_lock.models.database_model.DatabasePageLockModel"
 MODEL_REFERENCE = "PAGE_LOCK_MODEL"
 MODEL = getattr(settings, MODEL_REFERENCE, MODEL_DEFAULT)
 
+# Deactivate abandoned locks found by requests (otherwise they are left to
+# `reap_page_locks` command).
+REAP_ON_REQUEST_DEFAULT = True
+REAP_ON_REQUEST_REFERENCE = "PAGE_LOCK_REAP_ON_REQUEST"
+REAP_ON_REQUEST = getattr(settings, REAP_ON_REQUEST_REFERENCE, REAP_ON_REQUEST_DEFAULT)
+
 # Redis.
 REDIS_PREFIX = "lock-page"
 REDIS_SETTINGS_DEFAULT = {
@@ -90,10 +210,25 @@ REDIS_SETTINGS_DEFAULT = {
     "port": 6379,
     "password": "",
     "timeout": 5,
+    "db": 0,
+    "max_connections": None,  # unlimited
+    "unix_socket_path": None,  # `host` and `port` are used when not defined
+    "health_check_interval": 0,  # [s]
+    "sentinels": None,  # `(host, port)` of Redis Sentinels used instead of `host`
+    "sentinel_password": None,
+    "service_name": "mymaster",  # primary monitored by Redis Sentinels
+    "startup_nodes": None,  # `(host, port)` of Redis Cluster nodes
 }
 REDIS_SETTINGS_REFERENCE = "PAGE_LOCK_REDIS_SETTINGS"
 REDIS_SETTINGS = getattr(settings, REDIS_SETTINGS_REFERENCE, REDIS_SETTINGS_DEFAULT)
 
+# Release all locks of user logging out (see documentation).
+RELEASE_ON_LOGOUT_DEFAULT = True
+RELEASE_ON_LOGOUT_REFERENCE = "PAGE_LOCK_RELEASE_ON_LOGOUT"
+RELEASE_ON_LOGOUT = getattr(
+    settings, RELEASE_ON_LOGOUT_REFERENCE, RELEASE_ON_LOGOUT_DEFAULT
+)
+
 # Url.
 URL_IGNORE_PARAMETERS_DEFAULT = True
 URL_IGNORE_PARAMETERS_REFERENCE = "PAGE_LOCK_URL_IGNORE_PARAMETERS"
@@ -0,0 +1,23 @@
+from __future__ import unicode_literals
+
+import logging
+
+from admin_page_lock.utils import get_page_lock_classes, release_user_page_locks
+
+logger = logging.getLogger(__name__)
+
+
+def release_page_locks_on_logout(sender, request, user, **kwargs):
+    """
+    Receiver of `user_logged_out` releasing all locks of the user, so other
+    users don't wait for `TIMEOUT` (see `RELEASE_ON_LOGOUT`).
+    """
+    if request is None or user is None:
+        return
+
+    # User is logged out even when storage of locks is not available.
+    _, model_class = get_page_lock_classes()
+    try:
+        release_user_page_locks(model_class._get_user_reference(request))
+    except Exception:
+        logger.exception("Locks of user logging out were not released.")
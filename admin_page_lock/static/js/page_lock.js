@@ -3,7 +3,10 @@ $(document).ready(function() {
     var api_interval = parseInt($('#page_lock_api_interval').val());
     var csrf_token;
     var data_to_process;
+    var event_source;
+    var events_connected = false;
     var locked_by_me;
+    var poll_interval;
     var user_reference;
     var messages;
 
@@ -105,12 +108,75 @@ $(document).ready(function() {
         return call_api(url);
     };
 
+    // Calls heartbeat API asynchronously, `callback` gets `null` when nothing
+    // has changed (status `204`), otherwise the same data as info API.
+    // Lock of current user is renewed by its fencing token (`lock_token`).
+    var call_heartbeat = function(callback) {
+        var url = get_base_url() + '/page_lock/heartbeat/';
+        var data = {
+            'url': encodeURIComponent(get_full_url()),
+            'user_reference': user_reference,
+            'locked_by': data_to_process.locked_by,
+            'lock_token': data_to_process.lock_token,
+        };
+
+        $.ajax({
+            method: 'POST',
+            url: url,
+            headers: {
+                'X-CSRFToken': csrf_token
+            },
+            data: JSON.stringify(data),
+            dataType: 'json',
+            success: function(response, status, xhr) {
+                callback(xhr.status == 204 ? null : response);
+            },
+            error: function() {
+                // Get data from info API (it warns user when it fails too).
+                callback(call_get_page_info_data());
+            }
+        });
+    };
+
     var call_open_page_connection = function() {
         var url = get_base_url() + '/page_lock/open_page_connection/';
 
         return call_api(url);
     };
 
+    // Subscribe to lock events of current page, polling is only a fallback
+    // while the stream is not connected.
+    var subscribe_events = function() {
+        if (!window.EventSource || !data_to_process.page_lock_settings.enable_events) {
+            return;
+        }
+
+        var url = get_base_url() + '/page_lock/get_page_events/?url=' +
+            encodeURIComponent(get_full_url());
+        var was_connected = false;
+
+        event_source = new EventSource(url);
+        event_source.onopen = function() {
+            // Events might be missed while the stream was reconnecting.
+            if (was_connected) {
+                data_to_process = call_get_page_info_data();
+                update_page(data_to_process);
+            }
+            events_connected = true;
+            was_connected = true;
+        };
+        event_source.onerror = function() {
+            events_connected = false;
+        };
+
+        ['acquired', 'expired', 'released'].forEach(function(event_name) {
+            event_source.addEventListener(event_name, function() {
+                data_to_process = call_get_page_info_data();
+                update_page(data_to_process);
+            });
+        });
+    };
+
     var update_page = function(data) {
         $('#page_lock_message_display').text(messages.message_locked);
 
@@ -143,25 +209,51 @@ $(document).ready(function() {
         }
     };
 
+    // Count down the counter when nothing has changed.
+    var update_counter = function() {
+        data_to_process.reconnect_in = Math.max(
+            data_to_process.reconnect_in - Math.round(poll_interval / 1000), 0
+        );
+    };
+
     var periodical_update = function() {
-        if (!data_to_process) {
-            // Initialize global values.
-            data_to_process = get_template_data();
-            csrf_token = data_to_process.page_lock_settings.csrf_token;
-            user_reference = data_to_process.page_lock_settings.user_reference;
-            locked_by_me = user_reference == data_to_process.locked_by;
-        } else {
-            // Get data from info API.
-            data_to_process = call_get_page_info_data();
+        // Changes of the lock are pushed by events when they are connected.
+        // User locking the page always calls heartbeat to renew the lock.
+        if (events_connected && user_reference != data_to_process.locked_by) {
+            update_counter();
+            update_page(data_to_process);
+            schedule_update();
+            return;
         }
-        update_page(data_to_process);
+
+        call_heartbeat(function(data) {
+            if (data) {
+                data_to_process = data;
+            } else {
+                update_counter();
+            }
+            update_page(data_to_process);
+            schedule_update();
+        });
     };
 
-    // Call `periodical_update` once and then every `api_interval` [ms].
-    template_data = get_template_data();
+    // Call `periodical_update` after interval given by the last response
+    // (`next_poll_in` [ms]), `api_interval` is used when it is not given.
+    // Next call is scheduled when the previous one is finished.
+    var schedule_update = function() {
+        poll_interval = data_to_process.next_poll_in || api_interval;
+        window.process_data_timeout = setTimeout(periodical_update, poll_interval);
+    };
 
-    periodical_update();
-    window.process_data_interval = setInterval(periodical_update, api_interval);
+    // Initialize global values, then schedule calls of `periodical_update`.
+    data_to_process = get_template_data();
+    csrf_token = data_to_process.page_lock_settings.csrf_token;
+    user_reference = data_to_process.page_lock_settings.user_reference;
+    locked_by_me = user_reference == data_to_process.locked_by;
+
+    update_page(data_to_process);
+    schedule_update();
+    subscribe_events();
 
     // Deactivate user leaving current page.
     $(window).on('beforeunload', function() {
@@ -170,8 +262,12 @@ $(document).ready(function() {
         var data = {
             'url': encodeURIComponent(get_full_url()),
             'user_reference': user_reference,
+            'lock_token': data_to_process.lock_token,
         };
         send_request(url, data, true);
-        clearInterval(window.process_data_interval);
+        clearTimeout(window.process_data_timeout);
+        if (event_source) {
+            event_source.close();
+        }
     });
 });
@@ -2,7 +2,16 @@ from __future__ import unicode_literals
 
 from django.conf.urls import url
 
-from admin_page_lock.views import ClosePageConnection, GetPageInfo, OpenPageConnection
+from admin_page_lock.views import (
+    ClosePageConnection,
+    GetMetrics,
+    GetPageEvents,
+    GetPageInfo,
+    GetPagesInfo,
+    GetRedisPageLocks,
+    Heartbeat,
+    OpenPageConnection,
+)
 
 urlpatterns = [
     # Close Page Connection.
@@ -11,10 +20,26 @@ urlpatterns = [
         ClosePageConnection.as_view(),
         name="page_lock_close_page_connection",
     ),
+    # Get Metrics.
+    url(r"^metrics/$", GetMetrics.as_view(), name="page_lock_metrics"),
+    # Get Page Events.
+    url(
+        r"^get_page_events/$", GetPageEvents.as_view(), name="page_lock_get_page_events"
+    ),
     # Get Page Info.
     url(
         r"^get_page_info/$", GetPageInfo.as_view(), name="page_lock_get_page_connection"
     ),
+    # Get Pages Info.
+    url(r"^get_pages_info/$", GetPagesInfo.as_view(), name="page_lock_get_pages_info"),
+    # Get Redis Page Locks.
+    url(
+        r"^redis_page_locks/$",
+        GetRedisPageLocks.as_view(),
+        name="page_lock_redis_page_locks",
+    ),
+    # Heartbeat.
+    url(r"^heartbeat/$", Heartbeat.as_view(), name="page_lock_heartbeat"),
     # Open Page Connection.
     url(
         r"^open_page_connection/$",
@@ -1,13 +1,28 @@
 from __future__ import unicode_literals
 
+import datetime
 import importlib
 
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 
-from admin_page_lock.settings import HANDLER_CLASS, MODEL
+from admin_page_lock.policies import get_page_policies
+from admin_page_lock.settings import (
+    ENABLE_FAILED_CHECK,
+    HANDLER_CLASS,
+    HISTORY_RETENTION,
+    MAX_FAILED_CHECK,
+    MODEL,
+)
+
+# Imported classes of `get_page_lock_class`.
+_page_lock_classes = {}
 
 
 def get_page_lock_class(class_path):
+    if class_path in _page_lock_classes:
+        return _page_lock_classes[class_path]
+
     module_name, class_name = class_path.rsplit(".", 1)
     try:
         module = importlib.import_module(module_name)
@@ -15,6 +30,8 @@ def get_page_lock_class(class_path):
     except (ImportError, AttributeError):
         raise
 
+    _page_lock_classes[class_path] = page_lock_class
+
     return page_lock_class
 
 
@@ -25,5 +42,89 @@ def get_page_lock_classes():
     return handler_class, model_class
 
 
+def get_page_lock_handler(req):
+    # Handler (and its page settings) is created only once per request and
+    # shared by all handler functions called during the request.
+    meta_name = "page_lock_handler"
+    if meta_name not in req.META:
+        # Handler and model are given by policy of current page.
+        _, model_class = get_page_lock_classes()
+        policy = model_class.get_page_settings(req).policy
+        handler_class = get_page_lock_class(policy.handler_class)
+        model_class = get_page_lock_class(policy.model)
+        req.META[meta_name] = handler_class(req, model_class)
+
+    return req.META[meta_name]
+
+
 def get_new_csrf_token(csfr_key_lenght):
     return get_random_string(csfr_key_lenght)
+
+
+def get_user_page_locks(user_reference):
+    """
+    Returns dictionary of model class used by policies and list of data of
+    locks held by user `user_reference` (see `get_user_data`).
+    """
+    users_data = {}
+    for model_path in sorted({i.model for i in get_page_policies()}):
+        model_class = get_page_lock_class(model_path)
+        users_data[model_class] = model_class.get_user_data(user_reference)
+
+    return users_data
+
+
+def prune_page_lock_history(batch_size=1000):
+    """
+    Deletes history of locks (see `KEEP_DB_LOCKS`) older than
+    `HISTORY_RETENTION` and returns number of deleted locks.
+    """
+    if HISTORY_RETENTION is None:
+        return 0
+
+    history_model_class = get_page_lock_class(
+        "admin_page_lock.models.database_model.DatabasePageLockHistoryModel"
+    )
+    archived_before = timezone.now() - datetime.timedelta(seconds=HISTORY_RETENTION)
+
+    return history_model_class.prune(archived_before, batch_size)
+
+
+def reap_page_locks(batch_size=1000):
+    """
+    Deactivates expired and abandoned locks of all models used by policies
+    and returns dictionary of model class and number of deactivated locks.
+    Call it periodically, e.g. by `reap_page_locks` command.
+    """
+    policies = get_page_policies()
+    now = timezone.now()
+
+    # Lock is abandoned when its page has not checked it for the longest
+    # interval of all policies.
+    stale_before = None
+    if ENABLE_FAILED_CHECK:
+        api_interval = max(i.api_interval for i in policies)
+        stale_before = now - datetime.timedelta(
+            seconds=(api_interval / 1000) * MAX_FAILED_CHECK
+        )
+
+    counts = {}
+    for model_path in sorted({i.model for i in policies}):
+        model_class = get_page_lock_class(model_path)
+        counts[model_class] = model_class.reap(now, stale_before, batch_size)
+
+    return counts
+
+
+def release_user_page_locks(user_reference):
+    """
+    Releases all locks held by user `user_reference` in all models used by
+    policies and returns dictionary of model class and number of released
+    locks, e.g. when session of the user is deleted.
+    """
+    counts = {}
+    for model_path in sorted({i.model for i in get_page_policies()}):
+        model_class = get_page_lock_class(model_path)
+        counts[model_class] = model_class.release_user_locks(user_reference)
+
+    return counts
@@ -1,28 +1,63 @@
 from __future__ import unicode_literals
 
+import asyncio
 import json
+from functools import update_wrapper
 
-from django.http import HttpResponse
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.utils.translation import ugettext_lazy as _
 from django.views.generic.base import View
 
+from admin_page_lock.events import EventStream, event_streams
+from admin_page_lock.metrics import CONTENT_TYPE, get_metrics
 from admin_page_lock.settings import (
+    ENABLE_EVENTS,
+    ENABLE_METRICS,
+    HANDLER_FUNCTION_ACLOSE_PAGE_CONNECTION,
+    HANDLER_FUNCTION_AGET_PAGE_INFO,
+    HANDLER_FUNCTION_AOPEN_PAGE_CONNECTION,
     HANDLER_FUNCTION_CLOSE_PAGE_CONNECTION,
+    HANDLER_FUNCTION_GET_PAGE_EVENTS,
     HANDLER_FUNCTION_GET_PAGE_INFO,
+    HANDLER_FUNCTION_GET_PAGES_INFO,
+    HANDLER_FUNCTION_HEARTBEAT,
     HANDLER_FUNCTION_OPEN_PAGE_CONNECTION,
+    METRICS_TOKEN,
 )
-from admin_page_lock.utils import get_page_lock_classes
+from admin_page_lock.policies import get_page_policies
+from admin_page_lock.utils import get_page_lock_class, get_page_lock_handler
+
+try:
+    from asgiref.sync import sync_to_async
+except ImportError:  # Django < 3.0
+    sync_to_async = None
+
+# Default and maximal number of locks of one page of `GetRedisPageLocks`.
+REDIS_PAGE_LOCKS_COUNT = 100
+REDIS_PAGE_LOCKS_MAX_COUNT = 1000
+
+# Number of `SCAN` calls filling one page of `GetRedisPageLocks`.
+REDIS_PAGE_LOCKS_SCANS = 10
 
 
 class BasePageView(View):
     HANDLER_FUNCTION = None
 
     def post(self, req, *args, **kwargs):
-        # Get and initialize handler.
-        # TODO(vstefka) type of handler can depend on current page as well.
         try:
-            # Get and initialize handler.
-            handler_class, model_class = get_page_lock_classes()
-            handler = handler_class(req, model_class)
+            # Get and initialize handler given by policy of current page.
+            handler = get_page_lock_handler(req)
 
             # Get and run handler function to get response data.
             handler_function = getattr(handler, self.HANDLER_FUNCTION)
@@ -31,6 +66,13 @@ class BasePageView(View):
             # Propagate error to django in order to be able to log it.
             raise e
 
+        return self._get_response(response_data)
+
+    def _get_response(self, response_data):
+        # Nothing has changed.
+        if response_data is None:
+            return HttpResponse(status=204)
+
         response = HttpResponse(
             json.dumps(response_data), content_type="application/json"
         )
@@ -38,6 +80,66 @@ class BasePageView(View):
         return response
 
 
+class AsyncBasePageView(BasePageView):
+    """
+    Runs asynchronous handler function (ASGI), so waiting for storage does
+    not block a thread when the model implements async functions.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super(AsyncBasePageView, cls).as_view(**initkwargs)
+
+        # Django < 4.1 does not recognize async class-based views.
+        if asyncio.iscoroutinefunction(view):
+            return view
+
+        async def async_view(*args, **kwargs):
+            response = view(*args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+            return response
+
+        return update_wrapper(async_view, view)
+
+    def _get_handler(self, req):
+        handler = get_page_lock_handler(req)
+        # User of the request is loaded from database, so it can't be done
+        # by the event loop.
+        handler.page_settings.user_reference
+
+        return handler
+
+    async def post(self, req, *args, **kwargs):
+        # Get and initialize handler given by policy of current page.
+        handler = await sync_to_async(self._get_handler)(req)
+
+        # Get and run handler function to get response data.
+        handler_function = getattr(handler, self.HANDLER_FUNCTION)
+        response_data = await handler_function(req, *args, **kwargs)
+
+        return self._get_response(response_data)
+
+
+class AsyncClosePageConnection(AsyncBasePageView):
+    """Async variant of `ClosePageConnection`."""
+
+    HANDLER_FUNCTION = HANDLER_FUNCTION_ACLOSE_PAGE_CONNECTION
+
+
+class AsyncGetPageInfo(AsyncBasePageView):
+    """Async variant of `GetPageInfo`."""
+
+    HANDLER_FUNCTION = HANDLER_FUNCTION_AGET_PAGE_INFO
+
+
+class AsyncOpenPageConnection(AsyncBasePageView):
+    """Async variant of `OpenPageConnection`."""
+
+    HANDLER_FUNCTION = HANDLER_FUNCTION_AOPEN_PAGE_CONNECTION
+
+
 class ClosePageConnection(BasePageView):
     """Call it when user is leaving the page.
 
@@ -50,6 +152,83 @@ class ClosePageConnection(BasePageView):
     HANDLER_FUNCTION = HANDLER_FUNCTION_CLOSE_PAGE_CONNECTION
 
 
+class GetMetrics(View):
+    """Scrape it by Prometheus to get metrics of current process.
+
+    It is available only when `ENABLE_METRICS == True`, to requests with
+    header `Authorization: Bearer <METRICS_TOKEN>` when `METRICS_TOKEN` is
+    set and to staff users otherwise.
+
+    RESPONSE:
+     + metrics of handler functions and model operations in Prometheus text
+       format (see `admin_page_lock.metrics`).
+    """
+
+    def _is_authorized(self, req):
+        if METRICS_TOKEN:
+            return constant_time_compare(
+                req.META.get("HTTP_AUTHORIZATION", ""),
+                "Bearer {}".format(METRICS_TOKEN),
+            )
+
+        user = getattr(req, "user", None)
+        return user is not None and user.is_active and user.is_staff
+
+    def get(self, req, *args, **kwargs):
+        if not ENABLE_METRICS:
+            raise Http404
+
+        if not self._is_authorized(req):
+            raise PermissionDenied
+
+        return HttpResponse(get_metrics().render(), content_type=CONTENT_TYPE)
+
+
+class GetPageEvents(View):
+    """Subscribe to it by `EventSource` to get lock events of the page.
+
+    It is available only when `ENABLE_EVENTS == True`, it returns status `204`
+    when the model of the page doesn't publish events to all processes or
+    when `EVENTS_MAX_STREAMS` streams are open in current process.
+
+    REQUEST:
+     + url                  url of locked page (with parameters) in GET.
+    RESPONSE (stream of Server-Sent Events):
+     + event                `acquired`, `expired` or `released`;
+     + data                 JSON of `event` and `locked_by`.
+    """
+
+    HANDLER_FUNCTION = HANDLER_FUNCTION_GET_PAGE_EVENTS
+
+    def get(self, req, *args, **kwargs):
+        if not ENABLE_EVENTS:
+            raise Http404
+
+        page_full_url = req.GET.get("url")
+        if not page_full_url:
+            return HttpResponseBadRequest()
+
+        handler = get_page_lock_handler(req)
+        handler_function = getattr(handler, self.HANDLER_FUNCTION)
+        events = handler_function(req, url=page_full_url)
+
+        # Every stream occupies one thread of the worker, so their number is
+        # limited by `EVENTS_MAX_STREAMS`. Status `204` stops reconnecting of
+        # `EventSource`, the page polls then.
+        if events is None or not event_streams.acquire():
+            return HttpResponse(status=204)
+
+        response = StreamingHttpResponse(
+            EventStream(events, event_streams.release),
+            content_type="text/event-stream",
+        )
+        # Events must not be cached or buffered by proxies.
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+
+        return response
+
+
 class GetPageInfo(BasePageView):
     """Call it when user comes to the page at the first time.
 
@@ -70,6 +249,117 @@ class GetPageInfo(BasePageView):
     HANDLER_FUNCTION = HANDLER_FUNCTION_GET_PAGE_INFO
 
 
+class GetPagesInfo(BasePageView):
+    """Call it to get lock information of more pages by one request.
+
+    REQUEST:
+     + csrf_token           CSRF token if `DISABLE_CRSF_TOKEN == True`;
+     + urls                 list of urls of locked pages (with parameters);
+     + user_reference       user reference asking for the pages.
+    RESPONSE:
+     + pages                dictionary of url and its `is_locked`, `locked_by`
+                            and `reconnect_in`.
+    """
+
+    HANDLER_FUNCTION = HANDLER_FUNCTION_GET_PAGES_INFO
+
+
+@method_decorator(staff_member_required, name="dispatch")
+class GetRedisPageLocks(View):
+    """Browse it as staff user to see live locks of `RedisPageLockModel`.
+
+    Locks are paged by cursor of `SCAN`, so listing of many locks never
+    blocks `Redis`. It is available only when a policy uses the model.
+
+    REQUEST (GET):
+     + count                number of locks of one page (at most 1000);
+     + cursor               cursor of the next page given by previous page;
+     + user_reference       shows only locks of the user.
+    RESPONSE (admin page):
+     + url, parameters, `locked_by`, `locked_at`, expiry (`locked_out`),
+       `last_checked`, number of tabs and fencing token of every lock.
+    """
+
+    template_name = "admin_page_lock/redis_page_locks.html"
+
+    def _get_count(self, req):
+        try:
+            count = int(req.GET.get("count", REDIS_PAGE_LOCKS_COUNT))
+        except ValueError:
+            count = REDIS_PAGE_LOCKS_COUNT
+
+        return min(max(count, 1), REDIS_PAGE_LOCKS_MAX_COUNT)
+
+    def _get_model_class(self):
+        # Model is imported only when it is used, it requires `redis`.
+        for model_path in sorted({i.model for i in get_page_policies()}):
+            model_class = get_page_lock_class(model_path)
+            if hasattr(model_class, "scan_data"):
+                return model_class
+
+        return None
+
+    def _scan_data(self, model_class, cursor, count):
+        # One scan might find no locks (e.g. keys of other apps), page is
+        # filled by more scans.
+        pages_data = []
+        for _ in range(REDIS_PAGE_LOCKS_SCANS):
+            cursor, data = model_class.scan_data(cursor, count)
+            pages_data.extend(data)
+            if cursor == "0" or len(pages_data) >= count:
+                break
+
+        return cursor, pages_data
+
+    def get(self, req, *args, **kwargs):
+        model_class = self._get_model_class()
+        if model_class is None:
+            raise Http404
+
+        user_reference = req.GET.get("user_reference", "")
+        if user_reference:
+            # Locks of the user are found by their index, not by `SCAN`.
+            cursor, pages_data = "0", model_class.get_user_data(user_reference)
+        else:
+            cursor, pages_data = self._scan_data(
+                model_class, req.GET.get("cursor", "0"), self._get_count(req)
+            )
+
+        context = dict(
+            admin.site.each_context(req),
+            count=self._get_count(req),
+            cursor=cursor,
+            pages_data=sorted(
+                pages_data, key=lambda i: (i["url"] or "", i["url_parameters"] or "")
+            ),
+            title=_("Page locks"),
+            user_reference=user_reference,
+        )
+
+        return render(req, self.template_name, context)
+
+
+class Heartbeat(BasePageView):
+    """Call it periodically instead of `GetPageInfo`.
+
+    It renews lock of the user locking the page and returns status `204`
+    when the lock is still held by `locked_by`, otherwise it returns the same
+    response as `GetPageInfo`.
+
+    REQUEST:
+     + csrf_token           CSRF token if `DISABLE_CRSF_TOKEN == True`;
+     + locked_by            `user_reference` locking the page known by page;
+     + url                  url of locked page (with parameters);
+     + user_reference       user reference visiting locked page.
+    RESPONSE (see `GetPageInfo`):
+     + is_locked            whether the page is locked (True/False);
+     + locked_by            `user_reference` that locked the page;
+     + reconnect_in         number of seconds when page might be available.
+    """
+
+    HANDLER_FUNCTION = HANDLER_FUNCTION_HEARTBEAT
+
+
 class OpenPageConnection(BasePageView):
     """Call it when user wants to open/reopen page connection.
 
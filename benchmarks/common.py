@@ -0,0 +1,92 @@
+"""Shared set up of benchmarks.
+
+Benchmarks use a temporary SQLite database by default. Another database
+can be used by environment variables `BENCHMARK_DB_ENGINE`,
+`BENCHMARK_DB_NAME`, `BENCHMARK_DB_USER`, `BENCHMARK_DB_PASSWORD`,
+`BENCHMARK_DB_HOST` and `BENCHMARK_DB_PORT`.
+"""
+
+from __future__ import print_function, unicode_literals
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def get_database_settings():
+    engine = os.environ.get("BENCHMARK_DB_ENGINE", "django.db.backends.sqlite3")
+    name = os.environ.get("BENCHMARK_DB_NAME")
+    if name is None and engine.endswith("sqlite3"):
+        name = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+
+    return {
+        "ENGINE": engine,
+        "NAME": name,
+        "USER": os.environ.get("BENCHMARK_DB_USER", ""),
+        "PASSWORD": os.environ.get("BENCHMARK_DB_PASSWORD", ""),
+        "HOST": os.environ.get("BENCHMARK_DB_HOST", ""),
+        "PORT": os.environ.get("BENCHMARK_DB_PORT", ""),
+    }
+
+
+def setup_django(**page_lock_settings):
+    """Configure Django with `admin_page_lock` and `PAGE_LOCK_*` settings."""
+    import django
+    from django.conf import settings
+
+    settings.configure(
+        DATABASES={"default": get_database_settings()},
+        INSTALLED_APPS=[
+            "django.contrib.auth",
+            "django.contrib.contenttypes",
+            "django.contrib.sessions",
+            "admin_page_lock",
+        ],
+        SECRET_KEY="benchmark",
+        USE_TZ=True,
+        **page_lock_settings
+    )
+    django.setup()
+
+
+def get_request(url, user_reference, path="/page_lock/", **data):
+    """Return request posted by `page_lock.js` for page `url`."""
+    from django.test import RequestFactory
+
+    data.update(url=url, user_reference=user_reference)
+
+    return RequestFactory().post(
+        path, data=json.dumps(data), content_type="application/x-www-form-urlencoded"
+    )
+
+
+def measure(function, iterations):
+    """Return list of durations [s] of `iterations` calls of `function`."""
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    return durations
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100.0 * (len(values) - 1))))
+
+    return values[index]
+
+
+def format_durations(durations):
+    """Return mean, p50 and p99 of `durations` in microseconds."""
+    return "mean {:>9.1f} us  p50 {:>9.1f} us  p99 {:>9.1f} us".format(
+        sum(durations) / len(durations) * 1e6,
+        percentile(durations, 50) * 1e6,
+        percentile(durations, 99) * 1e6,
+    )
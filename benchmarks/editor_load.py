@@ -0,0 +1,331 @@
+"""Throughput, latency and storage round trips under simulated editor load.
+
+Every open tab of a synthetic editor calls the views (or `PageLockHandler`
+directly by `--handler`) the same way as `page_lock.js`: `OpenPageConnection`
+when the page is opened, `Heartbeat` every `API_INTERVAL` (its response
+updates the tab when the lock has changed) and `ClosePageConnection` when the
+tab is closed, then the tab opens another page. Calls are simulated in order
+of their time (not waiting for it), so the results tell how much of one
+worker is needed by given number of tabs:
+
+    python benchmarks/editor_load.py --model database --tabs 2000
+    python benchmarks/editor_load.py --model redis --fakeredis --tabs 2000
+"""
+
+from __future__ import print_function, unicode_literals
+
+import argparse
+import heapq
+import json
+import random
+import threading
+import time
+
+from common import format_durations, get_request, percentile, setup_django
+
+MODELS = {
+    "cache": "admin_page_lock.models.cache_model.CachePageLockModel",
+    "database": "admin_page_lock.models.database_model.DatabasePageLockModel",
+    "memory": "admin_page_lock.models.memory_model.MemoryPageLockModel",
+    "redis": "admin_page_lock.models.redis_model.RedisPageLockModel",
+}
+CALLS = ["open", "heartbeat", "get_page_info", "close"]
+CACHE_METHODS = [
+    "add",
+    "decr",
+    "delete",
+    "delete_many",
+    "get",
+    "get_many",
+    "incr",
+    "set",
+    "set_many",
+    "touch",
+]
+
+
+class RoundTrips(object):
+    """Counts round trips to storage of the model, see `install`."""
+
+    def __init__(self):
+        self.count = 0
+        self._local = threading.local()
+
+    def _wrap(self, function):
+        # Nested calls (e.g. `get_many` implemented by `get`) are not counted.
+        def wrapper(*args, **kwargs):
+            depth = getattr(self._local, "depth", 0)
+            if not depth:
+                self.count += 1
+            self._local.depth = depth + 1
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._local.depth = depth
+
+        return wrapper
+
+    def install(self, model):
+        if model == "database":
+            from django.db import connection
+
+            def execute_wrapper(execute, sql, params, many, context):
+                self.count += 1
+                return execute(sql, params, many, context)
+
+            connection.execute_wrappers.append(execute_wrapper)
+        elif model == "redis":
+            # Every command and every pipeline is one round trip.
+            from redis.client import Pipeline, Redis
+
+            Redis.execute_command = self._wrap(Redis.execute_command)
+            Pipeline.execute = self._wrap(Pipeline.execute)
+        elif model == "cache":
+            from django.core.cache import caches
+
+            from admin_page_lock.settings import CACHE_ALIAS
+
+            cache = caches[CACHE_ALIAS]
+            for name in CACHE_METHODS:
+                setattr(cache, name, self._wrap(getattr(cache, name)))
+
+
+class Tab(object):
+    """Browser tab of an editor showing one page."""
+
+    def __init__(self, user_reference):
+        self.user_reference = user_reference
+        self.url = None
+        self.locked_by = None
+        self.lock_token = None
+        self.polls_left = 0
+
+
+class EditorLoad(object):
+    def __init__(self, args):
+        from django.utils.module_loading import import_string
+
+        from admin_page_lock.handlers import PageLockHandler
+        from admin_page_lock.views import (
+            ClosePageConnection,
+            GetPageInfo,
+            Heartbeat,
+            OpenPageConnection,
+        )
+
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.model_class = import_string(MODELS[args.model])
+        self.handler_class = PageLockHandler
+        self.views = {
+            "open": OpenPageConnection.as_view(),
+            "heartbeat": Heartbeat.as_view(),
+            "get_page_info": GetPageInfo.as_view(),
+            "close": ClosePageConnection.as_view(),
+        }
+        self.handler_functions = {
+            "open": "open_page_connection",
+            "heartbeat": "heartbeat",
+            "get_page_info": "get_page_info",
+            "close": "close_page_connection",
+        }
+        self.round_trips = RoundTrips()
+        self.durations = {i: [] for i in CALLS}
+        self.call_round_trips = {i: 0 for i in CALLS}
+        self.is_measured = False
+
+    def _call(self, name, tab, **data):
+        # Returns response data of the call (`None` for status `204`).
+        req = get_request(tab.url, tab.user_reference, **data)
+        round_trips = self.round_trips.count
+        start = time.perf_counter()
+
+        if self.args.handler:
+            handler = self.handler_class(req, self.model_class)
+            response_data = getattr(handler, self.handler_functions[name])(req)
+        else:
+            response = self.views[name](req)
+            response_data = (
+                json.loads(response.content) if response.status_code != 204 else None
+            )
+
+        if self.is_measured:
+            self.durations[name].append(time.perf_counter() - start)
+            self.call_round_trips[name] += self.round_trips.count - round_trips
+
+        return response_data
+
+    def _open(self, tab):
+        tab.url = "/admin/app/model/{}/change/".format(
+            self.random.randrange(self.args.pages)
+        )
+        tab.polls_left = int(self.random.expovariate(1.0 / self.args.visit_polls))
+        self._update(tab, self._call("open", tab))
+
+    def _poll(self, tab):
+        # Same as `periodical_update` of `page_lock.js`.
+        response_data = self._call(
+            "heartbeat", tab, locked_by=tab.locked_by, lock_token=tab.lock_token
+        )
+        if response_data is not None:
+            self._update(tab, response_data)
+
+    def _update(self, tab, response_data):
+        tab.locked_by = response_data["locked_by"]
+        tab.lock_token = response_data.get("lock_token")
+
+    def run(self):
+        args = self.args
+        tabs = [Tab("editor-{}".format(i % args.editors)) for i in range(args.tabs)]
+
+        # Tabs are opened before the measurement, their polls are spread
+        # over the first interval.
+        interval = args.api_interval / 1000.0
+        schedule = []
+        for index, tab in enumerate(tabs):
+            self._open(tab)
+            schedule.append((self.random.uniform(0, interval), index))
+        heapq.heapify(schedule)
+
+        self.round_trips.install(args.model)
+        self.is_measured = True
+        while schedule[0][0] < args.duration:
+            at, index = heapq.heappop(schedule)
+            tab = tabs[index]
+            if tab.polls_left > 0:
+                tab.polls_left -= 1
+                self._poll(tab)
+            else:
+                self._call("close", tab, lock_token=tab.lock_token)
+                self._open(tab)
+            heapq.heappush(schedule, (at + interval, index))
+
+    def report(self):
+        args = self.args
+        durations = [j for i in CALLS for j in self.durations[i]]
+        total = sum(durations)
+        required = args.tabs / (args.api_interval / 1000.0)
+
+        print(
+            "{} model, {} tabs of {} editors on {} pages, {} s simulated, "
+            "{}:".format(
+                args.model,
+                args.tabs,
+                args.editors,
+                args.pages,
+                args.duration,
+                "handler" if args.handler else "views",
+            )
+        )
+        for name in CALLS + ["all"]:
+            if name == "all":
+                call_durations, round_trips = durations, sum(
+                    self.call_round_trips.values()
+                )
+            else:
+                call_durations = self.durations[name]
+                round_trips = self.call_round_trips[name]
+            if not call_durations:
+                continue
+
+            print(
+                "  {:<14} {:>7} calls  {}  {:>5.2f} round trips/call".format(
+                    name,
+                    len(call_durations),
+                    format_durations(call_durations),
+                    round_trips / float(len(call_durations)),
+                )
+            )
+
+        print(
+            "  throughput {:.0f} calls/s (p99 {:.1f} us), polls of {} tabs need "
+            "{:.0f} calls/s, i.e. {:.1%} of one worker".format(
+                len(durations) / total,
+                percentile(durations, 99) * 1e6,
+                args.tabs,
+                required,
+                required * total / len(durations),
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", choices=sorted(MODELS), default="database")
+    parser.add_argument("--tabs", type=int, default=2000)
+    parser.add_argument("--editors", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument(
+        "--api-interval", type=int, default=30000, help="API_INTERVAL [ms]."
+    )
+    parser.add_argument("--duration", type=int, default=300, help="Simulated time [s].")
+    parser.add_argument(
+        "--visit-polls",
+        type=float,
+        default=20,
+        help="Mean number of polls before the tab opens another page.",
+    )
+    parser.add_argument(
+        "--data-cache-size", type=int, default=0, help="DATA_CACHE_SIZE."
+    )
+    parser.add_argument(
+        "--handler",
+        action="store_true",
+        help="Call handler functions instead of views.",
+    )
+    parser.add_argument("--redis-host", default="127.0.0.1")
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument(
+        "--fakeredis",
+        action="store_true",
+        help="Use in-process fakeredis instead of redis-server.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django(
+        # Locks must not be culled by the default limit of 300 keys.
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "OPTIONS": {"MAX_ENTRIES": 1000000},
+            }
+        },
+        PAGE_LOCK_MODEL=MODELS[args.model],
+        PAGE_LOCK_API_INTERVAL=args.api_interval,
+        PAGE_LOCK_DATA_CACHE_SIZE=args.data_cache_size,
+        PAGE_LOCK_REDIS_SETTINGS={
+            "host": args.redis_host,
+            "port": args.redis_port,
+            "password": "",
+            "timeout": 5,
+        },
+    )
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+    if args.model == "redis":
+        from admin_page_lock.models.redis_model import RedisPageLockModel
+
+        if args.fakeredis:
+            import fakeredis
+            from redis import ConnectionPool
+
+            server = fakeredis.FakeServer()
+            RedisPageLockModel._create_connection_pool = classmethod(
+                lambda cls: ConnectionPool(
+                    connection_class=fakeredis.FakeConnection, server=server
+                )
+            )
+
+        RedisPageLockModel._get_redis_client().flushdb()
+
+    editor_load = EditorLoad(args)
+    editor_load.run()
+    editor_load.report()
+
+
+if __name__ == "__main__":
+    main()
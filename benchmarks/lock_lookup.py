@@ -0,0 +1,152 @@
+"""Query plans and latency of lock lookups of `DatabasePageLockModel`.
+
+The table is filled with lock history (as kept by `PAGE_LOCK_KEEP_DB_LOCKS
+= True` before `0007`) and every lookup is measured with the original
+indexes (`0004`), with the partial unique index of active locks (`0005`),
+with the composite lookup index (`0006`) and with the history moved to
+`DatabasePageLockHistoryModel` (`0007`):
+
+    python benchmarks/lock_lookup.py --rows 10000 1000000
+"""
+
+from __future__ import print_function, unicode_literals
+
+import argparse
+import datetime
+
+from common import format_durations, get_request, measure, setup_django
+
+HISTORY_PER_PAGE = 10  # number of locks of every page
+ACTIVE_PAGE_STEP = 10  # every n-th page is locked right now
+BATCH_SIZE = 5000
+MIGRATIONS = [
+    ("original indexes", "0004_databasepagelockmodel_last_checked"),
+    ("unique active lock", "0005_databasepagelockmodel_unique_active_page_lock"),
+    ("lookup index", "0006_databasepagelockmodel_page_lock_lookup_idx"),
+    ("history table", "0007_databasepagelockhistorymodel"),
+]
+
+
+def get_page_url(page):
+    return "/admin/app/model/{}/change/".format(page)
+
+
+def get_user_reference(page):
+    return "editor-{}".format(page)
+
+
+def get_page_settings(model_class, page):
+    return model_class.get_page_settings(
+        get_request(get_page_url(page), get_user_reference(page))
+    )
+
+
+def populate(model_class, rows):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    pages = max(rows // HISTORY_PER_PAGE, 1)
+    page_locks = []
+
+    for i in range(rows):
+        page, version = i % pages, i // pages
+        locked_at = now - datetime.timedelta(minutes=HISTORY_PER_PAGE - version)
+        is_active = version == HISTORY_PER_PAGE - 1 and page % ACTIVE_PAGE_STEP == 0
+        page_locks.append(
+            model_class(
+                url=get_page_url(page),
+                url_parameters="",
+                active=is_active,
+                user_reference=get_user_reference(page),
+                locked_at=locked_at,
+                locked_out=(
+                    now + datetime.timedelta(hours=1)
+                    if is_active
+                    else locked_at + datetime.timedelta(seconds=30)
+                ),
+                last_checked=locked_at,
+                tab_counter=1,
+            )
+        )
+        if len(page_locks) == BATCH_SIZE:
+            model_class.objects.bulk_create(page_locks)
+            page_locks = []
+
+    model_class.objects.bulk_create(page_locks)
+
+    return pages
+
+
+def explain(model_class, page_settings):
+    from django.utils import timezone
+
+    query_kwargs = model_class._get_query_kwargs(page_settings)
+    querysets = [
+        (
+            "get_data / check_data",
+            model_class.objects.filter(
+                locked_out__gt=timezone.now(), **query_kwargs
+            ).order_by()[:1],
+        ),
+        ("deactivate", model_class.objects.filter(**query_kwargs).order_by()),
+    ]
+    for name, queryset in querysets:
+        print("  plan of {}:".format(name))
+        for line in queryset.explain().splitlines():
+            print("    {}".format(line))
+
+
+def benchmark(model_class, pages, iterations):
+    from django.utils import timezone
+
+    locked_page = get_page_settings(model_class, 0)
+    free_page = get_page_settings(model_class, 1)
+
+    def acquire_and_release():
+        now = timezone.now()
+        model_class.acquire(free_page, now, now + datetime.timedelta(seconds=60))
+        model_class.release(free_page)
+
+    calls = [
+        ("get_data (locked page)", lambda: model_class.get_data(locked_page)),
+        ("get_data (free page)", lambda: model_class.get_data(free_page)),
+        ("check_data", lambda: model_class.check_data(locked_page)),
+        ("refresh", lambda: model_class.refresh(locked_page)),
+        ("acquire + release", acquire_and_release),
+    ]
+    for name, call in calls:
+        call()  # warm up
+        print("  {:<24} {}".format(name, format_durations(measure(call, iterations))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000])
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    # Released locks are deleted, so the lookups see only the populated
+    # history, the migrations can be applied in any order.
+    setup_django()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    from admin_page_lock.models.database_model import DatabasePageLockModel
+
+    for rows in args.rows:
+        call_command("migrate", "admin_page_lock", "zero", verbosity=0)
+        call_command("migrate", "admin_page_lock", MIGRATIONS[0][1], verbosity=0)
+        pages = populate(DatabasePageLockModel, rows)
+
+        for name, migration in MIGRATIONS:
+            call_command("migrate", "admin_page_lock", migration, verbosity=0)
+            print(
+                "{} rows, {} pages, {}, {}:".format(
+                    rows, pages, connection.vendor, name
+                )
+            )
+            explain(DatabasePageLockModel, get_page_settings(DatabasePageLockModel, 0))
+            benchmark(DatabasePageLockModel, pages, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
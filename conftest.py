@@ -0,0 +1,30 @@
+from __future__ import unicode_literals
+
+import os
+
+import django
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+# Tests are `django.test` test cases, so `pytest` prepares Django the same way
+# as its test runner (see `runtests.py`).
+_old_config = None
+
+
+def pytest_configure(config):
+    global _old_config
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+    django.setup()
+
+    setup_test_environment()
+    _old_config = setup_databases(verbosity=0, interactive=False)
+
+
+def pytest_unconfigure(config):
+    teardown_databases(_old_config, verbosity=0)
+    teardown_test_environment()
@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+from __future__ import unicode_literals
+
+import os
+import sys
+
+import django
+from django.conf import settings
+from django.test.utils import get_runner
+
+# Run `python runtests.py [test labels]` (or `python -m pytest`).
+if __name__ == "__main__":
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+    django.setup()
+
+    test_runner = get_runner(settings)()
+    failures = test_runner.run_tests(sys.argv[1:] or ["tests"])
+
+    sys.exit(bool(failures))
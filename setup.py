@@ -36,27 +36,29 @@ setup(
         "Environment :: Web Environment",
         "Intended Audience :: Developers",
         "License :: OSI Approved :: Apache Software License",
-        "Framework :: Django :: 1.8",
-        "Framework :: Django :: 1.9",
-        "Framework :: Django :: 1.11",
-        "Framework :: Django :: 2.0",
-        "Programming Language :: Python :: 2.7",
+        "Framework :: Django :: 2.2",
+        "Framework :: Django :: 3.0",
+        "Framework :: Django :: 3.1",
+        "Framework :: Django :: 3.2",
         "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
+        "Programming Language :: Python :: 3.9",
         "Topic :: Software Development :: Libraries :: Python Modules",
     ],
     description="Page Lock application prevents users from editing "
     "a page while it is being edited by someone else. "
     "The application is tailored to django admin implementation.",
     include_package_data=True,
-    install_requires=[],
+    install_requires=["Django>=2.2"],
     keywords=["django", "admin", "locking", "concurrency"],
     license="Apache License, Version 2.0",
     long_description=get_file_contents("README.md"),
     long_description_content_type="text/markdown",
     name=get_module().NAME,
-    packages=find_packages(),
+    packages=find_packages(exclude=["tests"]),
     platforms=["any"],
+    python_requires=">=3.6",
     version=get_module().VERSION,
     url="https://github.com/ShowMax/django-admin-page-lock",
 )
@@ -0,0 +1,52 @@
+from __future__ import unicode_literals
+
+# Settings of tests, see `runtests.py` and `conftest.py`.
+SECRET_KEY = "admin-page-lock-tests"
+
+USE_TZ = True
+
+DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "locks": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "locks",
+    },
+}
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.messages",
+    "django.contrib.sessions",
+    "admin_page_lock",
+]
+
+MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+]
+
+ROOT_URLCONF = "tests.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+                "django.template.context_processors.request",
+            ]
+        },
+    }
+]
+
+# Locks are kept in memory of the test process, `CachePageLockModel` uses
+# cache `locks` and `RedisPageLockModel` fake `redis` (see `tests.utils`).
+PAGE_LOCK_CACHE_ALIAS = "locks"
+PAGE_LOCK_MODEL = "admin_page_lock.models.memory_model.MemoryPageLockModel"
@@ -0,0 +1,78 @@
+from __future__ import unicode_literals
+
+import datetime
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from admin_page_lock.models.cache_model import CachePageLockModel
+from admin_page_lock.settings import CACHE_ALIAS, LOCK_ACQUIRED, LOCK_DENIED
+from tests.utils import LockModelTestMixin, get_page_settings
+
+
+class CachePageLockModelTest(LockModelTestMixin, SimpleTestCase):
+    model_class = CachePageLockModel
+    releases_user_locks = False
+
+    def setUp(self):
+        super(CachePageLockModelTest, self).setUp()
+        caches[CACHE_ALIAS].clear()
+
+    def test_acquire_concurrent(self):
+        self._acquire("bob")
+
+        # Alice reads no lock, but `add` of her lock fails in every attempt.
+        with mock.patch.object(
+            CachePageLockModel, "_get_record", return_value=(None, None)
+        ):
+            result, _ = self._acquire("alice")
+        self.assertEqual(result, LOCK_DENIED)
+        self.assertEqual(self._get_data()["user_reference"], "bob")
+
+    def test_acquire_expired(self):
+        self.locked_out = self.now - datetime.timedelta(seconds=1)
+        self._acquire("alice")
+        self.assertIsNone(self._get_data())
+
+        self.locked_out = self.now + datetime.timedelta(hours=1)
+        result, data = self._acquire("bob")
+        self.assertEqual(result, LOCK_ACQUIRED)
+        self.assertEqual(data["user_reference"], "bob")
+
+    def test_acquire_expired_removed_meanwhile(self):
+        self._acquire("alice")
+        page_settings = get_page_settings(CachePageLockModel, "bob")
+        remove_expired = CachePageLockModel._remove_expired
+
+        # Another process removes the lock, so bob reads the page again.
+        def removed_meanwhile(page_settings, record):
+            remove_expired(page_settings, record)
+            return False
+
+        with mock.patch.object(
+            CachePageLockModel, "_remove_expired", side_effect=removed_meanwhile
+        ), mock.patch("admin_page_lock.models.cache_model.time.sleep") as sleep:
+            result, data = CachePageLockModel.acquire(
+                page_settings, self.now, self.locked_out, stale_before=self.now
+            )
+        self.assertEqual(result, LOCK_ACQUIRED)
+        self.assertEqual(data["user_reference"], "bob")
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_acquire_lease(self):
+        _, data = self._acquire("alice")
+        page_settings = get_page_settings(CachePageLockModel, "alice")
+        lease_key, tabs_key, checked_key = CachePageLockModel._get_value_keys(
+            page_settings, data["token"]
+        )
+
+        # Values of the lock are written before the lock itself.
+        self.assertEqual(
+            caches[CACHE_ALIAS].get_many([lease_key, tabs_key, checked_key]),
+            {
+                lease_key: (self.now, self.locked_out),
+                tabs_key: 1,
+                checked_key: self.now,
+            },
+        )
@@ -0,0 +1,84 @@
+from __future__ import unicode_literals
+
+import datetime
+
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from admin_page_lock.models.database_model import DatabasePageLockModel
+from admin_page_lock.settings import LOCK_ACQUIRED, LOCK_DENIED
+from tests.utils import LockModelTestMixin, get_page_settings
+
+
+class DatabasePageLockModelTest(LockModelTestMixin, TestCase):
+    model_class = DatabasePageLockModel
+
+    def _create_page_lock(self, user_reference):
+        return DatabasePageLockModel.objects.create(
+            url="/admin/page/1/",
+            url_parameters="",
+            user_reference=user_reference,
+            locked_at=self.now,
+            locked_out=self.locked_out,
+            tab_counter=1,
+        )
+
+    def test_acquire_concurrent(self):
+        # Bob locks the page after alice has found it not locked, only one
+        # active lock of the page is allowed by the unique constraint.
+        self._create_page_lock("bob")
+        page_settings = get_page_settings(DatabasePageLockModel, "alice")
+        self.assertIsNone(
+            DatabasePageLockModel._create_page_lock(
+                page_settings,
+                {
+                    "locked_at": self.now,
+                    "locked_out": self.locked_out,
+                    "user_reference": "alice",
+                    "tab_counter": 1,
+                },
+            )
+        )
+
+        result, data = self._acquire("alice")
+        self.assertEqual(result, LOCK_DENIED)
+        self.assertEqual(data["user_reference"], "bob")
+        self.assertEqual(DatabasePageLockModel.objects.filter(active=True).count(), 1)
+
+    def test_acquire_expired(self):
+        self.locked_out = self.now - datetime.timedelta(seconds=1)
+        self._acquire("alice")
+        self.assertIsNone(self._get_data())
+
+        self.locked_out = self.now + datetime.timedelta(hours=1)
+        result, data = self._acquire("bob")
+        self.assertEqual(result, LOCK_ACQUIRED)
+        self.assertEqual(data["user_reference"], "bob")
+        self.assertEqual(DatabasePageLockModel.objects.filter(active=True).count(), 1)
+
+    def test_acquire_released_meanwhile(self):
+        self._create_page_lock("alice")
+        get_data = DatabasePageLockModel.get_data
+
+        # Alice releases the lock before bob reads it, so bob tries again.
+        def released_meanwhile(page_settings):
+            DatabasePageLockModel.objects.all().delete()
+            return get_data(page_settings)
+
+        with mock.patch.object(
+            DatabasePageLockModel, "get_data", side_effect=released_meanwhile
+        ):
+            result, data = self._acquire("bob")
+        self.assertEqual(result, LOCK_ACQUIRED)
+        self.assertEqual(data["user_reference"], "bob")
+
+    def test_unique_active_page_lock(self):
+        self._create_page_lock("alice")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self._create_page_lock("bob")
+
+        # Inactive locks of the page are not restricted.
+        DatabasePageLockModel.objects.update(active=False)
+        self._create_page_lock("bob")
@@ -0,0 +1,34 @@
+from __future__ import unicode_literals
+
+import datetime
+
+from django.test import SimpleTestCase
+
+from admin_page_lock.models.memory_model import MemoryPageLockModel
+from admin_page_lock.settings import LOCK_ACQUIRED
+from tests.utils import LockModelTestMixin
+
+
+class MemoryPageLockModelTest(LockModelTestMixin, SimpleTestCase):
+    model_class = MemoryPageLockModel
+
+    def setUp(self):
+        super(MemoryPageLockModelTest, self).setUp()
+        MemoryPageLockModel.clear()
+
+    def test_acquire_expired(self):
+        self.locked_out = self.now - datetime.timedelta(seconds=1)
+        self._acquire("alice")
+        self.assertIsNone(self._get_data())
+
+        self.locked_out = self.now + datetime.timedelta(hours=1)
+        result, data = self._acquire("bob")
+        self.assertEqual(result, LOCK_ACQUIRED)
+        self.assertEqual(data["user_reference"], "bob")
+
+    def test_release_user_locks_expired(self):
+        self._acquire("alice", "/admin/page/1/")
+        self.locked_out = self.now - datetime.timedelta(seconds=1)
+        self._acquire("alice", "/admin/page/2/")
+
+        self.assertEqual(MemoryPageLockModel.release_user_locks("alice"), 1)
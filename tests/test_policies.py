@@ -0,0 +1,58 @@
+from __future__ import unicode_literals
+
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, SimpleTestCase
+
+from admin_page_lock.models.cache_model import CachePageLockModel
+from admin_page_lock.models.memory_model import MemoryPageLockModel
+from admin_page_lock.policies import (
+    DEFAULT_POLICY,
+    compile_policies,
+    get_page_policies,
+    get_page_policy,
+)
+from admin_page_lock.utils import get_page_lock_handler
+
+CACHE_MODEL = "admin_page_lock.models.cache_model.CachePageLockModel"
+
+
+class PoliciesTest(SimpleTestCase):
+    def setUp(self):
+        policies = compile_policies(
+            [
+                (r"^/admin/(?P<app>orders)/", {"MODEL": CACHE_MODEL}),
+                # Policies can use the same group names.
+                (r"^/admin/(?P<app>\w+)/(?P=app)/", {"TIMEOUT": 60}),
+                (r"^/admin/", {"API_INTERVAL": 1000}),
+            ]
+        )
+        patcher = mock.patch("admin_page_lock.policies._page_policies", policies)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_compile_policies(self):
+        with self.assertRaises(ImproperlyConfigured):
+            compile_policies([(r"^/admin/(", {})])
+        with self.assertRaises(ImproperlyConfigured):
+            compile_policies([(r"^/admin/", {"UNKNOWN": 1})])
+
+    def test_get_page_policies(self):
+        policies = get_page_policies()
+        self.assertEqual(len(policies), 4)
+        self.assertEqual(policies[0], DEFAULT_POLICY)
+
+    def test_get_page_policy(self):
+        # The first matching pattern wins.
+        self.assertEqual(get_page_policy("/admin/orders/1/").model, CACHE_MODEL)
+        self.assertEqual(get_page_policy("/admin/users/users/1/").timeout, 60)
+        self.assertEqual(get_page_policy("/admin/users/1/").api_interval, 1000)
+        self.assertEqual(get_page_policy("/other/"), DEFAULT_POLICY)
+
+    def test_get_page_lock_handler(self):
+        # Handler uses model given by policy of the page.
+        req = RequestFactory().get("/admin/orders/1/")
+        self.assertIs(get_page_lock_handler(req).model_class, CachePageLockModel)
+        req = RequestFactory().get("/admin/users/1/")
+        self.assertIs(get_page_lock_handler(req).model_class, MemoryPageLockModel)
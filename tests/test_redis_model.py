@@ -0,0 +1,106 @@
+from __future__ import unicode_literals
+
+import json
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase
+
+from admin_page_lock.settings import LOCK_DENIED, LOCK_REACQUIRED
+from tests.utils import LockModelTestMixin, get_page_settings
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401 (scripts of fake `redis`)
+    import smhasher
+
+    # Some builds of `smhasher` import but can't hash.
+    smhasher.murmur3_x64_128("")
+
+    from admin_page_lock.models.redis_model import RedisPageLockModel
+except (ImportError, SystemError):
+    fakeredis = RedisPageLockModel = None
+
+
+@skipIf(fakeredis is None, "fakeredis, lupa or smhasher is not available")
+class RedisPageLockModelTest(LockModelTestMixin, SimpleTestCase):
+    model_class = RedisPageLockModel
+
+    def setUp(self):
+        super(RedisPageLockModelTest, self).setUp()
+        self.redis_client = fakeredis.FakeStrictRedis(server=fakeredis.FakeServer())
+        patcher = mock.patch.object(
+            RedisPageLockModel, "_get_redis_client", return_value=self.redis_client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _set_legacy_lock(self, user_reference, page_full_url="/admin/page/1/"):
+        # Lock stored in JSON string by older versions.
+        page_settings = get_page_settings(RedisPageLockModel, "", page_full_url)
+        self.redis_client.set(
+            page_settings.page_reference,
+            json.dumps(
+                {
+                    "user_reference": user_reference,
+                    "locked_at": self.now.strftime("%Y-%m-%d-%H-%M-%S"),
+                    "locked_out": self.locked_out.strftime("%Y-%m-%d-%H-%M-%S"),
+                    "tab_counter": 1,
+                }
+            ),
+        )
+
+        return page_settings.page_reference
+
+    def test_acquire_legacy(self):
+        page_reference = self._set_legacy_lock("alice")
+
+        data = self._get_data()
+        self.assertEqual(data["user_reference"], "alice")
+        self.assertEqual(data["locked_out"], self.locked_out)
+        self.assertIsNone(data["token"])
+
+        result, data = self._acquire("bob")
+        self.assertEqual(result, LOCK_DENIED)
+        self.assertEqual(data["user_reference"], "alice")
+
+        # Script converts the lock to hash.
+        self.assertEqual(self.redis_client.type(page_reference), b"hash")
+        result, data = self._acquire("alice")
+        self.assertEqual(result, LOCK_REACQUIRED)
+        self.assertEqual(data["tab_counter"], 2)
+
+    def test_get_user_data(self):
+        self._acquire("alice", "/admin/page/1/")
+        self._acquire("bob", "/admin/page/2/")
+
+        user_data = RedisPageLockModel.get_user_data("alice")
+        self.assertEqual(
+            [(i["url"], i["user_reference"]) for i in user_data],
+            [("/admin/page/1/", "alice")],
+        )
+
+    def test_scan_data(self):
+        for i in range(25):
+            self._acquire("alice", "/admin/page/{}/".format(i))
+        legacy_reference = self._set_legacy_lock("bob", "/admin/page/legacy/")
+        for i in range(50):
+            self.redis_client.set("other:{}".format(i), 1)
+
+        # Every lock is listed once, scans of other keys might be empty.
+        pages_data = []
+        cursor = "0"
+        while True:
+            cursor, data = RedisPageLockModel.scan_data(cursor, count=5)
+            pages_data.extend(data)
+            if cursor == "0":
+                break
+
+        page_references = [i["page_reference"] for i in pages_data]
+        self.assertEqual(len(page_references), 26)
+        self.assertEqual(len(set(page_references)), 26)
+        self.assertEqual(
+            sorted(i["url"] for i in pages_data if i["url"] is not None),
+            sorted("/admin/page/{}/".format(i) for i in range(25)),
+        )
+        legacy_data = pages_data[page_references.index(legacy_reference)]
+        self.assertEqual(legacy_data["user_reference"], "bob")
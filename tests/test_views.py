@@ -0,0 +1,160 @@
+from __future__ import unicode_literals
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from admin_page_lock.models.memory_model import MemoryPageLockModel
+from admin_page_lock.settings import LOCK_DENIED
+from tests.utils import get_page_settings, post
+
+PAGE_URL = "/admin/page/1/"
+
+
+class PageLockViewsTest(TestCase):
+    def setUp(self):
+        MemoryPageLockModel.clear()
+
+        # Clients of logged in users.
+        self.clients = {}
+        for user_reference in ("alice", "bob"):
+            self.clients[user_reference] = Client()
+            self.clients[user_reference].force_login(
+                User.objects.create_user(user_reference)
+            )
+
+    def _call(self, user_reference, url_name, **data):
+        return post(
+            self.clients[user_reference],
+            reverse(url_name),
+            url=PAGE_URL,
+            user_reference=user_reference,
+            **data
+        )
+
+    def _get_data(self):
+        return MemoryPageLockModel.get_data(
+            get_page_settings(MemoryPageLockModel, "bob", PAGE_URL)
+        )
+
+    def _open(self, user_reference):
+        return self._call(user_reference, "page_lock_open_page_connection").json()
+
+    def test_open_page_connection(self):
+        data = self._open("alice")
+        self.assertEqual(data["locked_by"], "alice")
+        self.assertFalse(data["reconnected"])
+
+        self.assertTrue(self._open("alice")["reconnected"])
+        self.assertEqual(self._open("bob")["locked_by"], "alice")
+
+    def test_open_page_connection_released(self):
+        # Lock denying the page was released before it was read.
+        with mock.patch.object(
+            MemoryPageLockModel, "acquire", return_value=(LOCK_DENIED, None)
+        ):
+            data = self._open("bob")
+        self.assertFalse(data["is_locked"])
+        self.assertIsNone(data["locked_by"])
+
+    def test_get_page_info(self):
+        data = self._call("bob", "page_lock_get_page_connection").json()
+        self.assertFalse(data["is_locked"])
+
+        self._open("alice")
+        data = self._call("bob", "page_lock_get_page_connection").json()
+        self.assertTrue(data["is_locked"])
+        self.assertEqual(data["locked_by"], "alice")
+
+    def test_get_pages_info(self):
+        self._open("alice")
+
+        response = post(
+            self.clients["bob"],
+            reverse("page_lock_get_pages_info"),
+            urls=[PAGE_URL, "/admin/page/2/"],
+            user_reference="bob",
+        )
+        pages = response.json()["pages"]
+        self.assertEqual(pages[PAGE_URL]["locked_by"], "alice")
+        self.assertFalse(pages["/admin/page/2/"]["is_locked"])
+
+    def test_heartbeat(self):
+        lock_token = self._open("alice")["lock_token"]
+
+        # Nothing has changed for both users.
+        response = self._call(
+            "alice", "page_lock_heartbeat", locked_by="alice", lock_token=lock_token
+        )
+        self.assertEqual(response.status_code, 204)
+        response = self._call("bob", "page_lock_heartbeat", locked_by="alice")
+        self.assertEqual(response.status_code, 204)
+
+        # Page of bob is updated by the response.
+        self._call("alice", "page_lock_close_page_connection", lock_token=lock_token)
+        response = self._call("bob", "page_lock_heartbeat", locked_by="alice")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["is_locked"])
+
+    def test_open_page_connection_token(self):
+        self.assertIsNotNone(self._open("alice")["lock_token"])
+
+        # Fencing token is returned only to user locking the page.
+        self.assertIsNone(self._open("bob")["lock_token"])
+
+    def test_heartbeat_token(self):
+        lock_token = self._open("alice")["lock_token"]
+        self._call("alice", "page_lock_close_page_connection", lock_token=lock_token)
+        new_lock_token = self._open("alice")["lock_token"]
+
+        # Tab of the old lock gets the new one.
+        response = self._call(
+            "alice", "page_lock_heartbeat", locked_by="alice", lock_token=lock_token
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["lock_token"], new_lock_token)
+
+    def test_close_page_connection_token(self):
+        lock_token = self._open("alice")["lock_token"]
+        self._call("alice", "page_lock_close_page_connection", lock_token=lock_token)
+        new_lock_token = self._open("alice")["lock_token"]
+        self.assertGreater(new_lock_token, lock_token)
+
+        # Tab of the old lock doesn't release the new one.
+        self._call("alice", "page_lock_close_page_connection", lock_token=lock_token)
+        data = self._call("bob", "page_lock_get_page_connection").json()
+        self.assertEqual(data["locked_by"], "alice")
+
+    def test_logout(self):
+        self._open("alice")
+        self.assertEqual(self._get_data()["user_reference"], "alice")
+
+        self.clients["alice"].logout()
+        self.assertIsNone(self._get_data())
+
+
+class GetMetricsTest(TestCase):
+    def setUp(self):
+        patcher = mock.patch("admin_page_lock.views.ENABLE_METRICS", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_staff_user(self):
+        url = reverse("page_lock_metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(User.objects.create_user("alice"))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(User.objects.create_user("bob", is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_token(self):
+        url = reverse("page_lock_metrics")
+        with mock.patch("admin_page_lock.views.METRICS_TOKEN", "secret"):
+            response = self.client.get(url, HTTP_AUTHORIZATION="Bearer other")
+            self.assertEqual(response.status_code, 403)
+            response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secret")
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,9 @@
+from __future__ import unicode_literals
+
+from django.conf.urls import include, url
+from django.contrib import admin
+
+urlpatterns = [
+    url(r"^admin/", admin.site.urls),
+    url(r"^page_lock/", include("admin_page_lock.urls")),
+]
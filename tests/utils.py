@@ -0,0 +1,173 @@
+from __future__ import unicode_literals
+
+import datetime
+import json
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from django.utils import timezone
+
+from admin_page_lock.settings import LOCK_ACQUIRED, LOCK_DENIED, LOCK_REACQUIRED
+
+
+def get_page_settings(model_class, user_reference, page_full_url="/admin/page/1/"):
+    # Settings of the page visited by user `user_reference`.
+    req = RequestFactory().get(page_full_url)
+    req.user = User(username=user_reference)
+
+    return model_class.get_page_settings(req, page_full_url)
+
+
+def post(client, path, **data):
+    # Posts `data` the same way as `page_lock.js`.
+    return client.post(
+        path, data=json.dumps(data), content_type="application/x-www-form-urlencoded"
+    )
+
+
+class LockModelTestMixin(object):
+    """
+    Tests of lock operations shared by all models, test case sets
+    `model_class` and whether it releases locks by `release_user_locks`.
+    """
+
+    model_class = None
+    releases_user_locks = True
+
+    def setUp(self):
+        # Timestamps are stored in seconds by some models.
+        self.now = timezone.now().replace(microsecond=0)
+        self.locked_out = self.now + datetime.timedelta(hours=1)
+
+    def _acquire(self, user_reference, page_full_url="/admin/page/1/", **kwargs):
+        page_settings = get_page_settings(
+            self.model_class, user_reference, page_full_url
+        )
+
+        return self.model_class.acquire(
+            page_settings, self.now, self.locked_out, **kwargs
+        )
+
+    def _get_data(self, page_full_url="/admin/page/1/"):
+        return self.model_class.get_data(
+            get_page_settings(self.model_class, "", page_full_url)
+        )
+
+    def test_acquire(self):
+        result, data = self._acquire("alice")
+        self.assertEqual(result, LOCK_ACQUIRED)
+        self.assertEqual(data["user_reference"], "alice")
+        self.assertEqual(data["tab_counter"], 1)
+        self.assertEqual(data["locked_out"], self.locked_out)
+
+        result, data = self._acquire("bob")
+        self.assertEqual(result, LOCK_DENIED)
+        self.assertEqual(data["user_reference"], "alice")
+
+    def test_acquire_more_tabs(self):
+        self._acquire("alice")
+        result, data = self._acquire("alice")
+        self.assertEqual(result, LOCK_REACQUIRED)
+        self.assertEqual(data["tab_counter"], 2)
+
+        self.assertEqual(
+            self._acquire("alice", can_open_more_tabs=False)[0], LOCK_DENIED
+        )
+
+    def test_acquire_stale(self):
+        self._acquire("alice")
+
+        # Alice has not checked the page since the lock was acquired.
+        result, data = self._acquire("bob", stale_before=timezone.now())
+        self.assertEqual(result, LOCK_ACQUIRED)
+        self.assertEqual(data["user_reference"], "bob")
+
+    def test_acquire_token(self):
+        _, data = self._acquire("alice")
+        self.assertEqual(self._get_data()["token"], data["token"])
+
+        # Token is kept by more tabs and increased by the next lock.
+        self.assertEqual(self._acquire("alice")[1]["token"], data["token"])
+        _, new_data = self._acquire("bob", stale_before=timezone.now())
+        self.assertGreater(new_data["token"], data["token"])
+
+    def test_get_data_many(self):
+        self._acquire("alice", "/admin/page/1/")
+        self._acquire("bob", "/admin/page/2/")
+
+        pages_data = self.model_class.get_data_many(
+            [
+                get_page_settings(self.model_class, "", i)
+                for i in ("/admin/page/1/", "/admin/page/3/", "/admin/page/2/")
+            ]
+        )
+        self.assertEqual(
+            [i and i["user_reference"] for i in pages_data], ["alice", None, "bob"]
+        )
+
+    def test_refresh(self):
+        self._acquire("alice")
+
+        data = self.model_class.refresh(get_page_settings(self.model_class, "bob"))
+        self.assertEqual(data["user_reference"], "alice")
+        self.assertIsNone(
+            self.model_class.refresh(
+                get_page_settings(self.model_class, "bob"), stale_before=timezone.now()
+            )
+        )
+
+    def test_release(self):
+        self._acquire("alice")
+        self._acquire("alice")
+        page_settings = get_page_settings(self.model_class, "alice")
+
+        self.assertFalse(
+            self.model_class.release(get_page_settings(self.model_class, "bob"))
+        )
+        self.assertTrue(self.model_class.release(page_settings))
+        self.assertEqual(self._get_data()["tab_counter"], 1)
+        self.assertFalse(self.model_class.release(page_settings))
+        self.assertIsNone(self._get_data())
+
+    def test_release_token(self):
+        _, data = self._acquire("alice")
+        page_settings = get_page_settings(self.model_class, "alice")
+
+        # Tab of an older lock can't release the current one.
+        self.assertFalse(self.model_class.release(page_settings, data["token"] - 1))
+        self.assertEqual(self._get_data()["token"], data["token"])
+        self.assertFalse(self.model_class.release(page_settings, data["token"]))
+        self.assertIsNone(self._get_data())
+
+    def test_release_user_locks(self):
+        self._acquire("alice", "/admin/page/1/")
+        self._acquire("alice", "/admin/page/1/")
+        self._acquire("alice", "/admin/page/2/")
+        self._acquire("bob", "/admin/page/3/")
+
+        count = self.model_class.release_user_locks("alice")
+        if not self.releases_user_locks:
+            self.assertEqual(count, 0)
+            return
+
+        self.assertEqual(count, 2)
+        self.assertIsNone(self._get_data("/admin/page/1/"))
+        self.assertIsNone(self._get_data("/admin/page/2/"))
+        self.assertEqual(self._get_data("/admin/page/3/")["user_reference"], "bob")
+
+    def test_touch(self):
+        _, data = self._acquire("alice")
+        page_settings = get_page_settings(self.model_class, "alice")
+
+        self.assertTrue(self.model_class.touch(page_settings, data["token"]))
+        self.assertFalse(self.model_class.touch(page_settings, data["token"] + 1))
+        self.assertFalse(
+            self.model_class.touch(
+                get_page_settings(self.model_class, "bob"), data["token"]
+            )
+        )
+        self.assertFalse(
+            self.model_class.touch(
+                page_settings, data["token"], stale_before=self.locked_out
+            )
+        )